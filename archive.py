@@ -0,0 +1,168 @@
+"""
+    Content-addressed payload archive for the nhlapi package
+
+    Stores every payload once, keyed by the sha256 of its content, as a zlib
+    compressed blob appended to a single pack file.  A SQLite index maps the
+    hash to the blob's offset and keeps one row per (url, fetch time), so an
+    unchanged payload fetched again costs only an index row and reading any
+    snapshot back is one seek into the pack file.
+
+    Use nhlapi.set_response_archive() to archive every response fetched by
+    get_json_data().
+"""
+
+import os
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+from nhlapi import decode_json
+
+
+class PayloadArchive:
+    """
+    A deduplicated archive of payloads indexed by url and fetch time
+    """
+
+    PACK_NAME = 'payloads.pack'
+    INDEX_NAME = 'index.sqlite'
+
+    def __init__(self, path, level=6):
+        """
+        initialize this PayloadArchive object
+
+        :param self: reference to a PayloadArchive instance
+        :param path: the directory holding the archive. created if it does not exist
+        :param level: the zlib compression level of the blobs
+        """
+        self.path = path
+        self.level = level
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.Lock()
+        self._pack = open(os.path.join(path, self.PACK_NAME), 'a+b')
+        self._db = sqlite3.connect(os.path.join(path, self.INDEX_NAME), check_same_thread=False)
+        self._db.executescript('''
+            CREATE TABLE IF NOT EXISTS blobs (
+                hash TEXT PRIMARY KEY, offset INTEGER, length INTEGER, size INTEGER);
+            CREATE TABLE IF NOT EXISTS snapshots (
+                url TEXT, fetched_at REAL, hash TEXT);
+            CREATE INDEX IF NOT EXISTS snapshots_url ON snapshots (url, fetched_at);
+        ''')
+
+    def store(self, url, body, fetched_at=None):
+        """
+        archive a payload fetched from a url
+
+        :param self: reference to a PayloadArchive instance
+        :param url: the url the payload was fetched from
+        :param body: the payload bytes
+        :param fetched_at: (optional) the fetch time in seconds since the epoch. defaults to now
+        :return: the hash of the payload
+        """
+        body = bytes(body)
+        digest = hashlib.sha256(body).hexdigest()
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        with self._lock:
+            found = self._db.execute('SELECT 1 FROM blobs WHERE hash = ?', (digest,)).fetchone()
+            if not found:
+                blob = zlib.compress(body, self.level)
+                self._pack.seek(0, os.SEEK_END)
+                offset = self._pack.tell()
+                self._pack.write(blob)
+                self._pack.flush()
+                self._db.execute('INSERT INTO blobs VALUES (?, ?, ?, ?)',
+                                 (digest, offset, len(blob), len(body)))
+            self._db.execute('INSERT INTO snapshots VALUES (?, ?, ?)', (url, fetched_at, digest))
+            self._db.commit()
+        return digest
+
+    def get(self, digest):
+        """
+        read a payload by its hash
+
+        :param self: reference to a PayloadArchive instance
+        :param digest: the hash of the payload
+        :return: the payload bytes, or None if it is not in the archive
+        """
+        with self._lock:
+            found = self._db.execute('SELECT offset, length FROM blobs WHERE hash = ?',
+                                     (digest,)).fetchone()
+            if not found:
+                return None
+            self._pack.seek(found[0])
+            blob = self._pack.read(found[1])
+        return zlib.decompress(blob)
+
+    def get_snapshot(self, url, at=None):
+        """
+        read the payload of a url as it was at a point in time
+
+        :param self: reference to a PayloadArchive instance
+        :param url: the url the payload was fetched from
+        :param at: (optional) the time in seconds since the epoch. defaults to the latest
+        :return: the payload bytes of the last snapshot fetched at or before the time,
+                 or None if there is none
+        """
+        at = float('inf') if at is None else at
+        with self._lock:
+            found = self._db.execute(
+                'SELECT hash FROM snapshots WHERE url = ? AND fetched_at <= ? '
+                'ORDER BY fetched_at DESC LIMIT 1', (url, at)).fetchone()
+        return self.get(found[0]) if found else None
+
+    def load_json(self, url, at=None):
+        """
+        read and decode the json payload of a url as it was at a point in time
+
+        :param self: reference to a PayloadArchive instance
+        :param url: the url the payload was fetched from
+        :param at: (optional) the time in seconds since the epoch. defaults to the latest
+        :return: the json data, or None if there is no snapshot
+        """
+        body = self.get_snapshot(url, at)
+        return None if body is None else decode_json(body)
+
+    def history(self, url):
+        """
+        get the snapshots of a url
+
+        :param self: reference to a PayloadArchive instance
+        :param url: the url the payloads were fetched from
+        :return: a list of (fetch time, hash) tuples, oldest first
+        """
+        with self._lock:
+            return self._db.execute('SELECT fetched_at, hash FROM snapshots WHERE url = ? '
+                                    'ORDER BY fetched_at', (url,)).fetchall()
+
+    def stats(self):
+        """
+        get the size of the archive
+
+        :param self: reference to a PayloadArchive instance
+        :return: a dictionary with the number of 'snapshots' and unique 'blobs', the
+                 'payloadBytes' of the unique payloads and the 'storedBytes' in the pack
+        """
+        with self._lock:
+            snapshots = self._db.execute('SELECT COUNT(*) FROM snapshots').fetchone()[0]
+            blobs, size, length = self._db.execute(
+                'SELECT COUNT(*), TOTAL(size), TOTAL(length) FROM blobs').fetchone()
+        return {'snapshots': snapshots, 'blobs': blobs,
+                'payloadBytes': int(size), 'storedBytes': int(length)}
+
+    def close(self):
+        """
+        close the pack file and the index
+
+        :param self: reference to a PayloadArchive instance
+        :return: nothing
+        """
+        with self._lock:
+            self._pack.close()
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
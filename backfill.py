@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+    Resumable season backfill for the nhlapi package
+
+    Builds the work graph of a backfill one unit (url) at a time:
+
+    season    the Schedule of the season, which adds the units of its games
+    boxscore  the boxscore of a game, which adds the units of its players
+    live      the live feed of a game
+    player    the single season stat line of a player
+
+    Units run on a bounded pool of threads, every payload is stored in a
+    PayloadArchive, and the state of every unit is checkpointed in SQLite
+    together with the units it adds, so a restarted backfill skips all the
+    work already done.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import argparse
+import collections
+import concurrent.futures
+import logging
+# from logging import debug
+from logging import info
+from logging import warning
+# from logging import error
+# from logging import critical
+from nhlapi import decode_json
+from transport import get_charset
+from transport import get_default_transport
+from archive import PayloadArchive
+from schedule import Schedule
+from game import Game
+from people import People
+
+
+class Backfill:
+    """
+    A checkpointed, concurrent backfill of seasons, games and players
+    """
+
+    KINDS = ('season', 'boxscore', 'live', 'player')
+    CHECKPOINT_NAME = 'backfill.sqlite'
+
+    def __init__(self, path, workers=8, transport=None, max_attempts=3,
+                 game_types=('R', 'P'), kinds=KINDS):
+        """
+        initialize this Backfill object
+
+        :param self: reference to a Backfill instance
+        :param path: the directory holding the archive and the checkpoints
+        :param workers: the number of units fetched at the same time
+        :param transport: (optional) the transport to fetch with instead of the default transport
+        :param max_attempts: the number of times a failing unit is tried
+        :param game_types: the game types to backfill ('R' regular season, 'P' playoffs)
+        :param kinds: the kinds of units to backfill. seasons are always fetched
+        """
+        self.path = path
+        self.workers = workers
+        self.transport = transport
+        self.max_attempts = max_attempts
+        self.game_types = tuple(game_types)
+        self.kinds = tuple(kinds)
+        self.archive = PayloadArchive(path)
+        self._db = sqlite3.connect(os.path.join(path, self.CHECKPOINT_NAME))
+        self._db.executescript('''
+            CREATE TABLE IF NOT EXISTS units (
+                kind TEXT, key TEXT, url TEXT, status TEXT DEFAULT 'pending',
+                attempts INTEGER DEFAULT 0, bytes INTEGER DEFAULT 0, finished_at REAL,
+                PRIMARY KEY (kind, key));
+            CREATE INDEX IF NOT EXISTS units_status ON units (status);
+        ''')
+        self.counts = collections.Counter()
+        self.elapsed = 0.0
+
+    @classmethod
+    def get_season_url(cls, season):
+        """
+        get the schedule url of a season
+
+        :param season: the first year of the season e.g. 2018 for 2018-2019
+        :return: the url
+        """
+        schedule = Schedule(content={})
+        return schedule.get_ext_url({Schedule.STATS['startDate']: '{}-09-01'.format(season)},
+                                    {Schedule.STATS['endDate']: '{}-08-31'.format(season + 1)})
+
+    def add_seasons(self, *seasons):
+        """
+        add the seasons to backfill.  seasons already added are left as they are.
+
+        :param self: reference to a Backfill instance
+        :param seasons: the first year of each season e.g. 2018 for 2018-2019
+        :return: nothing
+        """
+        self._add_units([('season', str(season), self.get_season_url(season))
+                         for season in seasons])
+        self._db.commit()
+
+    def _add_units(self, units):
+        # returns the units that were new, leaving out the ones already checkpointed
+        added = []
+        for unit in units:
+            if unit[0] in self.kinds + ('season',) and self._db.execute(
+                    'INSERT OR IGNORE INTO units (kind, key, url) VALUES (?, ?, ?)',
+                    unit).rowcount:
+                added.append(unit)
+        return added
+
+    def get_children(self, kind, key, data):
+        """
+        get the units a fetched unit adds to the work graph
+
+        :param self: reference to a Backfill instance
+        :param kind: the kind of the fetched unit
+        :param key: the key of the fetched unit
+        :param data: the json data of the fetched unit
+        :return: a list of (kind, key, url) tuples
+        """
+        children = []
+        if kind == 'season':
+            for date in data.get('dates', []):
+                for game in date.get('games', []):
+                    if game.get('gameType', 'R') not in self.game_types:
+                        continue
+                    entity = Game(game['gamePk'], content={})
+                    children.append(('boxscore', str(game['gamePk']),
+                                     entity.get_ext_url(Game.STATS['boxScore'])))
+                    children.append(('live', str(game['gamePk']),
+                                     entity.get_ext_url(Game.STATS['live'])))
+        elif kind == 'boxscore':
+            season = int(key[:4])
+            for side in ('away', 'home'):
+                for player in data.get('teams', {}).get(side, {}).get('players', {}).values():
+                    player_id = player['person']['id']
+                    entity = People(player_id, content={})
+                    children.append(('player', '{}/{}'.format(player_id, season),
+                                     entity.get_ext_url(People.STATS['statsSingleSeason'],
+                                                        season=season)))
+        return children
+
+    def _fetch_unit(self, kind, key, url):
+        transport = self.transport or get_default_transport()
+        response = transport.fetch(url)
+        if response.status >= 400:
+            raise ValueError('HTTP Error {}: {}'.format(response.status, response.reason))
+        self.archive.store(url, response.body)
+        data = decode_json(response.body, get_charset(response.headers))
+        return len(response.body), self.get_children(kind, key, data)
+
+    def _get_pending(self):
+        return self._db.execute(
+            "SELECT kind, key, url FROM units WHERE status = 'pending' OR "
+            "(status = 'failed' AND attempts < ?) ORDER BY rowid", (self.max_attempts,)).fetchall()
+
+    def run(self, limit=None):
+        """
+        run the backfill until every unit is done (or has failed max_attempts times).
+        the units added by a unit are checkpointed with it, so run() can be stopped
+        at any point and called again later to continue.
+
+        :param self: reference to a Backfill instance
+        :param limit: (optional) stop after this many units
+        :return: the number of units run
+        """
+        started = time.time()
+        ran = 0
+        queued = collections.deque(self._get_pending())
+        running = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while queued or running:
+                while queued and len(running) < self.workers * 2 and \
+                        (limit is None or ran + len(running) < limit):
+                    unit = queued.popleft()
+                    running[pool.submit(self._fetch_unit, *unit)] = unit
+                if not running:
+                    break
+                done, _ = concurrent.futures.wait(
+                    running, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    kind, key, url = running.pop(future)
+                    ran += 1
+                    try:
+                        size, children = future.result()
+                    except Exception as err:  # any failure of a unit is retried on the next run
+                        warning('backfill: {} {} failed: {}'.format(kind, key, err))
+                        self._db.execute("UPDATE units SET status = 'failed', "
+                                         "attempts = attempts + 1 WHERE kind = ? AND key = ?",
+                                         (kind, key))
+                        self.counts[kind + 'Failed'] += 1
+                    else:
+                        self._db.execute("UPDATE units SET status = 'done', attempts = "
+                                         "attempts + 1, bytes = ?, finished_at = ? "
+                                         "WHERE kind = ? AND key = ?",
+                                         (size, time.time(), kind, key))
+                        queued.extend(self._add_units(children))
+                        self.counts[kind] += 1
+                        self.counts['bytes'] += size
+                    self._db.commit()
+        self.elapsed += time.time() - started
+        info('backfill: ran {} units in {:.1f}s'.format(ran, time.time() - started))
+        return ran
+
+    def report(self):
+        """
+        get the progress and throughput of the backfill
+
+        :param self: reference to a Backfill instance
+        :return: a dictionary with the units 'done', 'failed' and 'pending' per kind
+                 (over every run), and the 'units', 'bytes', 'seconds' and
+                 'unitsPerSecond' of this process's runs
+        """
+        progress = {'done': {}, 'failed': {}, 'pending': {}}
+        for kind, status, count in self._db.execute(
+                'SELECT kind, status, COUNT(*) FROM units GROUP BY kind, status'):
+            progress[status][kind] = count
+        units = sum(self.counts[kind] for kind in self.KINDS)
+        progress.update({'units': units, 'bytes': self.counts['bytes'],
+                         'seconds': round(self.elapsed, 3),
+                         'unitsPerSecond': round(units / self.elapsed, 1) if self.elapsed else 0.0})
+        return progress
+
+    def close(self):
+        """
+        close the checkpoints and the archive
+
+        :param self: reference to a Backfill instance
+        :return: nothing
+        """
+        self._db.close()
+        self.archive.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def parse_args():
+    """
+    Parse the options from the command line
+
+    :return: The options as a dictionary
+    """
+    description = 'Backfill the schedules, games and player stats of NHL seasons, resuming ' \
+        'where the last run stopped.'
+    epilog = 'Example use: backfill.py --dir backfill --seasons 2017 2018 --workers 16 ' \
+        '--humanReadable'
+
+    # Standard options for each nhlapi interface
+    parser = argparse.ArgumentParser(description=description, epilog=epilog)
+    parser.add_argument('--humanReadable', help='output in easier to read format for users',
+                        action='store_true')
+    parser.add_argument('--log', default='/dev/null', type=str,
+                        help='the file where the output should be written')
+
+    # Optional user supplied values
+    parser.add_argument('--dir', default='backfill', type=str,
+                        help='the directory where the payloads and checkpoints are kept')
+    parser.add_argument('--seasons', type=int, nargs='*', default=[],
+                        help='the first year of each season to backfill e.g. 2018')
+    parser.add_argument('--workers', default=8, type=int,
+                        help='the number of requests in flight at the same time')
+    parser.add_argument('--limit', type=int, help='stop after this many units')
+    parser.add_argument('--kinds', nargs='+', default=list(Backfill.KINDS),
+                        choices=Backfill.KINDS, help='the kinds of units to backfill')
+
+    args = parser.parse_args()
+
+    if args.log:
+        log_format = '%(asctime)s %(levelname)s: %(message)s'
+        logging.basicConfig(filename=args.log,
+                            format=log_format,
+                            level=logging.DEBUG)
+
+    with Backfill(args.dir, args.workers, kinds=args.kinds) as backfill:
+        backfill.add_seasons(*args.seasons)
+        backfill.run(args.limit)
+        report = backfill.report()
+
+    output = report
+    if args.humanReadable:
+        output = json.dumps(report, indent=1)
+    print(output)
+
+    result = 'backfilled {} units'.format(report['units'])
+    info(result)
+
+    return args
+
+
+if __name__ == '__main__':
+    parse_args()
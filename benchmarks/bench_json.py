@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+    Benchmark the json decoders available to the nhlapi package.
+
+    Compares the original decode-to-str + json.loads path against decoding
+    the raw bytes directly with every installed decoder.  Payloads are read
+    from urls or files, or synthesized in the shape of a live game feed and
+    a season schedule when none are given.
+"""
+
+import os
+import sys
+import json
+import timeit
+import argparse
+import urllib.request
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from nhlapi import JSON_DECODERS  # noqa: E402
+
+
+def make_live_feed(plays=350):
+    """
+    build a payload shaped like a game/{id}/feed/live response
+
+    :param plays: the number of plays to generate
+    :return: the payload as bytes
+    """
+    all_plays = []
+    for index in range(plays):
+        all_plays.append({
+            'players': [{'player': {'id': 8470000 + index % 40, 'fullName': 'Player Name',
+                                    'link': '/api/v1/people/{}'.format(8470000 + index % 40)},
+                         'playerType': 'Shooter'}],
+            'result': {'event': 'Shot', 'eventCode': 'NYR{}'.format(index),
+                       'eventTypeId': 'SHOT', 'description': 'Wrist Shot saved by Goalie'},
+            'about': {'eventIdx': index, 'eventId': index, 'period': 1 + index // 120,
+                      'periodType': 'REGULAR', 'ordinalNum': '1st',
+                      'periodTime': '{:02d}:{:02d}'.format(index % 20, index % 60),
+                      'periodTimeRemaining': '10:00', 'dateTime': '2018-10-26T23:10:00Z',
+                      'goals': {'away': 1, 'home': 2}},
+            'coordinates': {'x': float(index % 99 - 49), 'y': float(index % 85 - 42)},
+            'team': {'id': 3, 'name': 'New York Rangers', 'triCode': 'NYR'}})
+    feed = {'gamePk': 2018020131, 'gameData': {'game': {'pk': 2018020131, 'season': '20182019'}},
+            'liveData': {'plays': {'allPlays': all_plays,
+                                   'scoringPlays': list(range(0, plays, 60))}}}
+    return json.dumps(feed).encode('utf-8')
+
+
+def make_schedule(days=186, games_per_day=8):
+    """
+    build a payload shaped like a season schedule?expand=schedule.linescore response
+
+    :param days: the number of days in the schedule
+    :param games_per_day: the number of games on each day
+    :return: the payload as bytes
+    """
+    dates = []
+    for day in range(days):
+        games = []
+        for index in range(games_per_day):
+            games.append({
+                'gamePk': 2018020001 + day * games_per_day + index,
+                'gameType': 'R', 'season': '20182019', 'gameDate': '2018-10-26T23:00:00Z',
+                'status': {'abstractGameState': 'Final', 'detailedState': 'Final'},
+                'teams': {'away': {'score': index % 5, 'team': {'id': index + 1, 'name': 'Away'},
+                                   'leagueRecord': {'wins': day, 'losses': index, 'ot': 1}},
+                          'home': {'score': day % 6, 'team': {'id': index + 9, 'name': 'Home'},
+                                   'leagueRecord': {'wins': index, 'losses': day, 'ot': 2}}},
+                'linescore': {'currentPeriod': 3, 'periods': [
+                    {'num': num, 'home': {'goals': 1, 'shotsOnGoal': 10},
+                     'away': {'goals': 0, 'shotsOnGoal': 9}} for num in range(1, 4)]}})
+        dates.append({'date': '2018-10-{:02d}'.format(day % 28 + 1), 'totalGames': games_per_day,
+                      'games': games})
+    return json.dumps({'totalGames': days * games_per_day, 'dates': dates}).encode('utf-8')
+
+
+def legacy_loads(raw_data):
+    """ the decode path used before decoders could be selected """
+    return json.loads(raw_data.decode('utf-8'))
+
+
+def bench(name, raw_data, repeat):
+    """
+    time every decoder on one payload and print the results
+
+    :param name: the name to show for the payload
+    :param raw_data: the payload as bytes
+    :param repeat: the number of times to decode the payload per decoder
+    :return: nothing
+    """
+    print('{} ({:,} bytes, {} decodes)'.format(name, len(raw_data), repeat))
+    decoders = [('json (str)', legacy_loads)] + sorted(JSON_DECODERS.items())
+    baseline = None
+    for dec_name, loads in decoders:
+        secs = min(timeit.repeat(lambda loads=loads: loads(raw_data), number=repeat, repeat=3))
+        if baseline is None:
+            baseline = secs
+        print('    {:12s} {:9.2f} ms/decode {:7.2f}x'.format(
+            dec_name, secs * 1000.0 / repeat, baseline / secs))
+    print()
+
+
+def parse_args():
+    """
+    Parse the options from the command line
+
+    :return: The options as a dictionary
+    """
+    description = 'Benchmark the json decoders available to the nhlapi package.'
+    epilog = 'Example use: bench_json.py --url https://statsapi.web.nhl.com/api/v1/game/' \
+        '2018020131/feed/live'
+    parser = argparse.ArgumentParser(description=description, epilog=epilog)
+    parser.add_argument('-u', '--url', action='append', default=[],
+                        help='a url to retrieve a payload from')
+    parser.add_argument('-f', '--filein', action='append', default=[],
+                        help='a file to read a payload from')
+    parser.add_argument('-r', '--repeat', type=int, default=20,
+                        help='the number of decodes to time per decoder')
+    args = parser.parse_args()
+
+    payloads = []
+    for api_url in args.url:
+        with urllib.request.urlopen(api_url) as url:
+            payloads.append((api_url, url.read()))
+    for filename in args.filein:
+        with open(filename, 'rb') as filein:
+            payloads.append((filename, filein.read()))
+    if not payloads:
+        payloads = [('synthetic feed/live', make_live_feed()),
+                    ('synthetic season schedule', make_schedule())]
+
+    for name, raw_data in payloads:
+        bench(name, raw_data, args.repeat)
+
+    return args
+
+
+if __name__ == '__main__':
+    parse_args()
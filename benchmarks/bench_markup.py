@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+    Benchmark the markup path tokenizer of the objmarkup module.
+
+    Times tokenizing and compiling generated markup paths of growing length
+    with the single scan tokenizer, next to the search and replace loop used
+    before it.  With a linear tokenizer the time per step stays flat as the
+    paths grow; the search and replace loop grows with the path length.
+"""
+
+import os
+import re
+import sys
+import timeit
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import objmarkup  # noqa: E402
+
+
+def make_path(steps, segment=0, sep='.'):
+    """
+    build a markup path of keys and indexes
+
+    :param steps: the number of key and index steps in the path
+    :param segment: the number of steps between two separators. 0 for no separators
+    :param sep: the separation character between fields
+    :return: the markup path
+    """
+    parts = []
+    for index in range(steps):
+        parts.append('key{}[{}]'.format(index, index % 10))
+        if segment and index % segment == segment - 1:
+            parts.append(sep)
+    return ''.join(parts) + 'name'
+
+
+# the grammar of the search and replace loop used before the single scan tokenizer
+LEGACY_PATTERN = re.compile(r'([^\[][a-zA-Z_]+[a-zA-z0-9_]?)?(\[([^\]]+)\])', re.M)
+
+
+def legacy_tokenize(path, sep='.'):
+    """ the search and replace loop used to tokenize each segment before """
+    segments = []
+    for index in path.split(sep):
+        steps = []
+        search_result = LEGACY_PATTERN.search(index)
+        while search_result:
+            label, ndx_str, index_val = search_result.groups()
+            index = index.replace((label or '') + ndx_str, '', 1)
+            steps.append((label, int(index_val), index))
+            search_result = LEGACY_PATTERN.search(index)
+        segments.append((steps, index))
+    return segments
+
+
+def tokenize(path):
+    """ tokenize a path without the cache """
+    return objmarkup.tokenize_markup.__wrapped__(path)
+
+
+def compile_path(path):
+    """ tokenize and compile a path without the caches """
+    objmarkup.tokenize_markup.cache_clear()
+    return objmarkup.CompiledMarkup(path, '.')
+
+
+def bench(sizes, segment, repeat):
+    """
+    time every tokenizer on paths of each size and print the results
+
+    :param sizes: the numbers of steps in the generated paths
+    :param segment: the number of steps between two separators. 0 for no separators
+    :param repeat: the number of times to tokenize each path per tokenizer
+    :return: nothing
+    """
+    funcs = [('tokenize', tokenize), ('compile', compile_path), ('legacy', legacy_tokenize)]
+    print('{:>8s} {:>8s}'.format('steps', 'chars') +
+          ''.join(' {:>16s}'.format(name + ' us/step') for name, _ in funcs))
+    for size in sizes:
+        path = make_path(size, segment)
+        line = '{:8d} {:8d}'.format(size, len(path))
+        for _, func in funcs:
+            secs = min(timeit.repeat(lambda func=func: func(path), number=repeat, repeat=3))
+            line += ' {:16.3f}'.format(secs * 1e6 / repeat / size)
+        print(line)
+
+
+def parse_args():
+    """
+    Parse the options from the command line
+
+    :return: The options as a dictionary
+    """
+    description = 'Benchmark the markup path tokenizer of the objmarkup module.'
+    epilog = 'Example use: bench_markup.py --sizes 10 100 1000 10000 --segment 0 --repeat 5'
+    parser = argparse.ArgumentParser(description=description, epilog=epilog)
+    parser.add_argument('-s', '--sizes', type=int, nargs='+', default=[10, 100, 1000, 5000],
+                        help='the numbers of steps in the generated paths')
+    parser.add_argument('-g', '--segment', type=int, default=0,
+                        help='the number of steps between two separators (0 for none)')
+    parser.add_argument('-r', '--repeat', type=int, default=5,
+                        help='the number of times to tokenize each path per tokenizer')
+    args = parser.parse_args()
+
+    bench(args.sizes, args.segment, args.repeat)
+
+    return args
+
+
+if __name__ == '__main__':
+    parse_args()
@@ -0,0 +1,131 @@
+"""
+    Response cache for the nhlapi package
+
+    Keeps the bodies of recent responses in memory, keyed by url, so repeated
+    requests for the same data are served without going upstream.  Each entry
+    expires after a time to live, which can be set per endpoint (a live feed
+    goes stale in seconds, a roster in hours).
+
+    Use nhlapi.set_response_cache() to have get_json_data() (and so every
+    entity class) read through the cache.
+"""
+
+import time
+import threading
+import collections
+from transport import get_endpoint
+
+# A cached response body and its charset, with the time it was fetched.
+CacheEntry = collections.namedtuple('CacheEntry', ['body', 'charset', 'fetched_at'])
+
+
+class ResponseCache:
+    """
+    An in-memory, least recently used cache of response bodies with per endpoint ttls
+    """
+
+    def __init__(self, ttl=60.0, max_entries=4096, ttls=None):
+        """
+        initialize this ResponseCache object
+
+        :param self: reference to a ResponseCache instance
+        :param ttl: the seconds an entry is fresh for when its endpoint has no ttl
+        :param max_entries: the number of entries kept before the least recently used
+                            ones are dropped
+        :param ttls: (optional) a dictionary of endpoint (see transport.get_endpoint)
+                     to its ttl e.g. {'/api/v1/game/{id}/feed/live': 5}
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.ttls = dict(ttls or {})
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_ttl(self, url):
+        """
+        get the time to live of the entries of a url
+
+        :param self: reference to a ResponseCache instance
+        :param url: the url
+        :return: the ttl in seconds
+        """
+        return self.ttls.get(get_endpoint(url), self.ttl) if self.ttls else self.ttl
+
+    def get_entry(self, url):
+        """
+        get the entry of a url whether or not it has expired
+
+        :param self: reference to a ResponseCache instance
+        :param url: the url
+        :return: the CacheEntry, or None if the url is not cached
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                self._entries.move_to_end(url)
+            return entry
+
+    def get(self, url, max_age=None):
+        """
+        get the entry of a url if it is fresh
+
+        :param self: reference to a ResponseCache instance
+        :param url: the url
+        :param max_age: (optional) the oldest entry in seconds to accept instead of the ttl
+        :return: the CacheEntry, or None if the url is not cached or has expired
+        """
+        entry = self.get_entry(url)
+        max_age = self.get_ttl(url) if max_age is None else max_age
+        if entry is None or time.time() - entry.fetched_at > max_age:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def put(self, url, body, charset=None, fetched_at=None):
+        """
+        cache the body of a response
+
+        :param self: reference to a ResponseCache instance
+        :param url: the url the body was fetched from
+        :param body: the response body as bytes
+        :param charset: (optional) the charset of the body
+        :param fetched_at: (optional) the fetch time in seconds since the epoch. defaults to now
+        :return: the CacheEntry
+        """
+        entry = CacheEntry(bytes(body), charset,
+                           time.time() if fetched_at is None else fetched_at)
+        with self._lock:
+            self._entries[url] = entry
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, url=None):
+        """
+        drop the entry of a url, or every entry
+
+        :param self: reference to a ResponseCache instance
+        :param url: (optional) the url to drop. if None, drop every entry
+        :return: nothing
+        """
+        with self._lock:
+            if url is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(url, None)
+
+    def stats(self):
+        """
+        get the use of the cache
+
+        :param self: reference to a ResponseCache instance
+        :return: a dictionary with the number of 'entries', 'hits' and 'misses'
+        """
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
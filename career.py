@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+    Career aggregation for the nhlapi package
+
+    Fetches People stats for many players, caches the splits and keeps derived
+    rollups (totals, per-60 rates, rolling N-game windows and streaks) that are
+    updated incrementally as new game log entries arrive.
+"""
+
+import json
+import argparse
+import collections
+import concurrent.futures
+import logging
+# from logging import debug
+from logging import info
+# from logging import warning
+# from logging import error
+# from logging import critical
+from people import People
+
+
+def toi_seconds(value):
+    """
+    convert a time on ice value such as '17:32' (or '1234:56') to seconds
+
+    :param value: the time on ice string
+    :return: the number of seconds
+    """
+    if not value:
+        return 0
+    minutes, _, seconds = str(value).partition(':')
+    return int(minutes) * 60 + int(seconds or 0)
+
+
+class PlayerRollup:
+    """
+    Rollups for one player kept up to date one game at a time
+    """
+
+    # The streaks tracked for each player and the test for a game extending it.
+    STREAKS = {'point': lambda stat: stat.get('points', 0) > 0,
+               'goal': lambda stat: stat.get('goals', 0) > 0}
+
+    def __init__(self, window=10):
+        """
+        initialize this PlayerRollup object
+
+        :param self: reference to a PlayerRollup instance
+        :param window: the number of games in the rolling window
+        """
+        self.window = window
+        self.games = 0
+        self.last_date = ''
+        self.game_ids = set()
+        self.totals = collections.Counter()
+        self.recent = collections.deque()
+        self.window_totals = collections.Counter()
+        self.streaks = {name: 0 for name in self.STREAKS}
+        self.longest = {name: 0 for name in self.STREAKS}
+
+    @classmethod
+    def game_values(cls, split):
+        """
+        get the numeric values of one game log split
+
+        :param split: a gameLog split as returned by the stats api
+        :return: a dictionary of stat name to value. time on ice values are in seconds
+        """
+        values = {}
+        for key, value in split.get('stat', {}).items():
+            if isinstance(value, bool):
+                continue
+            if isinstance(value, (int, float)):
+                values[key] = value
+            elif key.endswith('TimeOnIce') or key == 'timeOnIce':
+                values[key] = toi_seconds(value)
+        return values
+
+    def add_game(self, split):
+        """
+        add one game to the rollups in O(1)
+
+        :param self: reference to a PlayerRollup instance
+        :param split: a gameLog split as returned by the stats api
+        :return: True if the game was added, False if it was already counted
+        """
+        game_id = split.get('game', {}).get('gamePk', split.get('date'))
+        if game_id in self.game_ids:
+            return False
+        self.game_ids.add(game_id)
+        self.games += 1
+        self.last_date = max(self.last_date, split.get('date', ''))
+
+        values = self.game_values(split)
+        self.totals.update(values)
+
+        self.recent.append(values)
+        self.window_totals.update(values)
+        if len(self.recent) > self.window:
+            self.window_totals.subtract(self.recent.popleft())
+
+        for name, extends in self.STREAKS.items():
+            if extends(split.get('stat', {})):
+                self.streaks[name] += 1
+                self.longest[name] = max(self.longest[name], self.streaks[name])
+            else:
+                self.streaks[name] = 0
+        return True
+
+    def per_60(self, key, window=False):
+        """
+        get a stat as a rate per 60 minutes of ice time
+
+        :param self: reference to a PlayerRollup instance
+        :param key: the stat name e.g. 'points'
+        :param window: True to use the rolling window instead of the career totals
+        :return: the rate, or 0.0 if the player has no ice time
+        """
+        totals = self.window_totals if window else self.totals
+        seconds = totals['timeOnIce']
+        if not seconds:
+            return 0.0
+        return totals[key] * 3600.0 / seconds
+
+    def summary(self):
+        """
+        get the rollups as a dictionary
+
+        :param self: reference to a PlayerRollup instance
+        :return: the rollups
+        """
+        return {'games': self.games,
+                'lastDate': self.last_date,
+                'totals': dict(self.totals),
+                'window': {'games': len(self.recent), 'totals': dict(self.window_totals)},
+                'per60': {key: self.per_60(key) for key in ('goals', 'assists', 'points', 'shots')
+                          if key in self.totals},
+                'streaks': dict(self.streaks),
+                'longestStreaks': dict(self.longest)}
+
+
+class CareerAggregator:
+    """
+    Fetch, cache and aggregate People stats for many players
+    """
+
+    def __init__(self, stats=('yearByYear', 'careerRegularSeason', 'gameLog'),
+                 window=10, season=None, workers=4):
+        """
+        initialize this CareerAggregator object
+
+        :param self: reference to a CareerAggregator instance
+        :param stats: the People.STATS names to fetch for each player
+        :param window: the number of games in the rolling windows
+        :param season: (optional) the starting year of the season to fetch e.g. 2018
+        :param workers: the number of players to fetch at the same time
+        """
+        self.stats = tuple(stats)
+        self.window = window
+        self.season = season
+        self.workers = workers
+        self.splits = {}
+        self.rollups = {}
+
+    def get_url(self, player_id):
+        """
+        get the url that fetches every stat type for a player in one request
+
+        :param self: reference to a CareerAggregator instance
+        :param player_id: the ID of the player as known to NHL.com
+        :return: the url
+        """
+        player = People(player_id, content={})
+        return player.get_ext_url(*[People.STATS[stat] for stat in self.stats],
+                                  season=self.season)
+
+    def fetch(self, *player_ids):
+        """
+        fetch the stats for each player (one request per player for all of the
+        stat types) and add them to the cache and rollups
+
+        :param self: reference to a CareerAggregator instance
+        :param player_ids: the IDs of the players as known to NHL.com
+        :return: nothing
+        """
+        def _load(player_id):
+            player = People(player_id, content={})
+            player.load_ext_url(*[People.STATS[stat] for stat in self.stats],
+                                season=self.season)
+            return player_id, player.content
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for player_id, content in pool.map(_load, player_ids):
+                self.add_stats(player_id, content)
+        info('career: fetched stats for {} players'.format(len(player_ids)))
+
+    def add_stats(self, player_id, content):
+        """
+        add the content of a People stats response to the cache and rollups
+
+        :param self: reference to a CareerAggregator instance
+        :param player_id: the ID of the player as known to NHL.com
+        :param content: the stats response e.g. People.content after load_ext_url()
+        :return: nothing
+        """
+        if not content or 'stats' not in content:
+            return
+        for stat in content['stats']:
+            name = stat['type']['displayName']
+            if name == 'gameLog':
+                self.add_game_log(player_id, stat.get('splits', []))
+            else:
+                self.splits[(player_id, name)] = stat.get('splits', [])
+
+    def add_game_log(self, player_id, splits):
+        """
+        add game log splits for a player.  Only the games not seen before are
+        processed, so polling the current season costs O(new games).
+
+        :param self: reference to a CareerAggregator instance
+        :param player_id: the ID of the player as known to NHL.com
+        :param splits: gameLog splits in any order (the api returns newest first)
+        :return: the number of new games added
+        """
+        rollup = self.rollups.get(player_id)
+        if rollup is None:
+            rollup = self.rollups[player_id] = PlayerRollup(self.window)
+        cached = self.splits.setdefault((player_id, 'gameLog'), [])
+
+        new_splits = [split for split in splits
+                      if split.get('game', {}).get('gamePk', split.get('date'))
+                      not in rollup.game_ids]
+        if not new_splits:
+            return 0
+        new_splits.sort(key=lambda split: split.get('date', ''))
+        cached.extend(new_splits)
+
+        if new_splits[0].get('date', '') < rollup.last_date:
+            # an older game arrived late, so the windows and streaks are rebuilt in order
+            cached.sort(key=lambda split: split.get('date', ''))
+            rollup = self.rollups[player_id] = PlayerRollup(self.window)
+            for split in cached:
+                rollup.add_game(split)
+        else:
+            for split in new_splits:
+                rollup.add_game(split)
+        return len(new_splits)
+
+    def get_splits(self, player_id, stat):
+        """
+        get the cached splits of a stat type for a player
+
+        :param self: reference to a CareerAggregator instance
+        :param player_id: the ID of the player as known to NHL.com
+        :param stat: the stat type name e.g. 'yearByYear'
+        :return: the list of splits, or an empty list if none are cached
+        """
+        return self.splits.get((player_id, stat), [])
+
+    def get_rollup(self, player_id):
+        """
+        get the rollups for a player
+
+        :param self: reference to a CareerAggregator instance
+        :param player_id: the ID of the player as known to NHL.com
+        :return: the PlayerRollup, or None if no game logs were added for the player
+        """
+        return self.rollups.get(player_id)
+
+
+def parse_args():
+    """
+    Parse the options from the command line
+
+    :return: The options as a dictionary
+    """
+    description = 'Use the nhlapi/People class to aggregate the stats of one or more NHL players.'
+    epilog = 'Example use: career.py 8471214 8478402 --year=2018 --window=5 --humanReadable'
+
+    # Standard options for each nhlapi interface
+    parser = argparse.ArgumentParser(description=description, epilog=epilog)
+    parser.add_argument('--humanReadable', help='output in easier to read format for users',
+                        action='store_true')
+    parser.add_argument(
+        '--log', default='/dev/null', type=str,
+        help='the file where the output should be written')
+
+    # Optional user supplied values
+    parser.add_argument('playerIds', help='the player IDs', type=int, nargs='+')
+    parser.add_argument('-y', '--year', metavar='year', help='the year to retrieve', type=int)
+    parser.add_argument('-w', '--window', help='the number of games in the rolling window',
+                        type=int, default=10)
+
+    args = parser.parse_args()
+
+    if args.log:
+        log_format = '%(asctime)s %(levelname)s: %(message)s'
+        logging.basicConfig(filename=args.log,
+                            format=log_format,
+                            level=logging.DEBUG)
+
+    aggregator = CareerAggregator(window=args.window, season=args.year)
+    aggregator.fetch(*args.playerIds)
+
+    output = {}
+    for player_id in args.playerIds:
+        rollup = aggregator.get_rollup(player_id)
+        output[player_id] = rollup.summary() if rollup else {}
+    if args.humanReadable:
+        output = json.dumps(output, indent=1)
+    print(output)
+
+    result = 'aggregated stats for ids: {}'.format(args.playerIds)
+    info(result)
+
+    return args
+
+
+if __name__ == '__main__':
+    #
+    # 8471214 playerPk
+    parse_args()
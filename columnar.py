@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+    Columnar (Arrow) export for the objmarkup module
+
+    Flattens json objects into one column per markup path, keeping the native
+    value types, and writes them to a Parquet or Feather file one row group at
+    a time, so a stream of payloads (e.g. a season of boxscores) never has to
+    be held in memory at once.
+
+    Without an explicit schema the row groups are spilled to temporary Arrow
+    files as they fill, and the types of the columns are settled when the file
+    is closed: a column that is null in some row groups takes the type of the
+    others, a column holding both ints and floats is written as floats, and a
+    field first found in a later row group is null in the earlier ones.
+
+    Requires pyarrow.
+"""
+
+import os
+import tempfile
+# from logging import debug
+from logging import info
+# from logging import warning
+# from logging import error
+# from logging import critical
+from objmarkup import JsonMarkup
+from objmarkup import compile_markup
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+class ColumnarWriter:
+    """
+    Write json objects as typed columns to a Parquet or Feather file
+    """
+
+    FORMATS = ('parquet', 'feather')
+
+    def __init__(self, filename, fields=None, markup=None, file_format='parquet',
+                 row_group_size=65536, sep=None, compression='zstd', schema=None):
+        """
+        initialize this ColumnarWriter object
+
+        :param self: reference to a ColumnarWriter instance
+        :param filename: the file to write
+        :param fields: (optional) the markup path of each column, relative to a row.
+                       defaults to every path found in the rows (or the fields of the schema)
+        :param markup: (optional) the markup path of the rows in each object, e.g.
+                       'liveData.plays.allPlays'. a list there gives one row per item.
+                       defaults to one row per object
+        :param file_format: 'parquet' or 'feather'
+        :param row_group_size: the number of rows buffered before they are written
+        :param sep: (optional) the separation character between fields
+        :param compression: the compression codec of the file, or None
+        :param schema: (optional) a pyarrow.Schema, or a dictionary of field to pyarrow type,
+                       of the columns. row groups are then written as they fill instead of
+                       being spilled until the types are known
+        """
+        if pyarrow is None:
+            raise ImportError('the columnar module requires pyarrow (pip install pyarrow)')
+        if file_format not in self.FORMATS:
+            raise ValueError('format "{}" is not available (choose from: {})'.format(
+                file_format, ', '.join(self.FORMATS)))
+        self.filename = filename
+        self.fields = list(fields) if fields else None
+        self.file_format = file_format
+        self.row_group_size = max(1, row_group_size)
+        self.compression = compression
+        self.flattener = JsonMarkup(None)
+        if sep is not None:
+            self.flattener.sep = sep
+        self.rows_markup = compile_markup(markup, self.flattener.sep) if markup else None
+        self.field_markups = None
+        self.schema = None
+        if schema is not None:
+            self.schema = schema if isinstance(schema, pyarrow.Schema) else \
+                pyarrow.schema(list(schema.items()))
+            if self.fields is None:
+                self.fields = self.schema.names
+        self.rows = 0
+        self._buffer = []
+        self._writer = None
+        self._found = {}
+        self._spill_dir = None
+        self._spilled = []
+
+    def _get_row(self, item):
+        if self.field_markups is None:
+            return dict(self.flattener.get_pairs(item))
+        row = {}
+        for field, markup in self.field_markups:
+            try:
+                row[field] = markup(item)
+            except (KeyError, IndexError, TypeError):
+                row[field] = None
+        return row
+
+    def add(self, obj):
+        """
+        add the rows of one object, writing a row group whenever one is full
+
+        :param self: reference to a ColumnarWriter instance
+        :param obj: a json object
+        :return: the number of rows added
+        """
+        if self.fields is not None and self.field_markups is None:
+            self.field_markups = [(field, compile_markup(field, self.flattener.sep))
+                                  for field in self.fields]
+        items = self.rows_markup(obj) if self.rows_markup else obj
+        if not JsonMarkup.is_list(items):
+            items = [items]
+        for item in items:
+            self._buffer.append(self._get_row(item))
+            if len(self._buffer) >= self.row_group_size:
+                self.flush()
+        return len(items)
+
+    def add_all(self, objs):
+        """
+        add the rows of every object from an iterable
+
+        :param self: reference to a ColumnarWriter instance
+        :param objs: an iterable of json objects
+        :return: the number of rows added
+        """
+        return sum(self.add(obj) for obj in objs)
+
+    def _get_schema(self, types):
+        # settle the type of each column from its types in every row group
+        fields = []
+        for name, column_types in types.items():
+            column_types = set(column_type for column_type in column_types
+                               if not pyarrow.types.is_null(column_type))
+            if not column_types:
+                # no values to infer a type from
+                column_type = pyarrow.string()
+            elif len(column_types) == 1:
+                column_type = column_types.pop()
+            elif all(pyarrow.types.is_integer(column_type) or
+                     pyarrow.types.is_floating(column_type) for column_type in column_types):
+                column_type = pyarrow.float64()
+            else:
+                raise ValueError('columnar: column "{}" holds values of different types: {}'.format(
+                    name, ', '.join(sorted(str(column_type) for column_type in column_types))))
+            fields.append(pyarrow.field(name, column_type))
+        return pyarrow.schema(fields)
+
+    def _get_batch(self, columns, num_rows):
+        # columns maps a field to its values (a list or an array), missing fields are null
+        arrays = []
+        for field in self.schema:
+            values = columns.get(field.name)
+            try:
+                if values is None:
+                    arrays.append(pyarrow.nulls(num_rows, field.type))
+                elif isinstance(values, list):
+                    arrays.append(pyarrow.array(values, type=field.type))
+                else:
+                    arrays.append(values.cast(field.type))
+            except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError,
+                    pyarrow.ArrowNotImplementedError) as err:
+                raise ValueError('columnar: column "{}" does not hold {} values: {}'.format(
+                    field.name, field.type, err))
+        return pyarrow.record_batch(arrays, schema=self.schema)
+
+    def _open(self):
+        if self.file_format == 'parquet':
+            self._writer = pyarrow.parquet.ParquetWriter(self.filename, self.schema,
+                                                         compression=self.compression)
+        else:
+            options = pyarrow.ipc.IpcWriteOptions(compression=self.compression)
+            self._writer = pyarrow.ipc.new_file(self.filename, self.schema, options=options)
+
+    def _spill(self, rows):
+        # write a row group with the types inferred from its own rows to a temporary file
+        if self.fields is None:
+            for row in rows:
+                self._found.update(dict.fromkeys(row))
+        fields = self.fields if self.fields is not None else list(self._found)
+        arrays = []
+        for field in fields:
+            try:
+                arrays.append(pyarrow.array([row.get(field) for row in rows]))
+            except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError) as err:
+                raise ValueError('columnar: column "{}" holds values of different types: '
+                                 '{}'.format(field, err))
+        batch = pyarrow.record_batch(arrays, names=fields)
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.TemporaryDirectory(
+                dir=os.path.dirname(os.path.abspath(self.filename)))
+        filename = os.path.join(self._spill_dir.name, '{}.arrow'.format(len(self._spilled)))
+        with pyarrow.OSFile(filename, 'wb') as sink:
+            with pyarrow.ipc.new_file(sink, batch.schema) as writer:
+                writer.write_batch(batch)
+        self._spilled.append((filename, batch.schema))
+
+    def flush(self):
+        """
+        write the buffered rows as one row group (to a temporary file until the
+        types of the columns are settled when there is no explicit schema)
+
+        :param self: reference to a ColumnarWriter instance
+        :return: nothing
+        """
+        if not self._buffer:
+            return
+        rows, self._buffer = self._buffer, []
+        if self.schema is None:
+            self._spill(rows)
+        else:
+            if self._writer is None:
+                self._open()
+            columns = {field.name: [row.get(field.name) for row in rows] for field in self.schema}
+            self._writer.write_batch(self._get_batch(columns, len(rows)))
+        self.rows += len(rows)
+
+    def _write_spilled(self):
+        types = {}
+        for _, schema in self._spilled:
+            for field in schema:
+                types.setdefault(field.name, []).append(field.type)
+        self.schema = self._get_schema(types)
+        self._open()
+        for filename, _ in self._spilled:
+            with pyarrow.memory_map(filename) as source:
+                batch = pyarrow.ipc.open_file(source).get_batch(0)
+                columns = dict(zip(batch.schema.names, batch.columns))
+                self._writer.write_batch(self._get_batch(columns, batch.num_rows))
+
+    def close(self):
+        """
+        write the remaining rows and close the file
+
+        :param self: reference to a ColumnarWriter instance
+        :return: the number of rows written
+        """
+        self.flush()
+        try:
+            if self._spilled:
+                self._write_spilled()
+        finally:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+            if self._spill_dir is not None:
+                self._spill_dir.cleanup()
+                self._spill_dir = None
+                self._spilled = []
+        info('columnar: wrote {} rows of {} columns to "{}"'.format(
+            self.rows, len(self.schema or []), self.filename))
+        return self.rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def write_columnar(filename, objs, **kwargs):
+    """
+    write a stream of json objects to a Parquet or Feather file
+
+    :param filename: the file to write
+    :param objs: an iterable of json objects
+    :param kwargs: the ColumnarWriter options e.g. markup='liveData.plays.allPlays'
+    :return: the number of rows written
+    """
+    with ColumnarWriter(filename, **kwargs) as writer:
+        writer.add_all(objs)
+    return writer.rows
+
+
+def read_columnar(filename):
+    """
+    read a Parquet or Feather file written by a ColumnarWriter
+
+    :param filename: the file to read
+    :return: a pyarrow Table
+    """
+    if pyarrow is None:
+        raise ImportError('the columnar module requires pyarrow (pip install pyarrow)')
+    if filename.endswith(('.feather', '.arrow')):
+        with pyarrow.memory_map(filename) as source:
+            return pyarrow.ipc.open_file(source).read_all()
+    return pyarrow.parquet.read_table(filename)
@@ -4,15 +4,25 @@
 """
 
 # import sys
+import copy
 import json
 import argparse
+import collections
 import logging
 # from logging import debug
 from logging import info
-# from logging import warning
+from logging import warning
 # from logging import error
 # from logging import critical
+from nhlapi import BASE_URL
 from nhlapi import get_json_data
+from planner import load_views
+
+
+# A compact record of one play from the live feed.
+# players is a tuple of (player id, player type) pairs e.g. ((8478402, 'Scorer'),)
+PlayEvent = collections.namedtuple(
+    'PlayEvent', ['index', 'event', 'period', 'time', 'x', 'y', 'team', 'players'])
 
 
 class Game:
@@ -32,9 +42,10 @@ class Game:
                  STATS['lineScore']: 'linescore',
                  STATS['content']: 'content'}
 
-    base_url = 'https://statsapi.web.nhl.com/api/v1/'
+    base_url = BASE_URL
 
-    def __init__(self, nhl_id, url=None, content=None):
+    def __init__(self, nhl_id, url=None, content=None, transport=None, soft_ttl=None,
+                 hard_ttl=None):
         """
         initialize this Game object
 
@@ -42,10 +53,20 @@ class Game:
         :param nhl_id: the ID of this game as known to NHL.com
         :param url: (optional) url to use to get the data for this object
         :param content: (optional) content for this object instance
+        :param transport: (optional) the transport to fetch with instead of the default transport
+        :param soft_ttl: (optional) read cached content younger than this many seconds, and
+                         older content too while it is refreshed in the background
+        :param hard_ttl: (optional) with soft_ttl, wait for a fetch once the cached content
+                         is older than this many seconds
         """
         self.url = ''
+        self.transport = transport
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = hard_ttl
         self.name = ''
         self.content = {}
+        self.views = {}
+        self.play_cursor = 0
         self.nhl_id = nhl_id
         if url is not None:
             self.url = url
@@ -54,7 +75,7 @@ class Game:
         if content is not None:
             self.content = content
         else:
-            self.content = get_json_data(self.url)
+            self.content = get_json_data(self.url, self.transport, self.soft_ttl, self.hard_ttl)
 
         if self.content and 'teams' in self.content:
             team_name1 = self.content['teams']['away']['team']['name']
@@ -62,30 +83,157 @@ class Game:
             self.name = team_name1 + ' at ' + team_name2
 
     def get_ext_url(self, *modifiers, **kwargs):
-        """ get extra stats url's """
-        sep = '?'
+        """
+        get extra stats url's.  each Game modifier is a separate endpoint under
+        game/<id>/ (not a query parameter), so a url holds exactly one of them;
+        use planner.load_views() to load several stats in one call.
+
+        :param self: reference to a Game instance
+        :param modifiers: one of the STATS values e.g. Game.STATS['boxScore']
+        :param kwargs: diff_time, the startTimecode of the liveDiffTime changes
+        :return: the url, under the game/<id>/ root of this game's url
+        """
         suffix = ''
-        url = self.url + '/'
         if kwargs and 'diff_time' in kwargs and kwargs['diff_time']:
             suffix = '?startTimecode={}'.format(kwargs['diff_time'])
-        if isinstance(modifiers, int):
-            return url + sep + self.modifiers[modifiers] + suffix
-        for elem in modifiers:
-            if isinstance(elem, (int, str, float)):
-                url += sep + self.modifiers[int(elem)]
-            elif isinstance(elem, dict):
-                for key, value in elem.items():
-                    if isinstance(value, (int, str, float)):
-                        url += sep + self.modifiers[key].format(value)
-                    else:
-                        url += sep + self.modifiers[key].format(*value)
-            sep = '&'
-        return url + suffix
+        if len(modifiers) != 1:
+            raise ValueError('a game url takes exactly one modifier, not {} (use '
+                             'planner.load_views() for several)'.format(len(modifiers)))
+        return self.get_root_url() + self.modifiers[int(modifiers[0])].strip('/') + suffix
+
+    def get_root_url(self):
+        """
+        get the root of this game's endpoints from its url, so a url given to the
+        constructor (e.g. of a gateway) is kept for the extra stats too
+
+        :param self: reference to a Game instance
+        :return: the url up to and including 'game/<id>/', or the url itself
+                 (without its query) as the root when it has no such part
+        """
+        url = self.url.split('?')[0]
+        marker = 'game/{}/'.format(self.nhl_id)
+        if marker in url:
+            return url[:url.index(marker) + len(marker)]
+        return url.rstrip('/') + '/'
 
     def load_ext_url(self, *modifiers, **kwargs):
         """ load the values from the extra data specified """
-        url = self.get_ext_url(modifiers, **kwargs)
-        self.content = get_json_data(url)
+        url = self.get_ext_url(*modifiers, **kwargs)
+        self.content = get_json_data(url, self.transport, self.soft_ttl, self.hard_ttl)
+
+    @classmethod
+    def get_play_event(cls, index, play):
+        """
+        get the compact record of a play from the live feed
+
+        :param index: the index of the play in liveData.plays.allPlays
+        :param play: the play
+        :return: a PlayEvent
+        """
+        about = play.get('about', {})
+        coordinates = play.get('coordinates', {})
+        players = tuple((entry['player']['id'], entry.get('playerType', ''))
+                        for entry in play.get('players', []))
+        return PlayEvent(index, play.get('result', {}).get('eventTypeId', ''),
+                         about.get('period'), about.get('periodTime', ''),
+                         coordinates.get('x'), coordinates.get('y'),
+                         play.get('team', {}).get('id'), players)
+
+    def iter_plays(self, since=None):
+        """
+        iterate over the plays of the live feed that have not been processed yet.
+        the cursor is advanced past each play as it is yielded, so calling this
+        again after new plays arrive only yields the new plays.
+
+        :param self: reference to a Game instance
+        :param since: (optional) the index of the first play to yield instead of the cursor
+        :return: a generator yielding a PlayEvent for each play
+        """
+        feed = self.content if self.content and 'liveData' in self.content \
+            else self.views.get('live')
+        plays = feed['liveData']['plays']['allPlays'] if feed else []
+        start = self.play_cursor if since is None else since
+        for index in range(start, len(plays)):
+            self.play_cursor = index + 1
+            yield self.get_play_event(index, plays[index])
+
+    def poll_plays(self):
+        """
+        update the live feed and iterate over the plays added since the last poll.
+        once a feed with a timestamp is loaded, only the changes since then are
+        fetched from the diffPatch endpoint and applied to it; the whole feed is
+        loaded the first time and whenever the changes cannot be applied.
+
+        :param self: reference to a Game instance
+        :return: a generator yielding a PlayEvent for each new play
+        """
+        feed = self.content if self.content and 'liveData' in self.content \
+            else self.views.get('live')
+        timecode = feed.get('metaData', {}).get('timeStamp') if feed else None
+        if timecode:
+            diffs = get_json_data(self.get_ext_url(self.STATS['liveDiffTime'], diff_time=timecode),
+                                  self.transport)
+            try:
+                if not isinstance(diffs, list):
+                    raise ValueError('no changes were returned')
+                apply_json_patch(feed, [operation for diff in diffs for operation in diff['diff']])
+                return self.iter_plays()
+            except (KeyError, IndexError, TypeError, ValueError) as err:
+                warning('game: the changes to the live feed of {} did not apply ({}), '
+                        'reloading it'.format(self.nhl_id, err))
+        self.load_ext_url(self.STATS['live'])
+        return self.iter_plays()
+
+
+def _get_pointer_parent(obj, pointer):
+    # the container holding the last token of a JSON pointer, and that token
+    if not pointer:
+        raise ValueError('patching the whole document is not supported')
+    tokens = [token.replace('~1', '/').replace('~0', '~') for token in pointer.split('/')[1:]]
+    for token in tokens[:-1]:
+        obj = obj[int(token)] if isinstance(obj, list) else obj[token]
+    return obj, tokens[-1]
+
+
+def apply_json_patch(obj, operations):
+    """
+    apply JSON Patch (RFC 6902) operations, such as the diffs returned by the
+    live feed's diffPatch endpoint, to an object in place
+
+    :param obj: the object to patch e.g. a live feed
+    :param operations: a list of dictionaries with the 'op', the 'path' and the
+                       'value' (or the 'from' path) of each operation
+    :return: the object
+    """
+    for operation in operations:
+        name = operation['op']
+        if name in ('move', 'copy'):
+            parent, key = _get_pointer_parent(obj, operation['from'])
+            if isinstance(parent, list):
+                key = int(key)
+            value = parent.pop(key) if name == 'move' else copy.deepcopy(parent[key])
+        else:
+            value = operation.get('value')
+        parent, key = _get_pointer_parent(obj, operation['path'])
+        if isinstance(parent, list) and not (key == '-' and name in ('add', 'move', 'copy')):
+            key = int(key)
+        if name in ('add', 'move', 'copy'):
+            if not isinstance(parent, list):
+                parent[key] = value
+            elif key == '-':
+                parent.append(value)
+            else:
+                parent.insert(key, value)
+        elif name == 'replace':
+            parent[key] = value
+        elif name == 'remove':
+            del parent[key]
+        elif name == 'test':
+            if parent[key] != value:
+                raise ValueError('test of "{}" failed'.format(operation['path']))
+        else:
+            raise ValueError('unknown patch operation "{}"'.format(name))
+    return obj
 
 
 def parse_args():
@@ -126,18 +274,18 @@ def parse_args():
         return args
 
     args_vars = vars(args)
-    for arg in args_vars:
-        if arg in Game.STATS and args_vars[arg]:
-            if args.liveDiffTime:
-                game.load_ext_url(Game.STATS[arg], diff_time=args.liveDiffTime)
-            else:
-                game.load_ext_url(Game.STATS[arg])
+    stats = [arg for arg in args_vars if arg in Game.STATS and args_vars[arg]]
+    if args.liveDiffTime:
+        views = load_views(game, *stats, diff_time=args.liveDiffTime)
+    else:
+        views = load_views(game, *stats)
 
-            if args.humanReadable:
-                output = json.dumps(game.content, indent=1)
-            else:
-                output = game.content
-            print(output)
+    for stat in stats:
+        if args.humanReadable:
+            output = json.dumps(views[stat], indent=1)
+        else:
+            output = views[stat]
+        print(output)
 
     result = 'retrieved data for id: {}'.format(args.gameId)
     info(result)
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+    Caching api gateway for the nhlapi package
+
+    Serves the url space of the NHL stats api (/api/v1/...) from one shared
+    response cache so many services can point the entity classes at it
+    (NHLAPI_BASE_URL=http://host:port/api/v1/) instead of each going upstream.
+
+    fresh entries    served from the cache
+    stale entries    served from the cache for up to --stale seconds past their
+                     ttl while one background request refreshes them
+    misses           fetched upstream once, however many clients ask at the same
+                     time, and served to all of them
+
+    The X-Cache response header says which of HIT, STALE or MISS served a request,
+    and /gateway/stats reports the request counts and the cache use.
+"""
+
+import json
+import time
+import argparse
+import threading
+import collections
+import concurrent.futures
+import http.server
+import logging
+# from logging import debug
+from logging import info
+from logging import warning
+# from logging import error
+# from logging import critical
+from transport import TRANSPORTS
+from transport import get_charset
+from transport import get_transfer_stats
+from cache import ResponseCache
+
+# The server the gateway fetches from.
+UPSTREAM = 'https://statsapi.web.nhl.com'
+
+# The root of the api url space the gateway serves.
+API_PATH = '/api/v1/'
+
+# The path of the gateway's own stats.
+STATS_PATH = '/gateway/stats'
+
+
+class Gateway:
+    """
+    A shared, stale-while-revalidate cache in front of the stats api
+    """
+
+    def __init__(self, upstream=UPSTREAM, cache=None, transport=None, stale=300.0, workers=8):
+        """
+        initialize this Gateway object
+
+        :param self: reference to a Gateway instance
+        :param upstream: the scheme and host of the server to fetch from
+        :param cache: (optional) the ResponseCache to serve from. defaults to a new one
+        :param transport: (optional) the transport to fetch with. defaults to a pooled
+                          keep-alive transport
+        :param stale: the seconds past its ttl an entry is still served while it is refreshed
+        :param workers: the number of background refreshes running at the same time
+        """
+        self.upstream = upstream.rstrip('/')
+        self.cache = cache if cache is not None else ResponseCache()
+        self.transport = transport if transport is not None else TRANSPORTS['pooled']()
+        self.stale = stale
+        self.counts = collections.Counter()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._refresher = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+
+    def get_url(self, path):
+        """
+        get the upstream url of a request path
+
+        :param self: reference to a Gateway instance
+        :param path: the path and query of the request e.g. '/api/v1/teams?expand=team.roster'
+        :return: the url
+        """
+        return self.upstream + path
+
+    def _count(self, name):
+        # the handler and refresher threads all count, so the increments must not interleave
+        with self._lock:
+            self.counts[name] += 1
+
+    def fetch(self, url):
+        """
+        fetch a url upstream into the cache.  callers asking for a url that is
+        already being fetched wait for that request instead of sending their own.
+
+        :param self: reference to a Gateway instance
+        :param url: the url to fetch
+        :return: the transport Response
+        """
+        with self._lock:
+            future = self._inflight.get(url)
+            leader = future is None
+            if leader:
+                future = self._inflight[url] = concurrent.futures.Future()
+        if not leader:
+            self._count('coalesced')
+            return future.result()
+
+        self._count('upstream')
+        try:
+            response = self.transport.fetch(url)
+            if response.status < 400:
+                self.cache.put(url, response.body, get_charset(response.headers))
+            future.set_result(response)
+        except Exception as err:  # pass every failure on to the waiting callers too
+            future.set_exception(err)
+        finally:
+            with self._lock:
+                del self._inflight[url]
+        return future.result()
+
+    def _refresh(self, url):
+        try:
+            self.fetch(url)
+        except Exception as err:  # the stale entry is served until a refresh succeeds
+            warning('gateway: refreshing "{}" failed: {}'.format(url, err))
+
+    def revalidate(self, url):
+        """
+        refresh a url in the background unless it is already being fetched
+
+        :param self: reference to a Gateway instance
+        :param url: the url to refresh
+        :return: nothing
+        """
+        with self._lock:
+            if url in self._inflight:
+                return
+        self._refresher.submit(self._refresh, url)
+
+    def get(self, path):
+        """
+        get the response for a request path
+
+        :param self: reference to a Gateway instance
+        :param path: the path and query of the request e.g. '/api/v1/game/2018020131/linescore'
+        :return: a tuple of the http status, the body, the charset and the cache state
+                 ('HIT', 'STALE' or 'MISS')
+        """
+        url = self.get_url(path)
+        entry = self.cache.get_entry(url)
+        if entry is not None:
+            ttl = self.cache.get_ttl(url)
+            age = time.time() - entry.fetched_at
+            if age <= ttl:
+                self._count('HIT')
+                return 200, entry.body, entry.charset, 'HIT'
+            if age <= ttl + self.stale:
+                self.revalidate(url)
+                self._count('STALE')
+                return 200, entry.body, entry.charset, 'STALE'
+
+        try:
+            response = self.fetch(url)
+        except Exception as err:  # an unreachable upstream is a bad gateway, not a crash
+            warning('gateway: fetching "{}" failed: {}'.format(url, err))
+            if entry is not None:
+                self._count('STALE')
+                return 200, entry.body, entry.charset, 'STALE'
+            self._count('error')
+            return 502, b'{"message": "upstream unavailable"}', 'utf-8', 'MISS'
+        self._count('MISS')
+        return response.status, response.body, get_charset(response.headers), 'MISS'
+
+    def stats(self):
+        """
+        get the request counts and the cache use
+
+        :param self: reference to a Gateway instance
+        :return: a dictionary with the 'requests' by cache state and upstream, the
+                 'cache' stats and the upstream 'transfer' stats
+        """
+        with self._lock:
+            counts = dict(self.counts)
+        return {'requests': counts, 'cache': self.cache.stats(),
+                'transfer': get_transfer_stats()}
+
+    def close(self):
+        """
+        stop the background refreshes and close the upstream connections
+
+        :param self: reference to a Gateway instance
+        :return: nothing
+        """
+        self._refresher.shutdown(wait=True)
+        self.transport.close()
+
+
+class GatewayHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Serve GET requests from the server's gateway
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        """ handle a GET request """
+        gateway = self.server.gateway
+        if self.path == STATS_PATH:
+            status, body, charset, state = 200, json.dumps(gateway.stats()).encode(), 'utf-8', ''
+        else:
+            status, body, charset, state = gateway.get(self.path)
+        self.send_response(status)
+        self.send_header('Content-Type',
+                         'application/json' + ('; charset=' + charset if charset else ''))
+        self.send_header('Content-Length', str(len(body)))
+        if state:
+            self.send_header('X-Cache', state)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        info('gateway: ' + format % args)
+
+
+def serve(gateway, host='127.0.0.1', port=8080):
+    """
+    create the http server of a gateway.  call serve_forever() on it to serve requests.
+
+    :param gateway: the Gateway to serve
+    :param host: the address to listen on
+    :param port: the port to listen on. 0 picks a free port
+    :return: the http.server.ThreadingHTTPServer
+    """
+    server = http.server.ThreadingHTTPServer((host, port), GatewayHandler)
+    server.gateway = gateway
+    return server
+
+
+def parse_args():
+    """
+    Parse the options from the command line
+
+    :return: The options as a dictionary
+    """
+    description = 'Serve the NHL stats api from a shared cache in front of statsapi.web.nhl.com.'
+    epilog = 'Example use: gateway.py --port 8080 --ttl 30 --stale 300 --warmup ' \
+        '(then set NHLAPI_BASE_URL=http://localhost:8080/api/v1/ for the clients)'
+
+    # Standard options for each nhlapi interface
+    parser = argparse.ArgumentParser(description=description, epilog=epilog)
+    parser.add_argument('--log', default='/dev/null', type=str,
+                        help='the file where the output should be written')
+
+    # Optional user supplied values
+    parser.add_argument('--host', default='127.0.0.1', type=str,
+                        help='the address to listen on')
+    parser.add_argument('--port', default=8080, type=int, help='the port to listen on')
+    parser.add_argument('--upstream', default=UPSTREAM, type=str,
+                        help='the server to fetch from')
+    parser.add_argument('--transport', default='pooled', choices=sorted(TRANSPORTS),
+                        help='the transport to fetch from the upstream server with')
+    parser.add_argument('--ttl', default=30.0, type=float,
+                        help='the seconds a response is fresh for')
+    parser.add_argument('--liveTtl', default=5.0, type=float,
+                        help='the seconds a live game feed or linescore is fresh for')
+    parser.add_argument('--stale', default=300.0, type=float,
+                        help='the seconds past its ttl a response is served while it is refreshed')
+    parser.add_argument('--maxEntries', default=4096, type=int,
+                        help='the number of responses kept in the cache')
+    parser.add_argument('--warmup', help='prefetch the data of the day\'s games every 5 minutes',
+                        action='store_true')
+
+    args = parser.parse_args()
+
+    if args.log:
+        log_format = '%(asctime)s %(levelname)s: %(message)s'
+        logging.basicConfig(filename=args.log,
+                            format=log_format,
+                            level=logging.DEBUG)
+
+    ttls = {'/api/v1/game/{id}/feed/live': args.liveTtl,
+            '/api/v1/game/{id}/linescore': args.liveTtl}
+    cache = ResponseCache(args.ttl, args.maxEntries, ttls)
+    gateway = Gateway(args.upstream, cache, TRANSPORTS[args.transport](), args.stale)
+    if args.warmup:
+        from warmup import WarmUp
+        # key the warmed entries like the gateway's requests: the upstream plus the path
+        WarmUp(cache, gateway.transport, base_url=gateway.get_url(API_PATH)).start()
+
+    server = serve(gateway, args.host, args.port)
+    info('gateway: serving {} on {}:{}'.format(args.upstream, *server.server_address[:2]))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        gateway.close()
+
+    return args
+
+
+if __name__ == '__main__':
+    parse_args()
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+    Shot location index and heatmaps for the nhlapi package
+
+    Extracts the coordinates of shot events from live feeds into NumPy arrays,
+    indexes them by player, team and event type, and builds binned heatmaps and
+    zone counts with vectorized operations instead of per play loops.
+
+    Requires NumPy.
+"""
+
+import json
+import argparse
+import logging
+# from logging import debug
+from logging import info
+# from logging import warning
+# from logging import error
+# from logging import critical
+from game import Game
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class ShotIndex:
+    """
+    Shot coordinates for many games indexed by player, team and event type
+    """
+
+    SHOT_EVENTS = ('SHOT', 'GOAL', 'MISSED_SHOT', 'BLOCKED_SHOT')
+
+    # The player types credited with a shot event
+    SHOOTER_TYPES = ('Shooter', 'Scorer')
+
+    # The rink in feed coordinates (feet from center ice) and the blue lines
+    RINK_X = (-100.0, 100.0)
+    RINK_Y = (-42.5, 42.5)
+    BLUE_LINE = 25.0
+    ZONES = ('defensive', 'neutral', 'offensive')
+
+    # The fields that can be used to select shots and group heatmaps
+    KEYS = ('player', 'team', 'event')
+
+    def __init__(self, events=SHOT_EVENTS, bins=(20, 9), normalize=True):
+        """
+        initialize this ShotIndex object
+
+        :param self: reference to a ShotIndex instance
+        :param events: the play event types to index
+        :param bins: the number of (x, y) heatmap bins across the rink
+        :param normalize: True to flip the shots of a team attacking towards -x (from the
+                          rinkSide of the team in each period of the linescore) so every
+                          team attacks towards +x. shots without a known direction keep
+                          their coordinates
+        """
+        if numpy is None:
+            raise ImportError('the heatmap module requires numpy')
+        self.events = tuple(events)
+        self.bins = tuple(bins)
+        self.normalize = normalize
+        self.event_codes = {event: code for code, event in enumerate(self.events)}
+        self._pending = []
+        self.columns = {name: numpy.zeros(0, dtype=dtype) for name, dtype in
+                        (('x', float), ('y', float), ('player', numpy.int64),
+                         ('team', numpy.int64), ('event', numpy.int64),
+                         ('game', numpy.int64), ('period', numpy.int64), ('cell', numpy.int64))}
+        self.groups = {}
+
+    def __len__(self):
+        return len(self.columns['x']) + len(self._pending)
+
+    def add_game(self, game):
+        """
+        add the shot events of a game
+
+        :param self: reference to a ShotIndex instance
+        :param game: a Game with its live feed loaded, or a live feed response
+        :return: the number of shots added
+        """
+        if not isinstance(game, Game):
+            game = Game(game.get('gamePk', 0), content=game)
+        directions = self.get_directions(game)
+        added = 0
+        for event in game.iter_plays(since=0):
+            code = self.event_codes.get(event.event)
+            if code is None or event.x is None or event.y is None:
+                continue
+            shooter = 0
+            for player_id, player_type in event.players:
+                if player_type in self.SHOOTER_TYPES:
+                    shooter = player_id
+                    break
+            self._pending.append((event.x, event.y, shooter, event.team or 0, code,
+                                  game.nhl_id or 0, event.period or 0,
+                                  directions.get((event.period, event.team), 1)))
+            added += 1
+        return added
+
+    @classmethod
+    def get_directions(cls, game):
+        """
+        get the attacking direction of each team in each period of a game from the
+        rinkSide (the side of the rink a team defends) in the linescore
+
+        :param game: a Game with its live feed loaded
+        :return: a dictionary of (period, team id) to 1 for a team attacking towards +x
+                 and -1 for one attacking towards -x. periods without a rinkSide
+                 (e.g. shootouts) are left out
+        """
+        feed = game.content if game.content and 'liveData' in game.content \
+            else game.views.get('live') or {}
+        teams = feed.get('gameData', {}).get('teams', {})
+        periods = feed.get('liveData', {}).get('linescore', {}).get('periods', [])
+        directions = {}
+        for period in periods:
+            for side in ('home', 'away'):
+                rink_side = period.get(side, {}).get('rinkSide')
+                team_id = teams.get(side, {}).get('id')
+                if rink_side in ('left', 'right') and team_id is not None:
+                    directions[(period.get('num'), team_id)] = 1 if rink_side == 'left' else -1
+        return directions
+
+    def build(self):
+        """
+        move the shots added since the last build into the arrays and rebuild the
+        grid cells and the player, team and event indexes
+
+        :param self: reference to a ShotIndex instance
+        :return: nothing
+        """
+        if self._pending:
+            pending = numpy.array(self._pending, dtype=float)
+            self._pending = []
+            x_coords, y_coords = pending[:, 0], pending[:, 1]
+            if self.normalize:
+                x_coords = x_coords * pending[:, 7]
+                y_coords = y_coords * pending[:, 7]
+            new = {'x': x_coords, 'y': y_coords,
+                   'player': pending[:, 2], 'team': pending[:, 3], 'event': pending[:, 4],
+                   'game': pending[:, 5], 'period': pending[:, 6],
+                   'cell': self._get_cells(x_coords, y_coords)}
+            for name, values in new.items():
+                self.columns[name] = numpy.concatenate(
+                    (self.columns[name], values.astype(self.columns[name].dtype)))
+
+        # each index maps a key value to the rows holding it, found with one sort per key
+        self.groups = {}
+        for name in self.KEYS:
+            values = self.columns[name]
+            order = numpy.argsort(values, kind='stable')
+            keys, starts = numpy.unique(values[order], return_index=True)
+            self.groups[name] = dict(zip(keys.tolist(), numpy.split(order, starts[1:])))
+        info('heatmap: indexed {} shots'.format(len(self.columns['x'])))
+
+    def _get_cells(self, x_coords, y_coords):
+        bins_x, bins_y = self.bins
+        cell_x = numpy.floor((x_coords - self.RINK_X[0]) * bins_x /
+                             (self.RINK_X[1] - self.RINK_X[0])).astype(numpy.int64)
+        cell_y = numpy.floor((y_coords - self.RINK_Y[0]) * bins_y /
+                             (self.RINK_Y[1] - self.RINK_Y[0])).astype(numpy.int64)
+        return numpy.clip(cell_x, 0, bins_x - 1) * bins_y + numpy.clip(cell_y, 0, bins_y - 1)
+
+    def rows(self, player=None, team=None, event=None):
+        """
+        get the rows of the shots matching the selection
+
+        :param self: reference to a ShotIndex instance
+        :param player: (optional) a player id
+        :param team: (optional) a team id
+        :param event: (optional) an event type e.g. 'GOAL'
+        :return: an array of row indexes into the columns
+        """
+        if self._pending or not self.groups:
+            self.build()
+        selected = None
+        for name, value in (('player', player), ('team', team),
+                            ('event', None if event is None else self.event_codes.get(event, -1))):
+            if value is None:
+                continue
+            found = self.groups[name].get(value, numpy.zeros(0, dtype=numpy.int64))
+            selected = found if selected is None else numpy.intersect1d(selected, found)
+        if selected is None:
+            return numpy.arange(len(self.columns['x']))
+        return selected
+
+    def heatmap(self, player=None, team=None, event=None):
+        """
+        get the binned heatmap of the shots matching the selection
+
+        :param self: reference to a ShotIndex instance
+        :param player: (optional) a player id
+        :param team: (optional) a team id
+        :param event: (optional) an event type e.g. 'GOAL'
+        :return: an array of shot counts shaped (x bins, y bins)
+        """
+        rows = self.rows(player, team, event)
+        cells = self.columns['cell'][rows]
+        bins_x, bins_y = self.bins
+        return numpy.bincount(cells, minlength=bins_x * bins_y).reshape(bins_x, bins_y)
+
+    def heatmaps(self, by='player', event=None):
+        """
+        get the heatmaps of every player (or team or event type) in one pass
+
+        :param self: reference to a ShotIndex instance
+        :param by: the key to group the heatmaps by: 'player', 'team' or 'event'
+        :param event: (optional) only count this event type e.g. 'GOAL'
+        :return: a tuple of the array of key values and an array of shot counts
+                 shaped (keys, x bins, y bins)
+        """
+        rows = self.rows(event=event)
+        keys, key_index = numpy.unique(self.columns[by][rows], return_inverse=True)
+        bins_x, bins_y = self.bins
+        cells = bins_x * bins_y
+        counts = numpy.bincount(key_index * cells + self.columns['cell'][rows],
+                                minlength=len(keys) * cells)
+        if by == 'event':
+            keys = numpy.array([self.events[code] for code in keys.tolist()])
+        return keys, counts.reshape(len(keys), bins_x, bins_y)
+
+    def zone_counts(self, player=None, team=None, event=None):
+        """
+        count the shots matching the selection in each zone, from the shooting
+        team's point of view (needs normalize=True and the rinkSides of the linescore;
+        shots without a known direction are zoned as if attacking towards +x)
+
+        :param self: reference to a ShotIndex instance
+        :param player: (optional) a player id
+        :param team: (optional) a team id
+        :param event: (optional) an event type e.g. 'GOAL'
+        :return: a dictionary of zone name to shot count
+        """
+        rows = self.rows(player, team, event)
+        x_coords = self.columns['x'][rows]
+        zones = numpy.digitize(x_coords, (-self.BLUE_LINE, self.BLUE_LINE))
+        counts = numpy.bincount(zones, minlength=len(self.ZONES))
+        return dict(zip(self.ZONES, counts.tolist()))
+
+
+def parse_args():
+    """
+    Parse the options from the command line
+
+    :return: The options as a dictionary
+    """
+    description = 'Build shot heatmaps and zone counts from the live feeds of NHL games.'
+    epilog = 'Example use: heatmap.py 2018020131 2018020132 --team 22 --event GOAL'
+
+    # Standard options for each nhlapi interface
+    parser = argparse.ArgumentParser(description=description, epilog=epilog)
+    parser.add_argument('--humanReadable', help='output in easier to read format for users',
+                        action='store_true')
+    parser.add_argument(
+        '--log', default='/dev/null', type=str,
+        help='the file where the output should be written')
+
+    # Optional user supplied values
+    parser.add_argument('gameIds', help='the game IDs', type=int, nargs='+')
+    parser.add_argument('--player', help='only count the shots of a player', type=int)
+    parser.add_argument('--team', help='only count the shots of a team', type=int)
+    parser.add_argument('--event', help='only count one event type e.g. GOAL', type=str)
+
+    args = parser.parse_args()
+
+    if args.log:
+        log_format = '%(asctime)s %(levelname)s: %(message)s'
+        logging.basicConfig(filename=args.log,
+                            format=log_format,
+                            level=logging.DEBUG)
+
+    index = ShotIndex()
+    for game_id in args.gameIds:
+        game = Game(game_id, content={})
+        game.load_ext_url(Game.STATS['live'])
+        index.add_game(game)
+
+    output = {'zones': index.zone_counts(args.player, args.team, args.event),
+              'heatmap': index.heatmap(args.player, args.team, args.event).tolist()}
+    if args.humanReadable:
+        output = json.dumps(output, indent=1)
+    print(output)
+
+    result = 'built heatmap for {} shots in {} games'.format(len(index), len(args.gameIds))
+    info(result)
+
+    return args
+
+
+if __name__ == '__main__':
+    parse_args()
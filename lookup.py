@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+    Player and team lookup indexes for the nhlapi package
+
+    Resolves player names and team names/abbreviations to NHL ids (and back)
+    locally, so identity lookups never wait on the api.  The index is built
+    from a teams?expand=team.roster response plus any People content, and is
+    saved to and loaded from a json file.
+"""
+
+import os
+import json
+import bisect
+import difflib
+import argparse
+import unicodedata
+import logging
+# from logging import debug
+from logging import info
+# from logging import warning
+# from logging import error
+# from logging import critical
+from nhlapi import decode_json
+from team import Team
+
+
+def normalize_name(name):
+    """
+    normalize a name for lookups: accents removed, lower case, single spaces
+
+    :param name: the name to normalize e.g. 'David Pastrňák'
+    :return: the normalized name e.g. 'david pastrnak'
+    """
+    decomposed = unicodedata.normalize('NFKD', name)
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(stripped.lower().replace('.', ' ').replace('-', ' ').split())
+
+
+class LookupIndex:
+    """
+    Local id <-> name indexes for players and teams
+    """
+
+    def __init__(self, filename=None):
+        """
+        initialize this LookupIndex object
+
+        :param self: reference to a LookupIndex instance
+        :param filename: (optional) json file the index is loaded from and saved to
+        """
+        self.filename = filename
+        self.players = {}
+        self.player_teams = {}
+        self.teams = {}
+        self._player_ids = {}
+        self._team_ids = {}
+        self._prefixes = []
+        self._dirty = False
+        if self.filename and os.path.isfile(self.filename):
+            self.load()
+
+    def add_player(self, player_id, name, team_id=None):
+        """
+        add (or rename) a player in the index
+
+        :param self: reference to a LookupIndex instance
+        :param player_id: the ID of the player as known to NHL.com
+        :param name: the full name of the player
+        :param team_id: (optional) the ID of the player's current team
+        :return: nothing
+        """
+        old_name = self.players.get(player_id)
+        if old_name is not None and old_name != name:
+            ids = self._player_ids.get(normalize_name(old_name), [])
+            if player_id in ids:
+                ids.remove(player_id)
+        self.players[player_id] = name
+        ids = self._player_ids.setdefault(normalize_name(name), [])
+        if player_id not in ids:
+            ids.append(player_id)
+        if team_id is not None:
+            self.player_teams[player_id] = team_id
+        self._dirty = True
+
+    def add_team(self, team_id, name, abbreviation='', team_name=''):
+        """
+        add a team to the index
+
+        :param self: reference to a LookupIndex instance
+        :param team_id: the ID of the team as known to NHL.com
+        :param name: the full name of the team e.g. 'Edmonton Oilers'
+        :param abbreviation: (optional) the abbreviation of the team e.g. 'EDM'
+        :param team_name: (optional) the short name of the team e.g. 'Oilers'
+        :return: nothing
+        """
+        self.teams[team_id] = {'name': name, 'abbreviation': abbreviation, 'teamName': team_name}
+        for key in (name, abbreviation, team_name):
+            if key:
+                self._team_ids[normalize_name(key)] = team_id
+
+    def add_teams(self, content):
+        """
+        add the teams (and their rosters, if expanded) from a /teams response
+
+        :param self: reference to a LookupIndex instance
+        :param content: a teams or teams?expand=team.roster response
+        :return: nothing
+        """
+        for team in content.get('teams', []) if content else []:
+            self.add_team(team['id'], team.get('name', ''), team.get('abbreviation', ''),
+                          team.get('teamName', ''))
+            for entry in team.get('roster', {}).get('roster', []):
+                person = entry['person']
+                self.add_player(person['id'], person.get('fullName', ''), team['id'])
+
+    def add_people(self, content):
+        """
+        add the players from a People response (current or historical)
+
+        :param self: reference to a LookupIndex instance
+        :param content: a people/{id} response e.g. People.content
+        :return: nothing
+        """
+        for person in content.get('people', []) if content else []:
+            team_id = person.get('currentTeam', {}).get('id')
+            self.add_player(person['id'], person.get('fullName', ''), team_id)
+
+    def build(self):
+        """
+        build the index from the rosters of every team in one request
+
+        :param self: reference to a LookupIndex instance
+        :return: nothing
+        """
+        teams = Team(None, content={})
+        teams.load_ext_url(Team.STATS['teamRoster'])
+        self.add_teams(teams.content)
+        info('lookup: indexed {} teams and {} players'.format(len(self.teams), len(self.players)))
+
+    def _build_prefixes(self):
+        # every word of a name is a prefix key so 'mcdav' finds 'Connor McDavid'
+        prefixes = []
+        for key, ids in self._player_ids.items():
+            words = key.split()
+            for start in range(len(words)):
+                prefix_key = ' '.join(words[start:])
+                prefixes.extend((prefix_key, player_id) for player_id in ids)
+        prefixes.sort()
+        self._prefixes = prefixes
+        self._dirty = False
+
+    def get_player_name(self, player_id):
+        """
+        get the name of a player
+
+        :param self: reference to a LookupIndex instance
+        :param player_id: the ID of the player as known to NHL.com
+        :return: the full name, or None if the player is not indexed
+        """
+        return self.players.get(player_id)
+
+    def get_player_ids(self, name):
+        """
+        get the ids of the players with a name (names are not unique)
+
+        :param self: reference to a LookupIndex instance
+        :param name: the full name of the player, in any case and with or without accents
+        :return: the list of player ids, empty if there are none
+        """
+        return list(self._player_ids.get(normalize_name(name), []))
+
+    def search_players(self, prefix, limit=10):
+        """
+        find the players whose first, last or full name starts with a prefix
+
+        :param self: reference to a LookupIndex instance
+        :param prefix: the start of the name e.g. 'mcdav' or 'connor mc'
+        :param limit: the maximum number of players to return
+        :return: a list of (player id, name) tuples
+        """
+        if self._dirty:
+            self._build_prefixes()
+        prefix = normalize_name(prefix)
+        found = []
+        index = bisect.bisect_left(self._prefixes, (prefix,))
+        while index < len(self._prefixes) and len(found) < limit:
+            key, player_id = self._prefixes[index]
+            if not key.startswith(prefix):
+                break
+            if player_id not in found:
+                found.append(player_id)
+            index += 1
+        return [(player_id, self.players[player_id]) for player_id in found]
+
+    def fuzzy_players(self, name, limit=5, cutoff=0.75):
+        """
+        find the players whose names are close to a (possibly misspelled) name
+
+        :param self: reference to a LookupIndex instance
+        :param name: the name to match e.g. 'conor mcdavid'
+        :param limit: the maximum number of names to match
+        :param cutoff: the minimum similarity (0.0 - 1.0) of a match
+        :return: a list of (player id, name) tuples, closest first
+        """
+        matches = difflib.get_close_matches(normalize_name(name), self._player_ids,
+                                            n=limit, cutoff=cutoff)
+        return [(player_id, self.players[player_id])
+                for key in matches for player_id in self._player_ids[key]]
+
+    def get_team_id(self, name):
+        """
+        get the id of a team from its name, short name or abbreviation
+
+        :param self: reference to a LookupIndex instance
+        :param name: e.g. 'EDM', 'Oilers' or 'Edmonton Oilers'
+        :return: the team id, or None if the team is not indexed
+        """
+        return self._team_ids.get(normalize_name(name))
+
+    def get_team(self, team_id):
+        """
+        get the names of a team
+
+        :param self: reference to a LookupIndex instance
+        :param team_id: the ID of the team as known to NHL.com
+        :return: a dictionary with the 'name', 'abbreviation' and 'teamName', or None
+        """
+        return self.teams.get(team_id)
+
+    def save(self, filename=None):
+        """
+        save the index to a json file
+
+        :param self: reference to a LookupIndex instance
+        :param filename: (optional) the file to save to instead of our own file
+        :return: nothing
+        """
+        filename = filename or self.filename
+        saved = {'teams': [[team_id, team['name'], team['abbreviation'], team['teamName']]
+                           for team_id, team in self.teams.items()],
+                 'players': [[player_id, name, self.player_teams.get(player_id)]
+                             for player_id, name in self.players.items()]}
+        tmp_name = filename + '.tmp'
+        with open(tmp_name, 'w') as fileout:
+            json.dump(saved, fileout, separators=(',', ':'))
+        os.replace(tmp_name, filename)
+
+    def load(self, filename=None):
+        """
+        load the index from a json file
+
+        :param self: reference to a LookupIndex instance
+        :param filename: (optional) the file to load from instead of our own file
+        :return: nothing
+        """
+        with open(filename or self.filename, 'rb') as filein:
+            saved = decode_json(filein.read())
+        for team in saved.get('teams', []):
+            self.add_team(*team)
+        for player_id, name, team_id in saved.get('players', []):
+            self.add_player(player_id, name, team_id)
+
+
+def parse_args():
+    """
+    Parse the options from the command line
+
+    :return: The options as a dictionary
+    """
+    description = 'Look up NHL player and team ids by name using a local index.'
+    epilog = 'Example use: lookup.py --index lookup.json --build --player mcdavid --team EDM'
+
+    # Standard options for each nhlapi interface
+    parser = argparse.ArgumentParser(description=description, epilog=epilog)
+    parser.add_argument(
+        '--log', default='/dev/null', type=str,
+        help='the file where the output should be written')
+
+    # Optional user supplied values
+    parser.add_argument('--index', default='lookup.json', type=str,
+                        help='the file where the index is kept')
+    parser.add_argument('--build', help='(re)build the index from the current rosters',
+                        action='store_true')
+    parser.add_argument('--player', help='find players by name or the start of a name',
+                        type=str)
+    parser.add_argument('--team', help='find a team by name or abbreviation', type=str)
+
+    args = parser.parse_args()
+
+    if args.log:
+        log_format = '%(asctime)s %(levelname)s: %(message)s'
+        logging.basicConfig(filename=args.log,
+                            format=log_format,
+                            level=logging.DEBUG)
+
+    index = LookupIndex(args.index)
+    if args.build:
+        index.build()
+        index.save()
+
+    if args.player:
+        players = index.search_players(args.player) or index.fuzzy_players(args.player)
+        for player_id, name in players:
+            print('{} {}'.format(player_id, name))
+    if args.team:
+        print(index.get_team_id(args.team))
+
+    result = 'looked up {} players and {} teams'.format(len(index.players), len(index.teams))
+    info(result)
+
+    return args
+
+
+if __name__ == '__main__':
+    parse_args()
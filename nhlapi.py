@@ -2,30 +2,342 @@
 nhl-api package
 """
 
-import ssl
+import os
 import json
-import urllib
-import urllib.error
-import urllib.request
+import codecs
+import time
+import threading
+import concurrent.futures
+# from logging import debug
+# from logging import info
+from logging import warning
+# from logging import error
+# from logging import critical
+from cache import ResponseCache
+from transport import get_charset
+from transport import get_default_transport
 
+# The root of the stats api used by the entity classes.  Set NHLAPI_BASE_URL to
+# point them at another server with the same url space, e.g. a gateway.py server.
+BASE_URL = os.environ.get('NHLAPI_BASE_URL',
+                          'https://statsapi.web.nhl.com/api/v1/').rstrip('/') + '/'
 
-def get_json_data(api_url):
+
+def _find_json_decoders():
     """
-    retrieve the json data returned from the specified REST url
-    :param api_url: the url to retrieve the data from
-    :return: returns the json data as a string
+    find the json decoders that are available in this environment.
+    the faster decoders are optional and are only used when installed.
+
+    :return: a dictionary of decoder name to its loads() function
     """
+    decoders = {}
+    try:
+        import orjson
+        decoders['orjson'] = orjson.loads
+    except ImportError:
+        pass
+    try:
+        import simdjson
+        decoders['simdjson'] = simdjson.loads
+    except ImportError:
+        pass
+    try:
+        import ujson
+        decoders['ujson'] = ujson.loads
+    except ImportError:
+        pass
+    decoders['json'] = json.loads
+    return decoders
 
-    ssl_context = ssl.create_default_context()
-    ssl_context.check_hostname = False
-    ssl_context.verify_mode = ssl.CERT_NONE
-    # ssl._create_default_https_context = ssl._create_unverified_context
+
+# The available decoders and the order in which they are preferred.
+# Every decoder accepts the raw (utf-8) bytes so no intermediate str is built.
+JSON_DECODERS = _find_json_decoders()
+DECODER_PREFERENCE = ('orjson', 'simdjson', 'ujson', 'json')
+
+# The decoders that can read any buffer (e.g. an mmap) without copying it to bytes first.
+BUFFER_DECODERS = {'orjson'}
+
+_json_decoder = {'name': '', 'loads': None}
+
+
+def register_json_decoder(name, loads):
+    """
+    register a json decoder so it can be selected with set_json_decoder()
+
+    :param name: the name to register the decoder under
+    :param loads: a function accepting bytes (or str) and returning the decoded object
+    :return: nothing
+    """
+    JSON_DECODERS[name] = loads
+
+
+def set_json_decoder(name=None):
+    """
+    select the json decoder used by get_json_data() and decode_json()
+
+    :param name: the name of a registered decoder. if None, use the
+                 NHLAPI_JSON_DECODER environment variable if set, or else
+                 the fastest decoder available
+    :return: the name of the decoder now in use
+    """
+    if name is None:
+        name = os.environ.get('NHLAPI_JSON_DECODER')
+    if name is None:
+        name = next(dec for dec in DECODER_PREFERENCE if dec in JSON_DECODERS)
+    if name not in JSON_DECODERS:
+        raise ValueError('json decoder "{}" is not available (choose from: {})'.format(
+            name, ', '.join(JSON_DECODERS)))
+    _json_decoder['name'] = name
+    _json_decoder['loads'] = JSON_DECODERS[name]
+    return name
+
+
+def get_json_decoder():
+    """
+    get the name of the json decoder currently in use
+
+    :return: the name of the decoder
+    """
+    return _json_decoder['name']
+
+
+def decode_json(raw_data, charset=None):
+    """
+    decode json text using the selected json decoder
+
+    :param raw_data: the json text as bytes (or any buffer) or str
+    :param charset: (optional) the charset of raw_data if it is not utf-8
+    :return: the decoded json data
+    """
+    if charset and codecs.lookup(charset).name != 'utf-8':
+        raw_data = bytes(raw_data).decode(charset)
+    elif not isinstance(raw_data, (bytes, bytearray, str))\
+            and _json_decoder['name'] not in BUFFER_DECODERS:
+        raw_data = bytes(raw_data)
+    return _json_decoder['loads'](raw_data)
+
+
+def _set_default_json_decoder():
+    """
+    select the default json decoder when the package is imported.  a NHLAPI_JSON_DECODER
+    that is not installed is warned about and the fastest decoder is used instead.
+
+    :return: the name of the decoder now in use
+    """
     try:
-        with urllib.request.urlopen(api_url, context=ssl_context) as url:
-            http_info = url.info()
-            raw_data = url.read().decode(http_info.get_content_charset())
-            json_data = json.loads(raw_data)
-            return json_data
-    except urllib.error.HTTPError as err:
-        print(err)
+        return set_json_decoder()
+    except ValueError as err:
+        name = set_json_decoder(next(dec for dec in DECODER_PREFERENCE if dec in JSON_DECODERS))
+        warning('NHLAPI_JSON_DECODER: {}, using "{}"'.format(err, name))
+        return name
+
+
+_set_default_json_decoder()
+
+
+_response_archive = {'archive': None}
+
+
+def set_response_archive(archive):
+    """
+    archive every response fetched by get_json_data() and get_many_json_data()
+
+    :param archive: an archive.PayloadArchive (or any object with a store(url, body)
+                    method), or None to stop archiving
+    :return: nothing
+    """
+    _response_archive['archive'] = archive
+
+
+_schema_tracker = {'tracker': None}
+
+
+def set_schema_tracker(tracker):
+    """
+    check the schema of every response fetched by get_json_data() and get_many_json_data()
+
+    :param tracker: a schema.SchemaTracker (or any object with a check(url, data, raw_data)
+                    method), or None to stop checking
+    :return: nothing
+    """
+    _schema_tracker['tracker'] = tracker
+
+
+_response_cache = {'cache': None}
+
+
+def set_response_cache(cache):
+    """
+    serve get_json_data() and get_many_json_data() from a cache, fetching only
+    the urls that are not cached or have expired
+
+    :param cache: a cache.ResponseCache, or None to stop caching
+    :return: nothing
+    """
+    _response_cache['cache'] = cache
+
+
+def get_response_cache():
+    """
+    get the cache set with set_response_cache()
+
+    :return: the cache, or None if responses are not cached
+    """
+    return _response_cache['cache']
+
+
+# The cache of the stale-while-revalidate reads (get_json_data with a soft_ttl) when
+# no response cache is set.  Only those reads use it, so other callers are not cached.
+_swr_cache = {'cache': None, 'lock': threading.Lock()}
+
+
+def _get_swr_cache():
+    """
+    get the cache the stale-while-revalidate reads use: the response cache if one
+    is set, otherwise a cache of their own, created on first use
+
+    :return: the cache
+    """
+    cache = _response_cache['cache']
+    if cache is not None:
+        return cache
+    with _swr_cache['lock']:
+        if _swr_cache['cache'] is None:
+            _swr_cache['cache'] = ResponseCache()
+        return _swr_cache['cache']
+
+
+def _store_response(api_url, response, caches=None):
+    if response.status >= 400:
+        print('HTTP Error {}: {}'.format(response.status, response.reason))
+        return False
+    if _response_archive['archive'] is not None:
+        _response_archive['archive'].store(api_url, response.body)
+    if caches is None:
+        # keep the stale-while-revalidate cache up to date with every fetch too
+        caches = [cache for cache in (_response_cache['cache'], _swr_cache['cache'])
+                  if cache is not None]
+    for cache in caches:
+        cache.put(api_url, response.body, get_charset(response.headers))
+    return True
+
+
+def _decode_response(api_url, response):
+    if not _store_response(api_url, response):
         return ''
+    json_data = decode_json(response.body, get_charset(response.headers))
+    if _schema_tracker['tracker'] is not None:
+        _schema_tracker['tracker'].check(api_url, json_data, response.body)
+    return json_data
+
+
+_refreshes = {'pool': None, 'urls': set(), 'lock': threading.Lock()}
+
+
+def _refresh(api_url, transport):
+    try:
+        _store_response(api_url, (transport or get_default_transport()).fetch(api_url))
+    except Exception as err:  # a failed refresh leaves the cached data to be served
+        warning('nhlapi: refreshing "{}" failed: {}'.format(api_url, err))
+    finally:
+        with _refreshes['lock']:
+            _refreshes['urls'].discard(api_url)
+
+
+def refresh_in_background(api_url, transport=None):
+    """
+    fetch a url into the response cache in a background thread, unless it is
+    already being refreshed
+    :param api_url: the url to refresh
+    :param transport: (optional) the transport to use instead of the default transport
+    :return: True if a refresh was started
+    """
+    with _refreshes['lock']:
+        if api_url in _refreshes['urls']:
+            return False
+        _refreshes['urls'].add(api_url)
+        if _refreshes['pool'] is None:
+            _refreshes['pool'] = concurrent.futures.ThreadPoolExecutor(max_workers=4)
+    _refreshes['pool'].submit(_refresh, api_url, transport)
+    return True
+
+
+def get_json_data(api_url, transport=None, soft_ttl=None, hard_ttl=None):
+    """
+    retrieve the json data returned from the specified REST url
+    :param api_url: the url to retrieve the data from
+    :param transport: (optional) the transport to use instead of the default transport
+    :param soft_ttl: (optional) stale-while-revalidate: serve the cached data if it is
+                     younger than this many seconds.  older data is still served at once
+                     while a background request refreshes it.  without a response cache
+                     these reads use a cache of their own, which no other read is served from
+    :param hard_ttl: (optional) with soft_ttl, the age in seconds after which the cached
+                     data is no longer served and the caller waits for a fetch.
+                     defaults to no limit
+    :return: returns the json data as a dictionary
+    """
+    cache = _response_cache['cache'] if soft_ttl is None else _get_swr_cache()
+    if cache is not None:
+        if soft_ttl is None:
+            entry = cache.get(api_url)
+        else:
+            entry = cache.get_entry(api_url)
+            age = time.time() - entry.fetched_at if entry is not None else 0
+            if entry is not None and hard_ttl is not None and age > hard_ttl:
+                entry = None
+            elif entry is not None and age > soft_ttl:
+                refresh_in_background(api_url, transport)
+        if entry is not None:
+            return decode_json(entry.body, entry.charset)
+    if transport is None:
+        transport = get_default_transport()
+    return _decode_response(api_url, transport.fetch(api_url))
+
+
+def get_many_json_data(api_urls, transport=None, workers=8):
+    """
+    retrieve the json data returned from many REST urls at the same time.
+    with the http2 transport the requests share one multiplexed connection.
+    :param api_urls: the urls to retrieve the data from
+    :param transport: (optional) the transport to use instead of the default transport
+    :param workers: the number of requests in flight at the same time
+    :return: returns a list with the json data for each url, in url order
+    """
+    api_urls = list(api_urls)
+    results = [None] * len(api_urls)
+    cache = _response_cache['cache']
+    missing = []
+    for index, api_url in enumerate(api_urls):
+        entry = cache.get(api_url) if cache is not None else None
+        if entry is None:
+            missing.append(index)
+        else:
+            results[index] = decode_json(entry.body, entry.charset)
+    if missing:
+        if transport is None:
+            transport = get_default_transport()
+        responses = transport.fetch_many([api_urls[index] for index in missing], workers=workers)
+        for index, response in zip(missing, responses):
+            results[index] = _decode_response(api_urls[index], response)
+    return results
+
+
+def prefetch(api_urls, transport=None, workers=8, cache=None):
+    """
+    fetch many urls into the response cache (and archive) without decoding them,
+    whether or not they are cached already
+    :param api_urls: the urls to fetch
+    :param transport: (optional) the transport to use instead of the default transport
+    :param workers: the number of requests in flight at the same time
+    :param cache: (optional) the cache.ResponseCache to fetch into instead of the
+                  response cache
+    :return: the number of urls fetched successfully
+    """
+    if transport is None:
+        transport = get_default_transport()
+    api_urls = list(api_urls)
+    responses = transport.fetch_many(api_urls, workers=workers)
+    caches = None if cache is None else [cache]
+    return sum(_store_response(api_url, response, caches)
+               for api_url, response in zip(api_urls, responses))
@@ -3,22 +3,193 @@
 A class to process object hierarchy data easier and more clearly.
 """
 
+import io
 import os
 import re
+import copy
+import csv
+import glob
+import mmap
 import ssl
 import sys
+import ast
 import json
+import time
 import urllib
 import urllib.error
 import urllib.request
 import argparse
+import itertools
 import collections
+import collections.abc
+import concurrent.futures
+import functools
+import operator
 import logging
 # from logging import debug
 from logging import info
 from logging import warning
 from logging import error
 # from logging import critical
+from nhlapi import decode_json
+
+
+class MarkupProfiler:
+    """
+    Counters and timers for the phases of the markup operations:
+
+    compile       tokenizing a markup string (once per path, see compile_markup)
+    evaluate      reaching the element of a compiled markup string, per path
+    markupToObj   parsing a markup string into an object (markup_to_obj)
+    fields        generating the base paths (get_fields)
+    traverse      walking an object for its paths and values (get_table)
+    headings      finding the column headings of a table (get_table)
+    format        formatting a table (get_csv, get_typed_csv)
+
+    and the counts of the markup strings scanned by the tokenizer ('regexSearches')
+    and of the tokens they held ('tokens').
+    Install one with set_markup_profiler(); while none is installed the
+    operations only check for it.
+    """
+
+    def __init__(self, callback=None):
+        """
+        Initialize a MarkupProfiler.
+
+        :param self: a reference to a MarkupProfiler instance
+        :param callback: (optional) a function called as callback(phase, seconds, path)
+                         for every timed operation. path is None for phases without one
+        """
+        self.callback = callback
+        self.counts = collections.Counter()
+        self.phases = {}
+        self.paths = {}
+
+    def count(self, name, amount=1):
+        """
+        Add to a counter.
+
+        :param self: a reference to a MarkupProfiler instance
+        :param name: the name of the counter
+        :param amount: the amount to add
+        :return: nothing
+        """
+        self.counts[name] += amount
+
+    def record(self, phase, seconds, path=None):
+        """
+        Record the time of one operation of a phase.
+
+        :param self: a reference to a MarkupProfiler instance
+        :param phase: the name of the phase
+        :param seconds: the time the operation took
+        :param path: (optional) the markup string the operation was for
+        :return: nothing
+        """
+        timer = self.phases.setdefault(phase, [0, 0.0])
+        timer[0] += 1
+        timer[1] += seconds
+        if path is not None:
+            timer = self.paths.setdefault((phase, path), [0, 0.0])
+            timer[0] += 1
+            timer[1] += seconds
+        if self.callback is not None:
+            self.callback(phase, seconds, path)
+
+    def call(self, phase, func, *args, path=None):
+        """
+        Call a function, recording its time.
+
+        :param self: a reference to a MarkupProfiler instance
+        :param phase: the name of the phase
+        :param func: the function to call with the args
+        :param path: (optional) the markup string the call is for
+        :return: the result of the function
+        """
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self.record(phase, time.perf_counter() - started, path)
+
+    def summary(self, top=10):
+        """
+        Get the counters and timers.
+
+        :param self: a reference to a MarkupProfiler instance
+        :param top: the number of most costly paths to include
+        :return: a dictionary with the 'phases' (calls, seconds and mean seconds of each),
+                 the 'counts' and the 'paths' (a list of the most costly phase/path pairs)
+        """
+        phases = {phase: {'calls': calls, 'seconds': seconds, 'mean': seconds / calls}
+                  for phase, (calls, seconds) in self.phases.items()}
+        paths = sorted(self.paths.items(), key=lambda item: item[1][1], reverse=True)[:top]
+        paths = [{'phase': phase, 'path': path, 'calls': calls, 'seconds': seconds}
+                 for (phase, path), (calls, seconds) in paths]
+        return {'phases': phases, 'counts': dict(self.counts), 'paths': paths}
+
+    def report(self, top=10):
+        """
+        Get the counters and timers as lines of text.
+
+        :param self: a reference to a MarkupProfiler instance
+        :param top: the number of most costly paths to include
+        :return: a list of strings
+        """
+        summary = self.summary(top)
+        lines = ['{:12s} {:>10s} {:>12s} {:>12s}'.format('phase', 'calls', 'seconds', 'mean us')]
+        for phase, timer in sorted(summary['phases'].items(), key=lambda item: -item[1]['seconds']):
+            lines.append('{:12s} {:10d} {:12.6f} {:12.2f}'.format(
+                phase, timer['calls'], timer['seconds'], timer['mean'] * 1e6))
+        for name, count in sorted(summary['counts'].items()):
+            lines.append('{:12s} {:10d}'.format(name, count))
+        for timer in summary['paths']:
+            lines.append('{:12s} {:10d} {:12.6f}  {}'.format(
+                timer['phase'], timer['calls'], timer['seconds'], timer['path']))
+        return lines
+
+    def reset(self):
+        """
+        Clear the counters and timers.
+
+        :param self: a reference to a MarkupProfiler instance
+        :return: nothing
+        """
+        self.counts.clear()
+        self.phases.clear()
+        self.paths.clear()
+
+
+# The profiler the markup operations report to, None while profiling is off.
+_PROFILER = None
+
+
+def set_markup_profiler(profiler):
+    """
+    Set the profiler the markup operations report to.
+
+    :param profiler: a MarkupProfiler, or None to stop profiling
+    :return: the profiler that was set before
+    """
+    global _PROFILER
+    previous = _PROFILER
+    _PROFILER = profiler
+    return previous
+
+
+def get_markup_profiler():
+    """
+    Get the profiler the markup operations report to.
+
+    :return: the MarkupProfiler, or None while profiling is off
+    """
+    return _PROFILER
+
+
+def _profiled(phase, func, *args):
+    if _PROFILER is None:
+        return func(*args)
+    return _PROFILER.call(phase, func, *args)
 
 
 class ObjMarkup:
@@ -38,7 +209,7 @@ class ObjMarkup:
         :param obj: the object to check
         :return: True if the object is a dict type container.
         """
-        return isinstance(obj, collections.Mapping) and not isinstance(obj, str)
+        return isinstance(obj, collections.abc.Mapping) and not isinstance(obj, str)
 
     @classmethod
     def is_list(cls, obj):
@@ -47,8 +218,8 @@ class ObjMarkup:
         :param obj: the object to check
         :return: True if the object is a list/array type container.
         """
-        return isinstance(obj, collections.Collection)\
-            and not isinstance(obj, collections.Mapping)\
+        return isinstance(obj, collections.abc.Collection)\
+            and not isinstance(obj, collections.abc.Mapping)\
             and not isinstance(obj, str)
 
     @classmethod
@@ -70,18 +241,18 @@ class ObjMarkup:
         :return: returns None if no entries are containers,
                  otherwise returns the first container found.
         """
-        if not data or not isinstance(data, collections.Collection) or isinstance(data, str):
+        if not data or not isinstance(data, collections.abc.Collection) or isinstance(data, str):
             # The data is not a container (or it is but it is empty) and
             # therefore cannot contain any containers
             return None
 
-        if isinstance(data, collections.Mapping):
+        if isinstance(data, collections.abc.Mapping):
             for value in data.values():
-                if isinstance(value, collections.Collection) and not isinstance(value, str):
+                if isinstance(value, collections.abc.Collection) and not isinstance(value, str):
                     return value
         else:
             for entry in data:
-                if isinstance(entry, collections.Collection) and not isinstance(entry, str):
+                if isinstance(entry, collections.abc.Collection) and not isinstance(entry, str):
                     return entry  # this entry is a container (not a child node)
         return None
 
@@ -99,40 +270,82 @@ class ObjMarkup:
         # ssl._create_default_https_context = ssl._create_unverified_context
         with urllib.request.urlopen(api_url, context=ssl_context) as url:
             http_info = url.info()
-            raw_data = url.read().decode(http_info.get_content_charset())
-            json_data = json.loads(raw_data)
+            json_data = decode_json(url.read(), http_info.get_content_charset())
             return json_data
 
-    def markup_to_obj(self, markup, func=None):
+    @classmethod
+    def build(cls, pairs, sep=None):
         """
-        A Markup Parser implementing our grammar
+        Build an object from (markup path, value) pairs in one pass, e.g. the paths
+        and values output by --values, or a CSV heading row zipped with a data row.
+        Each path is split into its key and index steps once (cached), and paths
+        sharing a prefix reuse the dicts and lists already built for it.  List items
+        that are never given are None.
+
+        :param pairs: an iterable of (markup path, value) tuples, e.g.
+                      ('company[0]employees[1]name', 'George Slate')
+        :param sep: (optional) the separation character between fields
+        :return: the object built: a list if the paths begin with an index, otherwise
+                 a dict. None if there are no pairs.
         """
-        # A valid label, which does not have any preceding brackets or periods. May be empty.
-        label_rgx = r'([^\[\]' + r'\\' + self.sep + r'][a-zA-Z_]+[a-zA-z0-9_]?)?'
-
-        # A legal value for an index or a portion of a split index. May be empty.
-        # expr_rgx = r'([0-9\-\.]*)'
-        opt_expr_rgx = r'([0-9\-]*)'  # optional
-        req_expr_rgx = r'([0-9\-]+)'  # required
-
-        # A split index value. e.g. 'expression : expression'. the expressions may be empty e.g. ':'
-        split_rgx = r'(' + opt_expr_rgx + r':' + opt_expr_rgx + r')'
-
-        # A legal value to go in-between opening and closing brackets.
-        # May be a single expression (which can be empty) or a split index expression
-        index_rgx = r'(' + req_expr_rgx + r'|' + split_rgx + r')'
-        # index_rgx = r'(' + req_expr_rgx + r')'
+        sep = cls.def_sep if sep is None else sep
+        root = None
+        for path, value in pairs:
+            steps = split_markup(path, sep)
+            if root is None:
+                root = [] if isinstance(steps[0], int) else {}
+            content = root
+            last = len(steps) - 1
+            for position, step in enumerate(steps):
+                if isinstance(step, int):
+                    if not isinstance(content, list):
+                        raise ValueError('markup: "{}" indexes a value that is not a list'
+                                         .format(path))
+                    if step >= len(content):
+                        content.extend([None] * (step + 1 - len(content)))
+                    child = content[step]
+                elif isinstance(content, dict):
+                    child = content.get(step)
+                else:
+                    raise ValueError('markup: "{}" names a field of a value that is not a dict'
+                                     .format(path))
+                if position == last:
+                    content[step] = value
+                    break
+                if child is None:
+                    child = [] if isinstance(steps[position + 1], int) else {}
+                    content[step] = child
+                content = child
+        return root
 
-        # Brackets around a legal index expression
-        # indexed_rgx = r'(\[' + r'[^\[\]]' + index_rgx + r'\])'
-        indexed_rgx = r'(\[' + index_rgx + r'\])'
+    @classmethod
+    def build_rows(cls, headings, rows, sep=None):
+        """
+        Build one object per row of a table whose headings are markup paths,
+        e.g. a CSV file read back with the csv module.
 
-        # An expression that can terminate a label: either a period or a bracketed index expression
-        term_rgx = r'(' + r'\.' + r'|' + indexed_rgx + r')'
+        :param headings: the markup path of each column
+        :param rows: an iterable of rows, each a sequence of values in heading order
+        :param sep: (optional) the separation character between fields
+        :return: a generator yielding the object built from each row
+        """
+        for row in rows:
+            yield cls.build(zip(headings, row), sep)
 
-        # A terminated label
-        token_rgx = r'(' + label_rgx + term_rgx + r')'
+    def markup_to_obj(self, markup, func=None):
+        """
+        A Markup Parser implementing our grammar.  The markup string is scanned once
+        by tokenize_markup() and func is called as func(content, groups) for every
+        label and the separator or index that terminates it, where groups is the
+        tuple (token, label, terminator, index token, index, single index, split index,
+        split begin, split end) with None for the parts that are absent, and then as
+        func(content, label) for the final unterminated label if there is one.
 
+        :param self: a reference to an ObjMarkup instance
+        :param markup: the markup string
+        :param func: (optional) the token handler e.g. self.token. defaults to a no-op
+        :return: the content returned by the last call to func
+        """
         # the default no-op token handler
         def noop(*args):
             if len(args) < 2:
@@ -148,15 +361,34 @@ class ObjMarkup:
         if func is None:
             func = noop
 
+        profiler = _PROFILER
+        if profiler is not None:
+            started = time.perf_counter()
+
         content = {}
-        search = re.search(token_rgx, markup, re.M)
-        while search:
-            groups = search.groups()
+        label = None
+        for kind, text in tokenize_markup(markup, self.sep):
+            if kind == MARKUP_KEY:
+                label = text
+                continue
+            if kind == MARKUP_SEP:
+                groups = ((label or '') + text, label, text, None, None, None, None, None, None)
+            else:
+                term = '[' + text + ']'
+                begin, colon, end = text.partition(':')
+                if colon:
+                    groups = ((label or '') + term, label, term, term, text, None, text,
+                              begin, end)
+                else:
+                    groups = ((label or '') + term, label, term, term, text, text, None,
+                              None, None)
             content = func(content, groups)
-            markup = markup.replace(search.group(0), '', 1)
-            search = re.search(token_rgx, markup, re.M)
-        if markup:
-            content = func(content, markup)
+            label = None
+        if label:
+            content = func(content, label)
+
+        if profiler is not None:
+            profiler.record('markupToObj', time.perf_counter() - started, markup)
         return content
 
     def token(self, content, groups):
@@ -165,35 +397,28 @@ class ObjMarkup:
         """
         if not isinstance(groups, str):
             # this is a token match from the markup string
-            print('token with search match. {} Groups:'.format(len(groups)))
-            index = 0
-            for group in groups:
-                print('{:3d})    "{}" (type({}))'.format(index, str(group), type(group)))
-                index += 1
-            print()
             # make sure the path doesn't already exist
             if groups[1] in content:
                 # it exists by name. make sure it's the same type
                 if self.is_dict(content[groups[1]]) and not groups[2] == self.sep:
-                    print('Markup error: adding the list {} '
-                          'but it already exists as a dict'.format(groups[1]))
+                    warning('markup: adding the list {} '
+                            'but it already exists as a dict'.format(groups[1]))
                     return content
                 if self.is_list(content[groups[1]]) and groups[2] == self.sep:
-                    print('Markup error: adding the dict {} '
-                          'but it already exists as a list'.format(groups[1]))
+                    warning('markup: adding the dict {} '
+                            'but it already exists as a list'.format(groups[1]))
                 return content
             self.groups.append(groups)
             return content
 
         # this is the final markup string
-        print('token with final markup: "{}"'.format(groups))
         if groups:
             # make sure the path doesn't already exist
             if groups in content:
                 # it exists by name. make sure it's the same type
                 if self.is_list(content[groups]):
-                    print('Markup error: adding the dict {} '
-                          'but it already exists as a list'.format(groups))
+                    warning('markup: adding the dict {} '
+                            'but it already exists as a list'.format(groups))
                 return content
             self.groups.append([groups + self.sep, groups, self.sep,
                                 None, None, None, None, None, None])
@@ -233,24 +458,15 @@ class ObjMarkup:
         self.fields = []
         self.groups = []
 
-    def _handle_simple_parse_index(self, **kwargs):
-        # we are at a label being indexed [] but there is no split being used [:]
-        content = kwargs['content']
-        label = kwargs['label']
-        ndx_str = kwargs['ndx_str']
-        index_val = kwargs['index_val']
-        index = kwargs['index']
-        if self.is_dict(content):
-            content = content[label][int(index_val)]
-        elif self.is_list(content):
-            content = content[int(index_val)]
-        if label is None and ndx_str is not None:
-            index = index.replace(ndx_str, '', 1)
-        elif label is not None and ndx_str is None:
-            index = index.replace(label, '', 1)
-        elif label is not None and ndx_str is not None:
-            index = index.replace(label + ndx_str, '', 1)
-        return content, index
+    def compile(self, path):
+        """
+        Compile a markup string once so it can be evaluated against many objects.
+
+        :param self: a reference to an ObjMarkup instance
+        :param path: the markup string for the data to be reached
+        :return: a CompiledMarkup for the path using our separator
+        """
+        return compile_markup(path, self.sep)
 
     def parse(self, path):
         """
@@ -260,51 +476,9 @@ class ObjMarkup:
         :param path: the markup string for the data to be reached
         :return: the value at the specified location
         """
-        pattern = r'([^\[][a-zA-Z_]+[a-zA-z0-9_]?)?(\[([^\]]+)\])'
-        expr_pat = r'([\(\)\%0-9\+\\\*\-\. ]*)'
-        index_split_regex = r'\[' + expr_pat + r':' + expr_pat + r'\]'
-
-        content = self.obj
-        indexes = path.split(self.sep)
-        for index in indexes:
-            search_result = re.search(pattern, index, re.M)
-            if not search_result:
-                content = content[index]
-                continue
-            while search_result:
-                label = search_result.group(1)
-                ndx_str = search_result.group(2)
-                index_val = search_result.group(3)
-                if ':' not in ndx_str:
-                    # we are at a label being indexed [] but there is no split being used [:]
-                    content, index = self._handle_simple_parse_index(
-                        content=content, label=label, ndx_str=ndx_str,
-                        index_val=index_val, index=index)
-                    search_result = re.search(pattern, index, re.M)
-                    continue
-                ndx_with_colon = re.search(index_split_regex, ndx_str, re.M)
-                begin = int(ndx_with_colon.group(1)) if ndx_with_colon.group(1) else 0
-                end = int(ndx_with_colon.group(2))\
-                    if ndx_with_colon.group(2) else len(content[label])
-                if self.is_dict(content):
-                    content = content[label][begin:end]
-                    index = index.replace(label + ndx_str, '', 1)
-                    search_result = re.search(pattern, index, re.M)
-                    if index:
-                        new_content = []
-                        for item in content:
-                            new_content.append({index: item[index]})
-                        index = ''
-                        content = new_content
-                    continue
-                elif self.is_list(content):
-                    content = content[begin:end]
-                    index = index.replace(label + ndx_str, '', 1)
-                    search_result = re.search(pattern, index, re.M)
-                    continue
-            if index:
-                content = content[index]
-        return content
+        if _PROFILER is None:
+            return compile_markup(path, self.sep)(self.obj)
+        return _PROFILER.call('evaluate', compile_markup(path, self.sep), self.obj, path=path)
 
     def gen_fields(self, obj):
         """
@@ -366,7 +540,7 @@ class ObjMarkup:
         self.fields = []
         if obj is None:
             obj = self.obj
-        self.gen_fields(obj)
+        _profiled('fields', self.gen_fields, obj)
         return self.fields
 
 
@@ -379,11 +553,13 @@ class JsonMarkup(ObjMarkup):
         self.csv_path = ''
         self.csv_fields = []
 
-    def gen_csv(self, obj):
+    def gen_csv(self, obj, keep_none=False):
         """
-        Generate the list of valid markup fields and values for the object passed in
+        Generate the list of valid markup fields and values for the object passed in.
+        With keep_none, None values are fields too, so the columns of rows with nulls
+        stay aligned (as in the typed output).
         """
-        if obj is None:
+        if obj is None and (not keep_none or not self.csv_path):
             warning('markup: empty (None) object used to generate csv')
             return
 
@@ -394,7 +570,7 @@ class JsonMarkup(ObjMarkup):
                 if self.csv_path:
                     self.csv_path += self.sep
                 self.csv_path += key
-                self.gen_csv(value)
+                self.gen_csv(value, keep_none)
             self.csv_path = orig_path
         elif self.is_list(obj):
             index = 0
@@ -409,14 +585,44 @@ class JsonMarkup(ObjMarkup):
                 # else:
                 self.csv_path += '[{}]'.format(index)
                 index += 1
-                self.gen_csv(item)
+                self.gen_csv(item, keep_none)
             self.csv_path = orig_path
         else:
             if self.csv_path:
                 self.csv_path = self.csv_path.replace('].', ']')
                 self.csv_fields.append(self.csv_path)
 
-    def _get_csv_headings_parser(self, obj):
+    def get_pairs(self, obj=None, keep_none=True):
+        """
+        Get the markup path and native (un-stringified) value of every end scalar
+        value in the object passed in, using the same paths as gen_csv.
+
+        :param self: a reference to a JsonMarkup instance
+        :param obj: the object to get the values of. if None, use our internal object
+        :param keep_none: False to leave out the None values, as gen_csv does by default
+        :return: a list of (markup path, value) tuples, in object order
+        """
+        if obj is None:
+            obj = self.obj
+        pairs = []
+        is_dict = self.is_dict
+        is_list = self.is_list
+        sep = self.sep
+        # walk the object with an explicit stack instead of recursion
+        stack = [('', obj)]
+        while stack:
+            path, value = stack.pop()
+            if is_dict(value):
+                prefix = path + sep if path and path[-1] != ']' else path
+                stack.extend((prefix + key, item) for key, item in reversed(list(value.items())))
+            elif is_list(value):
+                stack.extend(('{}[{}]'.format(path, index), item)
+                             for index, item in reversed(list(enumerate(value))))
+            elif path and (keep_none or value is not None):
+                pairs.append((path, value))
+        return pairs
+
+    def _get_csv_headings_parser(self, obj, keep_none=False):
         if not obj:
             warning('markup: empty object used to create headings parser')
         parser = JsonMarkup(None)
@@ -428,80 +634,583 @@ class JsonMarkup(ObjMarkup):
             parser = JsonMarkup(obj[0])
         if not self.is_dict(parser.obj) and not self.is_list(parser.obj):
             parser = JsonMarkup(obj)
-        parser.gen_csv(parser.obj)
+        parser.gen_csv(parser.obj, keep_none)
         hdr_fields = parser.csv_fields
         if hdr_fields and hdr_fields[0] and hdr_fields[0][0] == '[':
             parser = JsonMarkup(obj)
-            parser.gen_csv(parser.obj)
+            parser.gen_csv(parser.obj, keep_none)
         return parser
 
-    def get_csv(self, obj=None):
+    def get_table(self, obj=None, keep_none=True):
         """
-        Get a list of strings representing a comma separated value table
-        from the object passed in.  If the object is not supplied or is
-        None, use our own internal object.
+        Get the column headings and the rows of native (un-stringified) values
+        of the table for the object passed in.  If the object is not supplied
+        or is None, use our own internal object.
 
-        :param self: a reference to an ObjMarkup instance
+        :param self: a reference to a JsonMarkup instance
         :param obj: the object to generate the table from. if None, use our internal object
-        :return: a list of strings representing the CSV table for the object.
-                 the first line in the list is the column headings line.
-                 the remaining lines are the data rows for those columns.
-                 Returns an empty list [] on failure.
+        :param keep_none: False to leave out the None values, as get_csv does
+        :return: a tuple of the list of column headings and the list of rows, each row
+                 a list of values in heading order.  Returns ([], []) on failure.
         """
         self.csv_path = ''
         self.csv_fields = []
         if obj is None:
             obj = self.obj
 
-        self.gen_csv(obj)
-        self.get_fields(obj)
-        fields = self.csv_fields
-
         if obj is None:
             warning('markup: empty (None) object used to create csv')
-            return []
+            return [], []
 
-        head_parser = self._get_csv_headings_parser(obj)
+        pairs = _profiled('traverse', self.get_pairs, obj, keep_none)
+        self.csv_fields = [field for field, _ in pairs]
+
+        head_parser = _profiled('headings', self._get_csv_headings_parser, obj, keep_none)
         hdr_fields = head_parser.csv_fields
 
         if not hdr_fields:
             warning('markup: empty csv_fields used to create csv heading row')
+            return [], []
+
+        values = [value for _, value in pairs]
+        width = len(hdr_fields)
+        rows = [values[start:start + width] for start in range(0, len(values) - width + 1, width)]
+        return hdr_fields, rows
+
+    def get_csv(self, obj=None):
+        """
+        Get a list of strings representing a comma separated value table
+        from the object passed in.  If the object is not supplied or is
+        None, use our own internal object.
+
+        :param self: a reference to an ObjMarkup instance
+        :param obj: the object to generate the table from. if None, use our internal object
+        :return: a list of strings representing the CSV table for the object.
+                 the first line in the list is the column headings line.
+                 the remaining lines are the data rows for those columns.
+                 Returns an empty list [] on failure.
+        """
+        hdr_fields, table = self.get_table(obj, keep_none=False)
+        if not hdr_fields:
             return []
 
+        profiler = _PROFILER
+        if profiler is not None:
+            started = time.perf_counter()
+
+        table = [[value if isinstance(value, str) else str(value) for value in row]
+                 for row in table]
         max_head = max([len(s) for s in hdr_fields]) + 2
-        rows = []
-        cols = []
-        for field in fields:
-            value = self.parse(field)
-            if isinstance(value, str):
-                cols.append(value)
-            else:
-                cols.append(str(value))
-        max_col = max([len(s) for s in cols]) + 2
+        max_col = max([len(s) for row in table for s in row] or [0]) + 2
         fmt1 = '{{:>{}s}}'.format(max(max_head, max_col))
 
         # Write the column headings line
-        quoted_fields = ', '.join([fmt1.format('"{}"'.format(field)) for field in hdr_fields])
-        rows.append(quoted_fields)
+        rows = [', '.join([fmt1.format('"{}"'.format(field)) for field in hdr_fields])]
 
         # Write the rows of data
-        column_index = 0
-        cols = []
-        for field in fields:
-            value = self.parse(field)
-            if isinstance(value, str):
-                cols.append(value)
-            else:
-                cols.append(str(value))
-            column_index += 1
-            if column_index % len(hdr_fields) == 0:
-                quoted_cols = ', '.join([fmt1.format('"{}"'.format(col)) for col in cols])
-                rows.append(quoted_cols)
-                cols = []
-                column_index = 0
+        for cols in table:
+            rows.append(', '.join([fmt1.format('"{}"'.format(col)) for col in cols]))
 
+        if profiler is not None:
+            profiler.record('format', time.perf_counter() - started)
         return rows
 
+    def get_typed_csv(self, obj=None, fileout=None):
+        """
+        Get an RFC 4180 comma separated value table from the object passed in,
+        keeping the native value types: numbers are written unquoted as is,
+        booleans as true/false, None as an empty field, and only the fields that
+        need it are quoted.  If the object is not supplied or is None, use our
+        own internal object.
+
+        :param self: a reference to a JsonMarkup instance
+        :param obj: the object to generate the table from. if None, use our internal object
+        :param fileout: (optional) a file to write the table to instead of returning it
+        :return: the CSV table as a string (empty when written to fileout).
+                 the first line is the column headings line.
+        """
+        hdr_fields, table = self.get_table(obj)
+        output = fileout or io.StringIO()
+        if not hdr_fields:
+            return ''
+        profiler = _PROFILER
+        if profiler is not None:
+            started = time.perf_counter()
+        writer = csv.writer(output, lineterminator='\n')
+        writer.writerow(hdr_fields)
+        writer.writerows([get_csv_cell(value) for value in row] for row in table)
+        if profiler is not None:
+            profiler.record('format', time.perf_counter() - started)
+        return '' if fileout else output.getvalue()
+
+
+def get_csv_cell(value):
+    """
+    Get the CSV field for a native value, in the same form json uses for it.
+
+    :param value: the value of a field
+    :return: the value itself for strings and numbers, 'true'/'false' for booleans,
+             '' for None, and the json text of any container
+    """
+    if value is None:
+        return ''
+    if value is True or value is False:
+        return 'true' if value else 'false'
+    if isinstance(value, (str, int, float)):
+        return value
+    return json.dumps(value, separators=(',', ':'))
+
+
+# the kinds of the tokens of a markup string
+MARKUP_KEY = 'key'
+MARKUP_INDEX = 'index'
+MARKUP_SEP = 'sep'
+
+
+@functools.lru_cache(maxsize=16)
+def _get_markup_token_regex(sep):
+    # one alternative per token kind: a bracketed index, the separator, or a key
+    # running up to the next bracket or separator
+    key = r'[^\[\]{}]+' if len(sep) == 1 else r'(?:(?!{})[^\[\]])+'
+    sep = re.escape(sep)
+    return re.compile(r'\[([^\[\]]*)\]|({})|({})'.format(sep, key.format(sep)))
+
+
+@functools.lru_cache(maxsize=4096)
+def tokenize_markup(path, sep=ObjMarkup.def_sep):
+    """
+    Split a markup string into its tokens in a single left to right scan
+    (cached, so each path is only scanned once).  This is the tokenizer
+    shared by compile_markup(), split_markup() and ObjMarkup.markup_to_obj().
+
+    :param path: the markup string e.g. 'company[0]employees.name'
+    :param sep: the separation character between fields
+    :return: a tuple of (kind, text) tokens, the kind being MARKUP_KEY, MARKUP_INDEX
+             or MARKUP_SEP and the text of an index being the text between its brackets
+             e.g. (('key', 'company'), ('index', '0'), ('key', 'employees'),
+             ('sep', '.'), ('key', 'name'))
+    """
+    tokens = []
+    end = 0
+    for match in _get_markup_token_regex(sep).finditer(path):
+        if match.start() != end:
+            break
+        index, separator, key = match.groups()
+        if index is not None:
+            tokens.append((MARKUP_INDEX, index))
+        elif separator is not None:
+            tokens.append((MARKUP_SEP, separator))
+        else:
+            tokens.append((MARKUP_KEY, key))
+        end = match.end()
+    if end != len(path):
+        raise ValueError('markup: unexpected "{}" at {} in "{}"'.format(path[end], end, path))
+    if _PROFILER is not None:
+        _PROFILER.count('regexSearches')
+        _PROFILER.count('tokens', len(tokens))
+    return tuple(tokens)
+
+
+# the operators allowed in an index expression
+_INDEX_OPERATORS = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+                    ast.Mod: operator.mod, ast.FloorDiv: operator.floordiv,
+                    ast.USub: operator.neg, ast.UAdd: operator.pos}
+
+
+def get_markup_index(text, path=''):
+    """
+    Get the value of an index, or of one bound of a slice, of a markup string.
+    The index can be a small integer arithmetic expression of + - * // % and
+    parentheses e.g. '-1', '(2 * 3) - 1' or '-(60 % 7)'.
+
+    :param text: the text of the index
+    :param path: (optional) the markup string the index is from, for the error message
+    :return: the index as an int
+    """
+    def _value(node):
+        if isinstance(node, ast.Constant) and type(node.value) is int:
+            return node.value
+        if isinstance(node, ast.UnaryOp) and type(node.op) in _INDEX_OPERATORS:
+            return _INDEX_OPERATORS[type(node.op)](_value(node.operand))
+        if isinstance(node, ast.BinOp) and type(node.op) in _INDEX_OPERATORS:
+            return _INDEX_OPERATORS[type(node.op)](_value(node.left), _value(node.right))
+        raise ValueError
+
+    text = text.strip()
+    if (text[1:] if text[:1] == '-' else text).isdigit():
+        return int(text)
+    try:
+        return _value(ast.parse(text, mode='eval').body)
+    except (ValueError, SyntaxError, ZeroDivisionError):
+        raise ValueError('markup: invalid index "[{}]" in "{}"'.format(text, path))
+
+
+class KeyStep:
+    """
+    A step of a compiled markup string taking the value of a key
+    """
+    __slots__ = ('key',)
+
+    def __init__(self, key):
+        self.key = key
+
+    def __call__(self, content):
+        return content[self.key]
+
+
+class IndexStep:
+    """
+    A step of a compiled markup string taking one item of a list, or of the
+    list of a key when the content is a dict e.g. 'plays[-1]'
+    """
+    __slots__ = ('label', 'index')
+
+    def __init__(self, label, index):
+        self.label = label
+        self.index = index
+
+    def __call__(self, content):
+        # decoded json is checked first by exact type, without the abc checks
+        if type(content) is dict or (type(content) is not list and ObjMarkup.is_dict(content)):
+            return content[self.label][self.index]
+        if type(content) is list or ObjMarkup.is_list(content):
+            return content[self.index]
+        return content
+
+
+class SliceStep:
+    """
+    A step of a compiled markup string taking a slice of a list, or of the
+    list of a key when the content is a dict e.g. 'periods[::2]'.  When a key
+    follows the slice in its segment, that key is taken from every item.
+    """
+    __slots__ = ('label', 'slice', 'rest', 'path')
+
+    def __init__(self, label, start, stop, step, rest, path):
+        self.label = label
+        self.slice = slice(start, stop, step)
+        self.rest = rest
+        self.path = path
+
+    def __call__(self, content):
+        if type(content) is dict or (type(content) is not list and ObjMarkup.is_dict(content)):
+            content = content[self.label][self.slice]
+            if self.rest:
+                rest = self.rest
+                content = [{rest: item[rest]} for item in content]
+            return content
+        if type(content) is list or ObjMarkup.is_list(content):
+            return content[self.slice]
+        raise TypeError('markup: cannot split "{}" in "{}"'.format(self.label, self.path))
+
+
+class CompiledMarkup:
+    """
+    A markup string compiled once into the steps that reach its element
+    (KeyStep, IndexStep and SliceStep objects with their indexes and slices
+    already evaluated), so evaluating it against many objects does no string
+    processing.
+    """
+
+    def __init__(self, path, sep):
+        """
+        Compile a markup string.
+
+        :param self: a reference to a CompiledMarkup instance
+        :param path: the markup string for the data to be reached
+        :param sep: the separation character between fields
+        """
+        self.path = path
+        self.sep = sep
+        profiler = _PROFILER
+        if profiler is not None:
+            started = time.perf_counter()
+        self.steps = self._get_steps(tokenize_markup(path, sep))
+        if profiler is not None:
+            profiler.record('compile', time.perf_counter() - started, path)
+
+    def _get_steps(self, tokens):
+        steps = []
+        label = None
+        taken = False
+        for position, (kind, text) in enumerate(tokens):
+            if kind == MARKUP_KEY:
+                # a key taken from every item by the slice before it is not a step itself
+                label = None if taken else text
+                continue
+            if kind == MARKUP_SEP:
+                if label:
+                    steps.append(KeyStep(label))
+                taken = False
+            elif ':' in text:
+                steps.append(self._get_slice(label, text, self._get_rest(tokens, position)))
+                taken = bool(steps[-1].rest)
+            else:
+                steps.append(IndexStep(label, get_markup_index(text, self.path)))
+            label = None
+        if label:
+            steps.append(KeyStep(label))
+        return steps
+
+    def _get_slice(self, label, text, rest):
+        bounds = text.split(':')
+        if len(bounds) > 3:
+            raise ValueError('markup: invalid slice "[{}]" in "{}"'.format(text, self.path))
+        start, stop, step = [get_markup_index(bound, self.path) if bound.strip() else None
+                             for bound in bounds + [''] * (3 - len(bounds))]
+        if step == 0:
+            raise ValueError('markup: slice step cannot be zero in "{}"'.format(self.path))
+        return SliceStep(label, start, stop, step, rest, self.path)
+
+    @classmethod
+    def _get_rest(cls, tokens, position):
+        # the key ending the segment of a slice, when nothing else follows the slice in
+        # it, is taken from every item by the slice
+        following = tokens[position + 1:position + 3]
+        if following and following[0][0] == MARKUP_KEY and \
+                (len(following) == 1 or following[1][0] == MARKUP_SEP):
+            return following[0][1]
+        return ''
+
+    def __call__(self, obj):
+        return self.evaluate(obj)
+
+    def evaluate(self, obj):
+        """
+        Get the element reached by this markup in an object.
+
+        :param self: a reference to a CompiledMarkup instance
+        :param obj: the object to evaluate the markup against
+        :return: the value at the markup's location
+        """
+        content = obj
+        for step in self.steps:
+            content = step(content)
+        return content
+
+
+@functools.lru_cache(maxsize=4096)
+def compile_markup(path, sep=ObjMarkup.def_sep):
+    """
+    Compile a markup string (cached, so each path is only tokenized once).
+
+    :param path: the markup string for the data to be reached
+    :param sep: the separation character between fields
+    :return: a CompiledMarkup
+    """
+    return CompiledMarkup(path, sep)
+
+
+@functools.lru_cache(maxsize=4096)
+def split_markup(path, sep=ObjMarkup.def_sep):
+    """
+    Split a markup path into the dict keys and list indexes it steps through
+    (cached, so each path is only split once).
+
+    :param path: the markup string e.g. 'company[0]employees[1]name'
+    :param sep: the separation character between fields
+    :return: a tuple of the steps e.g. ('company', 0, 'employees', 1, 'name')
+    """
+    steps = []
+    for kind, text in tokenize_markup(path, sep):
+        if kind == MARKUP_KEY:
+            steps.append(text)
+        elif kind == MARKUP_INDEX:
+            if not text.isdigit():
+                raise ValueError('markup: invalid index "[{}]" in "{}"'.format(text, path))
+            steps.append(int(text))
+    if not steps:
+        raise ValueError('markup: empty path')
+    return tuple(steps)
+
+
+def iter_json_lines(filename):
+    """
+    Read the undecoded lines of an ndjson (JSON Lines) file, skipping blank lines.
+    Regular files are memory-mapped so only one line is held in memory at a time.
+
+    :param filename: the path of the file to read. '-' or None reads from stdin
+    :return: a generator yielding the bytes of each line
+    """
+    if filename in (None, '-'):
+        for line in sys.stdin.buffer:
+            if line.strip():
+                yield line
+        return
+
+    with open(filename, 'rb') as filein:
+        if not os.fstat(filein.fileno()).st_size:
+            return
+        with mmap.mmap(filein.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            for line in iter(buf.readline, b''):
+                if line.strip():
+                    yield line
+
+
+def iter_json_file(filename, ndjson=False):
+    """
+    Read the json object(s) in a file without loading the file as text first.
+    Regular files are memory-mapped and decoded directly from the mapped buffer.
+    With ndjson (JSON Lines) input only one record is held in memory at a time.
+
+    :param filename: the path of the file to read. '-' or None reads from stdin
+    :param ndjson: True if the file holds one json object per line
+    :return: a generator yielding each json object read
+    """
+    if ndjson:
+        for line in iter_json_lines(filename):
+            yield decode_json(line)
+        return
+
+    if filename in (None, '-'):
+        content = sys.stdin.buffer.read()
+        if content.strip():
+            yield decode_json(content)
+        return
+
+    with open(filename, 'rb') as filein:
+        if not os.fstat(filein.fileno()).st_size:
+            return
+        with mmap.mmap(filein.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            view = memoryview(buf)
+            try:
+                obj = decode_json(view)
+            finally:
+                view.release()
+            yield obj
+
+
+def load_json_file(filename):
+    """
+    Load the single json object in a file using a memory-mapped buffer.
+
+    :param filename: the path of the file to read. '-' or None reads from stdin
+    :return: the json object read, or None if the file is empty
+    """
+    for obj in iter_json_file(filename):
+        return obj
+    return None
+
+
+# The pipeline used by a pipeline worker process, set once when the worker starts.
+_PIPELINE = None
+
+
+def _init_pipeline_worker(paths, sep, missing):
+    """
+    Set up a pipeline worker process once so its paths are only compiled once.
+
+    :param paths: the markup strings to evaluate
+    :param sep: the separation character between fields
+    :param missing: the value of a path that is not found in an object
+    :return: nothing
+    """
+    global _PIPELINE
+    _PIPELINE = MarkupPipeline(paths, sep, workers=1, missing=missing)
+
+
+def _evaluate_pipeline_chunk(chunk):
+    return [_PIPELINE.evaluate(obj) for obj in chunk]
+
+
+class MarkupPipeline:
+    """
+    Evaluate a set of markup paths against a stream of objects, producing one
+    row per object.  The paths are compiled once, and the objects can be
+    spread over a pool of worker processes in chunks.
+    """
+
+    def __init__(self, paths, sep=None, workers=1, chunk_size=256, max_pending=None,
+                 missing=None):
+        """
+        Initialize a MarkupPipeline.
+
+        :param self: a reference to a MarkupPipeline instance
+        :param paths: the markup strings to evaluate, one column per path
+        :param sep: (optional) the separation character between fields
+        :param workers: the number of worker processes. 1 evaluates in this process,
+                        None uses one per cpu
+        :param chunk_size: the number of objects sent to a worker at a time
+        :param max_pending: (optional) the number of chunks in flight before waiting
+                            for the oldest one. defaults to twice the workers
+        :param missing: the value of a path that is not found in an object
+        """
+        self.paths = list(paths)
+        self.sep = ObjMarkup.def_sep if sep is None else sep
+        self.markups = [compile_markup(path, self.sep) for path in self.paths]
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = max(1, chunk_size)
+        self.max_pending = max_pending or 2 * self.workers
+        self.missing = missing
+
+    def evaluate(self, obj):
+        """
+        Evaluate every path against one object.
+
+        :param self: a reference to a MarkupPipeline instance
+        :param obj: the object, or the undecoded bytes or text of a json object
+        :return: the list of values, in path order
+        """
+        if isinstance(obj, (bytes, bytearray, str)):
+            obj = decode_json(obj)
+        profiler = _PROFILER
+        row = []
+        for markup in self.markups:
+            try:
+                if profiler is None:
+                    row.append(markup(obj))
+                else:
+                    row.append(profiler.call('evaluate', markup, obj, path=markup.path))
+            except (KeyError, IndexError, TypeError):
+                row.append(self.missing)
+        return row
+
+    def _chunks(self, objs):
+        objs = iter(objs)
+        chunk = list(itertools.islice(objs, self.chunk_size))
+        while chunk:
+            yield chunk
+            chunk = list(itertools.islice(objs, self.chunk_size))
+
+    def run(self, objs):
+        """
+        Evaluate every path against a stream of objects.  At most max_pending
+        chunks are read ahead of the rows consumed.
+
+        :param self: a reference to a MarkupPipeline instance
+        :param objs: an iterable of objects, or of the undecoded lines of an ndjson
+                     file which are then decoded in the workers
+        :return: a generator yielding one row per object, in input order
+        """
+        if self.workers == 1:
+            for obj in objs:
+                yield self.evaluate(obj)
+            return
+
+        pending = collections.deque()
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_pipeline_worker,
+                initargs=(self.paths, self.sep, self.missing)) as pool:
+            for chunk in self._chunks(objs):
+                if len(pending) >= self.max_pending:
+                    yield from pending.popleft().result()
+                pending.append(pool.submit(_evaluate_pipeline_chunk, chunk))
+            while pending:
+                yield from pending.popleft().result()
+
+    def run_file(self, filename, ndjson=False):
+        """
+        Evaluate every path against the json object(s) in a file.
+
+        :param self: a reference to a MarkupPipeline instance
+        :param filename: the path of the file to read. '-' or None reads from stdin
+        :param ndjson: True if the file holds one json object per line
+        :return: a generator yielding one row per object, in file order
+        """
+        if ndjson:
+            return self.run(iter_json_lines(filename))
+        return self.run(iter_json_file(filename))
+
 # GROUP_LIST = []
 #
 # def token(content, groups):
@@ -548,30 +1257,6 @@ class JsonMarkup(ObjMarkup):
 #     return content
 
 
-def test1():
-    """
-    Test some code.
-    """
-    markup = 'company.attr[2]name.location'
-
-#   markup1 = 'company[1]name'
-#   markup2 = 'company[1]employees[2]name'
-#   markup3 = 'company[1]employees[2]job title'
-#   markup4 = 'company[1]employees[2]hobby[2]name'
-
-    parser = ObjMarkup({})
-    obj = parser.markup_to_obj(markup, parser.token)
-
-    print()
-    print('The results are:')
-    print(json.dumps(obj, indent=2))
-    print()
-    exit(0)
-
-
-test1()
-
-
 def create_args_parser():
     """
     Create the argparse ArgumentParser for this program
@@ -593,8 +1278,12 @@ def create_args_parser():
                         help='the file where the log data should be written')
     parser.add_argument('-o', '--output', default=sys.stdout, type=argparse.FileType('a'),
                         help='the file where the output should be written')
-    parser.add_argument('-f', '--filein', default=sys.stdin, type=argparse.FileType('r'),
-                        help='the file where the input should be read from')
+    parser.add_argument('-f', '--filein', default='-', type=str,
+                        help='the file where the input should be read from (- for stdin)')
+    parser.add_argument('-n', '--ndjson',
+                        help='the input is JSON Lines (one object per line). Each object is '
+                        'read and processed one at a time.',
+                        default=False, action='store_true')
 
     parser.add_argument('-u', '--url', type=str,
                         help='use the specified url to retrieve json as the input')
@@ -633,6 +1322,46 @@ def create_args_parser():
     parser.add_argument('-j', '--json',
                         help='output using JSON format',
                         default=False, action='store_true')
+
+    parser.add_argument('-t', '--typed',
+                        help='keep the native value types: with --csv write an RFC 4180 '
+                        'table (numbers unquoted, null as an empty field, minimal quoting), '
+                        'with --values write one compact JSON object of markup path to value '
+                        'per line (NDJSON) instead of padded text.',
+                        default=False, action='store_true')
+
+    parser.add_argument('-r', '--rows',
+                        help='output one JSON array per input object holding the value of '
+                        'each --markup path (null where a path is not found). With more '
+                        'than one --jobs the objects are evaluated across worker processes.',
+                        default=False, action='store_true')
+
+    parser.add_argument('-P', '--parquet', type=str,
+                        help='write the objects (or the elements at the --markup path) to this '
+                        'Parquet file, one typed column per field path and one row per object '
+                        'or list item. Streams every --batch file when given.')
+    parser.add_argument('--feather', type=str,
+                        help='like --parquet but write a Feather (Arrow IPC) file')
+
+    # Batch processing of many input files
+    parser.add_argument('-B', '--batch', type=str, action='append',
+                        help='process every file matching the glob pattern (or every .json, '
+                        '.jsonl and .ndjson file in the directory) instead of --filein. '
+                        'The results are written in file order.')
+    parser.add_argument('-J', '--jobs', type=int, default=os.cpu_count(),
+                        help='the number of worker processes to use with --batch or --rows')
+    parser.add_argument('-d', '--outdir', type=str,
+                        help='with --batch, write the output for each input file to its own '
+                        'file in this directory (its path relative to the common directory of '
+                        'the inputs plus .out) instead of merging it into --output')
+
+    parser.add_argument('--profile',
+                        help='write the time spent in each phase of the markup operations '
+                        '(compile, evaluate, traverse, headings, format), the regex search '
+                        'count and the most costly paths to stderr when done. Only the work '
+                        'done in this process is profiled, so use --jobs 1 with --batch or '
+                        '--rows.',
+                        default=False, action='store_true')
     return parser
 
 
@@ -650,7 +1379,12 @@ def check_args_files(args):
                             format=log_format,
                             level=logging.DEBUG)
 
-    if not args.filein:
+    if args.batch:
+        if args.outdir and not os.path.isdir(args.outdir):
+            msg = 'markup: error opening output directory'
+            error(msg)
+            exit(-3)
+    elif not args.filein or (args.filein != '-' and not os.path.isfile(args.filein)):
         msg = 'markup: error opening input file'
         error(msg)
         exit(-1)
@@ -660,6 +1394,11 @@ def check_args_files(args):
         error(msg)
         exit(-2)
 
+    if args.rows and not args.markup:
+        msg = 'markup: --rows needs at least one --markup path'
+        error(msg)
+        exit(-4)
+
 
 def process_args_basepaths(args, obj):
     """
@@ -697,6 +1436,10 @@ def process_args_values(args, obj):
     """
     parser = JsonMarkup(obj)
 
+    def _impl_typed(r_obj):
+        values = dict(parser.get_pairs(r_obj))
+        args.output.write(json.dumps(values, separators=(',', ':')) + '\n')
+
     def _impl(r_obj):
         parser.gen_csv(r_obj)
         fields = parser.csv_fields
@@ -720,14 +1463,15 @@ def process_args_values(args, obj):
             msg = fmt.format(field, str(value))
             args.output.write(msg)
 
+    impl = _impl_typed if args.typed else _impl
     if args.markup:
         for markup in args.markup:
             parser.obj = obj
             parser.obj = parser(markup)
-            _impl(parser.obj)
+            impl(parser.obj)
             info('markup: generated values for markup "{}"'.format(markup))
     else:
-        _impl(obj)
+        impl(obj)
         info('markup: generated values')
 
 
@@ -742,6 +1486,9 @@ def process_args_csv(args, obj):
     parser = JsonMarkup(obj)
 
     def _impl(r_obj):
+        if args.typed:
+            parser.get_typed_csv(r_obj, args.output)
+            return
         rows = parser.get_csv(r_obj)
         for row in rows:
             args.output.write(row + '\n')
@@ -781,28 +1528,14 @@ def process_args_json(args, obj):
         info('markup: generated json')
 
 
-def parse_args():
+def process_args_obj(args, obj):
     """
-    Parse and process the options from the command line
+    Handle the output options from the cli for one input object.
 
-    :return: The options as a dictionary
+    :param args: the arguments namespace returned from argparse
+    :param obj: the object to process
+    :return: nothing
     """
-    parser = create_args_parser()
-
-    args = parser.parse_args()
-    ObjMarkup.def_sep = args.separator
-
-    check_args_files(args)
-
-    lines = args.filein.readlines()
-    args.filein.close()
-
-    content = ''.join(lines)
-    if not content:
-        exit(0)
-
-    obj = json.loads(content)
-
     if args.basepaths:
         process_args_basepaths(args, obj)
 
@@ -815,6 +1548,209 @@ def parse_args():
     if args.json:
         process_args_json(args, obj)
 
+
+def find_batch_files(patterns):
+    """
+    Find the input files for batch mode.
+
+    :param patterns: a list of glob patterns and/or directories
+    :return: the sorted list of files found for each pattern, in pattern order
+    """
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            names = [os.path.join(pattern, name) for name in os.listdir(pattern)
+                     if name.endswith(('.json', '.jsonl', '.ndjson'))]
+        else:
+            names = glob.glob(pattern, recursive=True)
+        files.extend(sorted(name for name in names if os.path.isfile(name)))
+    return files
+
+
+# The cli options used by a batch worker process, set once when the worker starts.
+_BATCH_ARGS = None
+
+
+def _init_batch_worker(args):
+    """
+    Set up a batch worker process once so the per file calls only do the processing.
+
+    :param args: the arguments namespace (without the output file) to process files with
+    :return: nothing
+    """
+    global _BATCH_ARGS
+    ObjMarkup.def_sep = args.separator
+    _BATCH_ARGS = args
+
+
+def _process_batch_file(filename):
+    """
+    Process one input file in a batch worker process.
+
+    :param filename: the path of the input file
+    :return: a tuple of the filename and its output text. The text is empty when it
+             was written to the output directory, and None when the file failed.
+    """
+    args = copy.copy(_BATCH_ARGS)
+    args.output = io.StringIO()
+    try:
+        for obj in iter_json_file(filename, args.ndjson):
+            process_args_obj(args, obj)
+        text = args.output.getvalue()
+        if args.outdir:
+            outname = get_batch_outname(filename, args.outdir, args.batch_root)
+            os.makedirs(os.path.dirname(outname), exist_ok=True)
+            with open(outname, 'w') as fileout:
+                fileout.write(text)
+            return filename, ''
+    except Exception as err:  # any failure fails only this file, not the whole batch
+        error('markup: error processing "{}": {}'.format(filename, err))
+        return filename, None
+    return filename, text
+
+
+def get_batch_outname(filename, outdir, root):
+    """
+    Get the output file of a batch input file in the output directory.  The path of
+    the input file relative to the root of the batch is kept, with its extension, so
+    inputs of the same name in different directories never overwrite each other.
+
+    :param filename: the path of the input file
+    :param outdir: the output directory
+    :param root: the directory holding every input file of the batch
+    :return: the path of the output file e.g. outdir/2018/games.json.out
+    """
+    return os.path.join(outdir, os.path.relpath(os.path.abspath(filename), root) + '.out')
+
+
+def process_args_batch(args):
+    """
+    Handle the batch option from the cli.  The files are processed across a
+    pool of worker processes and the results are written in file order.
+
+    :param args: the arguments namespace returned from argparse
+    :return: the number of files that could not be processed
+    """
+    files = find_batch_files(args.batch)
+    if not files:
+        warning('markup: no files found for batch "{}"'.format(', '.join(args.batch)))
+        return 0
+
+    worker_args = argparse.Namespace(**{key: value for key, value in vars(args).items()
+                                        if key != 'output'})
+    worker_args.batch_root = None
+    if args.outdir:
+        # a file matched by more than one pattern would be written twice to the same output
+        unique = list(dict.fromkeys(os.path.abspath(filename) for filename in files))
+        if len(unique) < len(files):
+            warning('markup: {} files matched more than once are processed once'.format(
+                len(files) - len(unique)))
+            files = unique
+        worker_args.batch_root = os.path.commonpath([os.path.dirname(filename)
+                                                     for filename in unique])
+    jobs = max(1, min(args.jobs or 1, len(files)))
+    failed = 0
+    if jobs == 1:
+        _init_batch_worker(worker_args)
+        results = map(_process_batch_file, files)
+        failed = _write_batch_results(args, results)
+    else:
+        chunksize = max(1, len(files) // (jobs * 4))
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=jobs, initializer=_init_batch_worker,
+                initargs=(worker_args,)) as pool:
+            results = pool.map(_process_batch_file, files, chunksize=chunksize)
+            failed = _write_batch_results(args, results)
+
+    info('markup: processed {} files in batch ({} failed)'.format(len(files), failed))
+    return failed
+
+
+def process_args_columnar(args):
+    """
+    Handle the parquet and feather options from the cli: stream every input
+    object into a columnar file.
+
+    :param args: the arguments namespace returned from argparse
+    :return: the number of rows written
+    """
+    import columnar
+
+    def _objs():
+        if args.batch:
+            return (obj for filename in find_batch_files(args.batch)
+                    for obj in iter_json_file(filename, args.ndjson))
+        return iter_json_file(args.filein, args.ndjson)
+
+    markup = args.markup[0] if args.markup else None
+    if args.markup and len(args.markup) > 1:
+        warning('markup: only the first --markup path is used for the columnar rows')
+
+    rows = 0
+    for filename, file_format in ((args.parquet, 'parquet'), (args.feather, 'feather')):
+        if filename:
+            rows = columnar.write_columnar(filename, _objs(), markup=markup,
+                                           file_format=file_format, sep=args.separator)
+    return rows
+
+
+def process_args_rows(args):
+    """
+    Handle the rows option from the cli: evaluate the markup paths against every
+    input object with a MarkupPipeline.
+
+    :param args: the arguments namespace returned from argparse
+    :return: the number of rows written
+    """
+    pipeline = MarkupPipeline(args.markup, args.separator, workers=args.jobs)
+    count = 0
+    for row in pipeline.run_file(args.filein, args.ndjson):
+        args.output.write(json.dumps(row) + '\n')
+        count += 1
+    info('markup: evaluated {} paths for {} objects'.format(len(pipeline.paths), count))
+    return count
+
+
+def _write_batch_results(args, results):
+    failed = 0
+    for _, text in results:
+        if text is None:
+            failed += 1
+        elif text:
+            args.output.write(text)
+    return failed
+
+
+def parse_args():
+    """
+    Parse and process the options from the command line
+
+    :return: The options as a dictionary
+    """
+    parser = create_args_parser()
+
+    args = parser.parse_args()
+    ObjMarkup.def_sep = args.separator
+
+    check_args_files(args)
+
+    if args.profile:
+        set_markup_profiler(MarkupProfiler())
+
+    try:
+        if args.parquet or args.feather:
+            process_args_columnar(args)
+        elif args.batch:
+            process_args_batch(args)
+        elif args.rows:
+            process_args_rows(args)
+        else:
+            for obj in iter_json_file(args.filein, args.ndjson):
+                process_args_obj(args, obj)
+    finally:
+        if args.profile:
+            sys.stderr.write('\n'.join(set_markup_profiler(None).report()) + '\n')
+
     return args
 
 
@@ -13,7 +13,9 @@ from logging import info
 # from logging import warning
 # from logging import error
 # from logging import critical
+from nhlapi import BASE_URL
 from nhlapi import get_json_data
+from planner import load_views
 
 
 class People:
@@ -55,9 +57,9 @@ class People:
     for key, value in STATS.items():
         modifiers[value] = 'stats=' + key
 
-    base_url = 'https://statsapi.web.nhl.com/api/v1/'
+    base_url = BASE_URL
 
-    def __init__(self, nhl_id, url=None, content=None):
+    def __init__(self, nhl_id, url=None, content=None, transport=None):
         """
         initialize this Player object
 
@@ -65,10 +67,13 @@ class People:
         :param nhl_id: the ID of this player as known to NHL.com
         :param url: (optional) url to use to get the data for this object
         :param content: (optional) content for this object instance
+        :param transport: (optional) the transport to fetch with instead of the default transport
         """
         self.url = ''
+        self.transport = transport
         self.name = ''
         self.content = {}
+        self.views = {}
         self.nhl_id = nhl_id
         if url is not None:
             self.url = url
@@ -77,7 +82,7 @@ class People:
         if content is not None:
             self.content = content
         else:
-            self.content = get_json_data(self.url)
+            self.content = get_json_data(self.url, self.transport)
 
         if self.content and 'people' in self.content and 'fullName' in self.content['people'][0]:
             self.name = self.content['people'][0]['fullName']
@@ -111,7 +116,7 @@ class People:
     def load_ext_url(self, *modifiers, **kwargs):
         """ load the values from the extra data specified """
         url = self.get_ext_url(*modifiers, **kwargs)
-        self.content = get_json_data(url)
+        self.content = get_json_data(url, self.transport)
 
 
 def parse_args():
@@ -157,21 +162,20 @@ def parse_args():
         return args
 
     args_vars = vars(args)
-    for arg in args_vars:
-        if arg in People.STATS and args_vars[arg]:
-            if args.year:
-                player.load_ext_url(People.STATS[arg], season=args.year)
-            elif args.startYear and args.endYear:
-                player.load_ext_url(People.STATS[arg], start_year=args.startYear,
-                                    end_year=args.endYear)
-            else:
-                player.load_ext_url(People.STATS[arg])
-
-            if args.humanReadable and player.content:
-                output = json.dumps(player.content['stats'], indent=1)
-            else:
-                output = player.content
-            print(output)
+    stats = [arg for arg in args_vars if arg in People.STATS and args_vars[arg]]
+    if args.year:
+        views = load_views(player, *stats, season=args.year)
+    elif args.startYear and args.endYear:
+        views = load_views(player, *stats, start_year=args.startYear, end_year=args.endYear)
+    else:
+        views = load_views(player, *stats)
+
+    for stat in stats:
+        if args.humanReadable and views[stat]:
+            output = json.dumps(views[stat]['stats'], indent=1)
+        else:
+            output = views[stat]
+        print(output)
 
     result = 'retrieved data for id: {} ({})'.format(args.playerId, player.name)
     info(result)
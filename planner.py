@@ -0,0 +1,124 @@
+"""
+    Request planner for the nhlapi package
+
+    Loads several stats/expands for a Game, Team or People object in the fewest
+    requests by merging the modifiers the api accepts together into one url,
+    then splits each response back into one view per stat.  The views are
+    stored side by side in the object's views dictionary instead of each load
+    replacing the object's content.
+"""
+
+from logging import info
+from nhlapi import get_json_data
+
+
+# The top level key each Team expand adds to every team in a response.
+# Expands without a key of their own (personNames) change the roster entries instead.
+TEAM_EXPAND_KEYS = {'teamRoster': 'roster',
+                    'teamScheduleNext': 'nextGameSchedule',
+                    'teamSchedulePrev': 'previousGameSchedule',
+                    'teamStats': 'teamStats'}
+
+
+def get_stat_name(entity, stat):
+    """
+    get the name of a stat for an entity
+
+    :param entity: a Game, Team or People instance
+    :param stat: the stat as its name or its STATS value
+    :return: the name of the stat e.g. 'teamRoster'
+    """
+    if isinstance(stat, str):
+        if stat not in entity.STATS:
+            raise KeyError('unknown stat "{}" for {}'.format(stat, type(entity).__name__))
+        return stat
+    for name, value in entity.STATS.items():
+        if value == stat:
+            return name
+    raise KeyError('unknown stat {} for {}'.format(stat, type(entity).__name__))
+
+
+def plan_requests(entity, *stats):
+    """
+    group the stats into the fewest requests the api allows
+
+    :param entity: a Game, Team or People instance
+    :param stats: the stats to load, as names or STATS values
+    :return: a list with the tuple of stat names for each request
+    """
+    names = []
+    for stat in stats:
+        name = get_stat_name(entity, stat)
+        if name not in names:
+            names.append(name)
+
+    kind = type(entity).__name__
+    if kind == 'Team':
+        # every expand can be requested together; 'teams' is the plain url
+        plain = tuple(name for name in names if not entity.modifiers[entity.STATS[name]])
+        expands = tuple(name for name in names if entity.modifiers[entity.STATS[name]])
+        return [group for group in (plain, expands) if group]
+    if kind == 'People':
+        # every stats= type can be requested together
+        return [tuple(names)] if names else []
+    # each Game modifier is its own endpoint
+    return [(name,) for name in names]
+
+
+def split_views(entity, names, content):
+    """
+    split the response of a combined request into one view per stat
+
+    :param entity: a Game, Team or People instance
+    :param names: the tuple of stat names that were requested together
+    :param content: the response content
+    :return: a dictionary of stat name to its view of the content
+    """
+    kind = type(entity).__name__
+    if len(names) == 1 or not content:
+        return {name: content for name in names}
+
+    views = {}
+    if kind == 'People':
+        by_type = {}
+        for stat in content.get('stats', []):
+            by_type[stat['type']['displayName']] = stat
+        for name in names:
+            view = {key: value for key, value in content.items() if key != 'stats'}
+            view['stats'] = [by_type[name]] if name in by_type else []
+            views[name] = view
+    elif kind == 'Team':
+        for name in names:
+            others = {key for stat, key in TEAM_EXPAND_KEYS.items() if stat != name}
+            view = {key: value for key, value in content.items() if key != 'teams'}
+            view['teams'] = [{key: value for key, value in team.items() if key not in others}
+                             for team in content.get('teams', [])]
+            views[name] = view
+    else:
+        for name in names:
+            views[name] = content
+    return views
+
+
+def load_views(entity, *stats, **kwargs):
+    """
+    load the stats for an entity in the fewest requests and store the
+    per stat views in entity.views
+
+    :param entity: a Game, Team or People instance
+    :param stats: the stats to load, as names or STATS values
+    :param kwargs: the keyword arguments for the entity's get_ext_url() e.g. season=2018
+    :return: a dictionary of stat name to view for the stats loaded
+    """
+    views = {}
+    requests = plan_requests(entity, *stats)
+    for names in requests:
+        modifiers = [entity.STATS[name] for name in names if entity.modifiers[entity.STATS[name]]]
+        if modifiers:
+            url = entity.get_ext_url(*modifiers, **kwargs)
+        else:
+            url = entity.url
+        views.update(split_views(entity, names, get_json_data(url, entity.transport)))
+    entity.views.update(views)
+    info('planner: loaded {} views in {} requests'.format(len(views), len(requests)))
+    return views
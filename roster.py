@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+    Roster tracking for the nhlapi package
+
+    Fetches the rosters of every team in one teams?expand=team.roster request,
+    keeps the previous snapshot and reports only what changed since then.
+"""
+
+import os
+import json
+import argparse
+import logging
+# from logging import debug
+from logging import info
+# from logging import warning
+# from logging import error
+# from logging import critical
+from team import Team
+
+
+class RosterTracker:
+    """
+    Track the rosters of all teams and report the changes between snapshots
+    """
+
+    def __init__(self, filename=None):
+        """
+        initialize this RosterTracker object
+
+        :param self: reference to a RosterTracker instance
+        :param filename: (optional) file where the previous snapshot is kept between runs
+        """
+        self.filename = filename
+        self.snapshot = {}
+        if self.filename and os.path.isfile(self.filename):
+            self.load()
+
+    @classmethod
+    def get_snapshot(cls, content):
+        """
+        get a compact roster snapshot from a teams?expand=team.roster response
+
+        :param content: the response content
+        :return: a dictionary of team id to a dictionary of person id to their
+                 name, position code and jersey number
+        """
+        snapshot = {}
+        for team in content.get('teams', []) if content else []:
+            players = {}
+            for entry in team.get('roster', {}).get('roster', []):
+                person = entry.get('person', {})
+                players[person['id']] = {'name': person.get('fullName', ''),
+                                         'position': entry.get('position', {}).get('code', ''),
+                                         'jersey': entry.get('jerseyNumber', '')}
+            snapshot[team['id']] = players
+        return snapshot
+
+    @classmethod
+    def diff(cls, old, new):
+        """
+        get the changes between two roster snapshots
+
+        :param old: the previous snapshot
+        :param new: the current snapshot
+        :return: a list of changes.  Each change is a dictionary with the 'change'
+                 ('added', 'removed', 'moved', 'position' or 'jersey'), 'personId',
+                 'name' and 'teamId', plus 'from' and 'to' values where they apply.
+        """
+        old_teams = {person_id: team_id for team_id, players in old.items()
+                     for person_id in players}
+        new_teams = {person_id: team_id for team_id, players in new.items()
+                     for person_id in players}
+
+        changes = []
+        for person_id, team_id in new_teams.items():
+            player = new[team_id][person_id]
+            change = {'personId': person_id, 'name': player['name'], 'teamId': team_id}
+            old_team_id = old_teams.get(person_id)
+            if old_team_id is None:
+                changes.append(dict(change, change='added'))
+                continue
+            if old_team_id != team_id:
+                changes.append(dict(change, change='moved', to=team_id, **{'from': old_team_id}))
+            previous = old[old_team_id][person_id]
+            for field in ('position', 'jersey'):
+                if previous[field] != player[field]:
+                    changes.append(dict(change, change=field, to=player[field],
+                                        **{'from': previous[field]}))
+
+        for person_id, team_id in old_teams.items():
+            if person_id not in new_teams:
+                changes.append({'change': 'removed', 'personId': person_id, 'teamId': team_id,
+                                'name': old[team_id][person_id]['name']})
+        return changes
+
+    @classmethod
+    def fetch(cls):
+        """
+        fetch the rosters of every team in one request
+
+        :return: the teams?expand=team.roster response content
+        """
+        teams = Team(None, content={})
+        teams.load_ext_url(Team.STATS['teamRoster'])
+        return teams.content
+
+    def update(self, content=None):
+        """
+        take a new snapshot and get the changes since the previous one
+
+        :param self: reference to a RosterTracker instance
+        :param content: (optional) a teams?expand=team.roster response. fetched if None
+        :return: the list of changes (every player is 'added' the first time)
+        """
+        if content is None:
+            content = self.fetch()
+        snapshot = self.get_snapshot(content)
+        if not snapshot:
+            info('roster: no rosters in the response, keeping the previous snapshot')
+            return []
+        changes = self.diff(self.snapshot, snapshot)
+        self.snapshot = snapshot
+        if self.filename:
+            self.save()
+        info('roster: {} changes across {} teams'.format(len(changes), len(snapshot)))
+        return changes
+
+    def load(self):
+        """
+        load the previous snapshot from our file
+
+        :param self: reference to a RosterTracker instance
+        :return: nothing
+        """
+        with open(self.filename) as filein:
+            saved = json.load(filein)
+        self.snapshot = {int(team_id): {int(person_id): player
+                                        for person_id, player in players.items()}
+                         for team_id, players in saved.items()}
+
+    def save(self):
+        """
+        save the current snapshot to our file
+
+        :param self: reference to a RosterTracker instance
+        :return: nothing
+        """
+        tmp_name = self.filename + '.tmp'
+        with open(tmp_name, 'w') as fileout:
+            json.dump(self.snapshot, fileout)
+        os.replace(tmp_name, self.filename)
+
+
+def parse_args():
+    """
+    Parse the options from the command line
+
+    :return: The options as a dictionary
+    """
+    description = 'Use the nhlapi/Team class to report the roster changes of every NHL team ' \
+        'since the last run.'
+    epilog = 'Example use: roster.py --snapshot rosters.json --humanReadable'
+
+    # Standard options for each nhlapi interface
+    parser = argparse.ArgumentParser(description=description, epilog=epilog)
+    parser.add_argument('--humanReadable', help='output in easier to read format for users',
+                        action='store_true')
+    parser.add_argument(
+        '--log', default='/dev/null', type=str,
+        help='the file where the output should be written')
+
+    # Optional user supplied values
+    parser.add_argument('--snapshot', default='rosters.json', type=str,
+                        help='the file where the previous roster snapshot is kept')
+
+    args = parser.parse_args()
+
+    if args.log:
+        log_format = '%(asctime)s %(levelname)s: %(message)s'
+        logging.basicConfig(filename=args.log,
+                            format=log_format,
+                            level=logging.DEBUG)
+
+    tracker = RosterTracker(args.snapshot)
+    changes = tracker.update()
+
+    if args.humanReadable:
+        output = json.dumps(changes, indent=1)
+    else:
+        output = changes
+    print(output)
+
+    result = 'retrieved {} roster changes'.format(len(changes))
+    info(result)
+
+    return args
+
+
+if __name__ == '__main__':
+    parse_args()
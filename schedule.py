@@ -14,6 +14,7 @@ from logging import info
 # from logging import warning
 # from logging import error
 # from logging import critical
+from nhlapi import BASE_URL
 from nhlapi import get_json_data
 
 
@@ -38,17 +39,25 @@ class Schedule:
                  STATS['startDate']: 'startDate={}',
                  STATS['endDate']: 'endDate={}'}
 
-    base_url = 'https://statsapi.web.nhl.com/api/v1/'
+    base_url = BASE_URL
 
-    def __init__(self, url=None, content=None):
+    def __init__(self, url=None, content=None, transport=None, soft_ttl=None, hard_ttl=None):
         """
         initialize this Schedule object
 
         :param self: reference to a Schedule instance
         :param url: (optional) url to use to get the data for this object
         :param content: (optional) content for this object instance
+        :param transport: (optional) the transport to fetch with instead of the default transport
+        :param soft_ttl: (optional) read cached content younger than this many seconds, and
+                         older content too while it is refreshed in the background
+        :param hard_ttl: (optional) with soft_ttl, wait for a fetch once the cached content
+                         is older than this many seconds
         """
         self.url = ''
+        self.transport = transport
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = hard_ttl
         self.content = {}
         if url is not None:
             self.url = url
@@ -57,7 +66,7 @@ class Schedule:
         if content is not None:
             self.content = content
         else:
-            self.content = get_json_data(self.url)
+            self.content = get_json_data(self.url, self.transport, self.soft_ttl, self.hard_ttl)
 
     def get_ext_url(self, *modifiers, **kwargs):
         """ get extra stats url's """
@@ -83,7 +92,7 @@ class Schedule:
     def load_ext_url(self, *modifiers, **kwargs):
         """ load the values from the extra data specified """
         url = self.get_ext_url(*modifiers, **kwargs)
-        self.content = get_json_data(url)
+        self.content = get_json_data(url, self.transport, self.soft_ttl, self.hard_ttl)
 
 
 def parse_args():
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+    Schema fingerprints and diffs for the nhlapi package
+
+    The schema of a payload is its set of markup paths with the list indexes
+    removed, merged over every item of each list, so two payloads of the same
+    shape have the same schema whatever their values and list lengths.
+
+    Payloads of one endpoint rarely all hold every path: a day without games
+    has no game paths and optional fields come and go.  So the tracker keeps
+    the union of the paths seen under each key, and reports a change only for
+    a path never seen before, or for a known path missing from a number of
+    payloads in a row.  The paths of a payload are cached by the hash of its
+    response body, so an identical body is never walked twice.
+
+    Use nhlapi.set_schema_tracker() to check every response fetched by
+    get_json_data().
+"""
+
+import os
+import json
+import hashlib
+import argparse
+import threading
+import urllib.parse
+import logging
+# from logging import debug
+from logging import info
+from logging import warning
+# from logging import error
+# from logging import critical
+from nhlapi import decode_json
+from objmarkup import ObjMarkup
+from objmarkup import iter_json_file
+from transport import get_endpoint
+
+
+def get_schema(obj, sep=None):
+    """
+    get the schema of an object: its markup paths with the list indexes removed.
+    the paths of every item of a list are merged, so a field found only in some
+    items is part of the schema, and a None value is a leaf like any other value.
+
+    :param obj: the object e.g. a json response
+    :param sep: (optional) the separation character between fields
+    :return: the sorted list of paths e.g. ['dates[]games[]gamePk', 'totalGames']
+    """
+    sep = ObjMarkup.def_sep if sep is None else sep
+    paths = set()
+    # walk the object with an explicit stack instead of recursion
+    stack = [('', obj)]
+    while stack:
+        path, value = stack.pop()
+        if isinstance(value, dict):
+            prefix = path + sep if path and path[-1] != ']' else path
+            stack.extend((prefix + key, item) for key, item in value.items())
+        elif isinstance(value, list):
+            stack.extend((path + '[]', item) for item in value)
+        elif path:
+            paths.add(path)
+    return sorted(paths)
+
+
+def get_fingerprint(paths):
+    """
+    get the fingerprint of a schema
+
+    :param paths: the sorted list of paths of the schema
+    :return: the hex digest of the paths
+    """
+    return hashlib.sha1('\n'.join(paths).encode('utf-8')).hexdigest()
+
+
+def get_schema_key(url):
+    """
+    get the key payloads are compared under: the endpoint plus the names of
+    its query parameters and any expands, which change the shape of a response
+
+    :param url: the url e.g. '.../api/v1/schedule?date=2018-10-26&expand=schedule.linescore'
+    :return: the key e.g. '/api/v1/schedule?date&expand=schedule.linescore'
+    """
+    query = urllib.parse.parse_qsl(urllib.parse.urlsplit(url).query)
+    params = sorted(name + ('=' + value if name == 'expand' else '') for name, value in query)
+    return get_endpoint(url) + ('?' + '&'.join(params) if params else '')
+
+
+class SchemaTracker:
+    """
+    The union of the paths seen under each key, and the number of payloads
+    in a row each known path has been missing from
+    """
+
+    # The number of response body hashes whose schema is remembered
+    DIGEST_CACHE_SIZE = 1024
+
+    def __init__(self, filename=None, missing_after=3):
+        """
+        initialize this SchemaTracker object
+
+        :param self: reference to a SchemaTracker instance
+        :param filename: (optional) json file the tracker is loaded from and saved to
+        :param missing_after: the number of payloads in a row a known path must be
+                              missing from before it is reported as removed
+        """
+        self.filename = filename
+        self.missing_after = max(1, missing_after)
+        self.known = {}
+        self.missing = {}
+        self.schemas = {}
+        self.changes = []
+        self._digests = {}
+        self._lock = threading.Lock()
+        if self.filename and os.path.isfile(self.filename):
+            self.load()
+
+    def get_paths(self, obj, raw_data=None):
+        """
+        get the schema paths of a payload, walking it only if its response body
+        has not been seen before
+
+        :param self: reference to a SchemaTracker instance
+        :param obj: the payload
+        :param raw_data: (optional) the response body the payload was decoded from
+        :return: the frozenset of paths
+        """
+        digest = hashlib.sha1(raw_data).hexdigest() if raw_data is not None else None
+        with self._lock:
+            fingerprint = self._digests.get(digest)
+            if fingerprint is not None:
+                return self.schemas[fingerprint]
+        paths = get_schema(obj)
+        fingerprint = get_fingerprint(paths)
+        with self._lock:
+            paths = self.schemas.setdefault(fingerprint, frozenset(paths))
+            if digest is not None:
+                if len(self._digests) >= self.DIGEST_CACHE_SIZE:
+                    del self._digests[next(iter(self._digests))]
+                self._digests[digest] = fingerprint
+        return paths
+
+    def check(self, key, obj, raw_data=None):
+        """
+        check the schema of a payload against the paths seen before under its key
+
+        :param self: reference to a SchemaTracker instance
+        :param key: the url of the payload, or any name to compare payloads under
+        :param obj: the payload
+        :param raw_data: (optional) the response body the payload was decoded from
+        :return: a dictionary with the 'key' and the sorted 'added' (never seen before)
+                 and 'removed' (missing from missing_after payloads in a row) paths if
+                 the schema changed, otherwise None
+        """
+        if '://' in key:
+            key = get_schema_key(key)
+        present = self.get_paths(obj, raw_data)
+        with self._lock:
+            known = self.known.get(key)
+            if known is None:
+                self.known[key] = set(present)
+                self.missing[key] = {}
+                return None
+            added = present - known
+            known.update(added)
+            missing = self.missing[key]
+            for path in [path for path in missing if path in present]:
+                del missing[path]
+            removed = []
+            for path in known - present:
+                missing[path] = missing.get(path, 0) + 1
+                if missing[path] >= self.missing_after:
+                    removed.append(path)
+            for path in removed:
+                # a removed path that comes back is reported as added again
+                known.discard(path)
+                del missing[path]
+            if not added and not removed:
+                return None
+            change = {'key': key, 'added': sorted(added), 'removed': sorted(removed)}
+            self.changes.append(change)
+        warning('schema: "{}" changed: {} paths added, {} removed'.format(
+            key, len(change['added']), len(change['removed'])))
+        return change
+
+    def save(self, filename=None):
+        """
+        save the known paths to a json file
+
+        :param self: reference to a SchemaTracker instance
+        :param filename: (optional) the file to save to instead of our own file
+        :return: nothing
+        """
+        filename = filename or self.filename
+        with self._lock:
+            saved = {'known': {key: sorted(paths) for key, paths in self.known.items()},
+                     'missing': {key: dict(missing) for key, missing in self.missing.items()}}
+        tmp_name = filename + '.tmp'
+        with open(tmp_name, 'w') as fileout:
+            json.dump(saved, fileout, separators=(',', ':'))
+        os.replace(tmp_name, filename)
+
+    def load(self, filename=None):
+        """
+        load the known paths from a json file
+
+        :param self: reference to a SchemaTracker instance
+        :param filename: (optional) the file to load from instead of our own file
+        :return: nothing
+        """
+        with open(filename or self.filename, 'rb') as filein:
+            saved = decode_json(filein.read())
+        with self._lock:
+            for key, paths in saved.get('known', {}).items():
+                self.known[key] = set(paths)
+                self.missing[key] = dict(saved.get('missing', {}).get(key, {}))
+
+
+def parse_args():
+    """
+    Parse the options from the command line
+
+    :return: The options as a dictionary
+    """
+    description = 'Detect changes in the shape of NHL api payloads between runs.'
+    epilog = 'Example use: schema.py --state schema.json --key schedule -f schedule.json ' \
+        '--humanReadable'
+
+    # Standard options for each nhlapi interface
+    parser = argparse.ArgumentParser(description=description, epilog=epilog)
+    parser.add_argument('--humanReadable', help='output in easier to read format for users',
+                        action='store_true')
+    parser.add_argument('--log', default='/dev/null', type=str,
+                        help='the file where the output should be written')
+
+    # Optional user supplied values
+    parser.add_argument('--state', default='schema.json', type=str,
+                        help='the file where the known paths are kept')
+    parser.add_argument('--key', type=str,
+                        help='the name to compare the payloads under (default: the file name)')
+    parser.add_argument('-f', '--filein', type=str, nargs='+', required=True,
+                        help='the json files of the payloads, in order')
+    parser.add_argument('-n', '--ndjson', help='the files hold one payload per line',
+                        action='store_true')
+
+    args = parser.parse_args()
+
+    if args.log:
+        log_format = '%(asctime)s %(levelname)s: %(message)s'
+        logging.basicConfig(filename=args.log,
+                            format=log_format,
+                            level=logging.DEBUG)
+
+    tracker = SchemaTracker(args.state)
+    for filename in args.filein:
+        for obj in iter_json_file(filename, args.ndjson):
+            tracker.check(args.key or os.path.basename(filename), obj)
+    tracker.save()
+
+    output = tracker.changes
+    if args.humanReadable:
+        output = json.dumps(output, indent=1)
+    print(output)
+
+    result = 'checked {} endpoints, found {} schema changes'.format(len(tracker.known),
+                                                                    len(tracker.changes))
+    info(result)
+
+    return args
+
+
+if __name__ == '__main__':
+    parse_args()
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+    Standings engine for the nhlapi package
+
+    Keeps team records up to date from Schedule results (with the
+    schedule.linescore expand), one completed game at a time, and keeps a
+    per day delta log so the standings can be produced as of any date.
+"""
+
+import json
+import bisect
+import argparse
+import logging
+# from logging import debug
+from logging import info
+# from logging import warning
+# from logging import error
+# from logging import critical
+from schedule import Schedule
+
+
+# The fields of a team record, in the order they are kept in each record list.
+RECORD_FIELDS = ('gamesPlayed', 'wins', 'losses', 'ot', 'regulationWins',
+                 'regulationPlusOtWins', 'goalsFor', 'goalsAgainst')
+GP, WINS, LOSSES, OTL, RW, ROW, GF, GA = range(len(RECORD_FIELDS))
+
+
+class StandingsEngine:
+    """
+    Incremental standings from completed games
+    """
+
+    GAMES_PER_SEASON = 82
+
+    def __init__(self, game_types=('R',)):
+        """
+        initialize this StandingsEngine object
+
+        :param self: reference to a StandingsEngine instance
+        :param game_types: the game types that count in the standings ('R' is regular season)
+        """
+        self.game_types = tuple(game_types)
+        self.records = {}
+        self.names = {}
+        self.games = set()
+        self.deltas = {}
+        self.dates = []
+
+    @classmethod
+    def get_result(cls, game):
+        """
+        get the result of a completed game from a schedule entry
+
+        :param game: a game from a schedule?expand=schedule.linescore response
+        :return: a tuple of (away team id, away score, home team id, home score,
+                 'REG', 'OT' or 'SO'), or None if the game is not final
+        """
+        if game.get('status', {}).get('abstractGameState') != 'Final':
+            return None
+        away = game['teams']['away']
+        home = game['teams']['home']
+        linescore = game.get('linescore', {})
+        if linescore.get('hasShootout'):
+            decision = 'SO'
+        elif linescore.get('currentPeriod', 3) > 3:
+            decision = 'OT'
+        else:
+            decision = 'REG'
+        return away['team']['id'], away['score'], home['team']['id'], home['score'], decision
+
+    def _apply(self, team_id, delta, date):
+        record = self.records.get(team_id)
+        if record is None:
+            record = self.records[team_id] = [0] * len(RECORD_FIELDS)
+        day = self.deltas.get(date)
+        if day is None:
+            day = self.deltas[date] = {}
+            bisect.insort(self.dates, date)
+        day_delta = day.get(team_id)
+        if day_delta is None:
+            day_delta = day[team_id] = [0] * len(RECORD_FIELDS)
+        for index, value in enumerate(delta):
+            record[index] += value
+            day_delta[index] += value
+
+    def add_game(self, game, date=None):
+        """
+        add a completed game to the standings in O(1)
+
+        :param self: reference to a StandingsEngine instance
+        :param game: a game from a schedule?expand=schedule.linescore response
+        :param date: (optional) the date of the game e.g. '2018-10-26'
+        :return: True if the game was added, False if it is not final, not a
+                 counted game type or was already added
+        """
+        if game['gamePk'] in self.games or game.get('gameType', 'R') not in self.game_types:
+            return False
+        result = self.get_result(game)
+        if result is None:
+            return False
+        self.games.add(game['gamePk'])
+        date = date or game.get('gameDate', '')[:10]
+
+        away_id, away_score, home_id, home_score, decision = result
+        for side in ('away', 'home'):
+            team = game['teams'][side]['team']
+            self.names[team['id']] = team.get('name', '')
+        for team_id, goals_for, goals_against in ((away_id, away_score, home_score),
+                                                  (home_id, home_score, away_score)):
+            delta = [0] * len(RECORD_FIELDS)
+            delta[GP] = 1
+            delta[GF] = goals_for
+            delta[GA] = goals_against
+            if goals_for > goals_against:
+                delta[WINS] = 1
+                delta[RW] = 1 if decision == 'REG' else 0
+                delta[ROW] = 1 if decision != 'SO' else 0
+            elif decision == 'REG':
+                delta[LOSSES] = 1
+            else:
+                delta[OTL] = 1
+            self._apply(team_id, delta, date)
+        return True
+
+    def add_schedule(self, content):
+        """
+        add every completed game in a schedule response
+
+        :param self: reference to a StandingsEngine instance
+        :param content: a schedule?expand=schedule.linescore response e.g. Schedule.content
+        :return: the number of games added
+        """
+        added = 0
+        for date in content.get('dates', []) if content else []:
+            for game in date.get('games', []):
+                added += self.add_game(game, date.get('date'))
+        return added
+
+    def fetch(self, start_date, end_date):
+        """
+        fetch the schedule results for a date range and add them
+
+        :param self: reference to a StandingsEngine instance
+        :param start_date: the first date e.g. '2018-10-03'
+        :param end_date: the last date e.g. '2019-04-06'
+        :return: the number of games added
+        """
+        schedule = Schedule(content={})
+        schedule.load_ext_url(Schedule.STATS['scheduleLinescore'],
+                              {Schedule.STATS['startDate']: start_date},
+                              {Schedule.STATS['endDate']: end_date})
+        added = self.add_schedule(schedule.content)
+        info('standings: added {} games from {} to {}'.format(added, start_date, end_date))
+        return added
+
+    def get_records(self, date=None):
+        """
+        get the team records, now or as of the end of a date
+
+        :param self: reference to a StandingsEngine instance
+        :param date: (optional) the date e.g. '2018-12-31'
+        :return: a dictionary of team id to record list (in RECORD_FIELDS order)
+        """
+        if date is None:
+            return self.records
+        records = {}
+        for day in self.dates[:bisect.bisect_right(self.dates, date)]:
+            for team_id, delta in self.deltas[day].items():
+                record = records.get(team_id)
+                if record is None:
+                    records[team_id] = list(delta)
+                else:
+                    for index, value in enumerate(delta):
+                        record[index] += value
+        return records
+
+    def table(self, date=None, teams=None):
+        """
+        get the standings table sorted with the tie-breakers: points, fewer games
+        played, regulation wins, regulation plus overtime wins, wins, goal differential
+
+        :param self: reference to a StandingsEngine instance
+        :param date: (optional) the date to produce the standings as of e.g. '2018-12-31'
+        :param teams: (optional) only include these team ids e.g. one division
+        :return: a list of rows, one dictionary per team
+        """
+        rows = []
+        for team_id, record in self.get_records(date).items():
+            if teams is not None and team_id not in teams:
+                continue
+            row = dict(zip(RECORD_FIELDS, record))
+            row['teamId'] = team_id
+            row['name'] = self.names.get(team_id, '')
+            row['points'] = 2 * record[WINS] + record[OTL]
+            row['goalDifferential'] = record[GF] - record[GA]
+            row['pointsPercentage'] = row['points'] / (2.0 * record[GP]) if record[GP] else 0.0
+            row['pointsPace'] = round(row['pointsPercentage'] * 2 * self.GAMES_PER_SEASON, 1)
+            rows.append(row)
+        rows.sort(key=lambda row: (-row['points'], row['gamesPlayed'], -row['regulationWins'],
+                                   -row['regulationPlusOtWins'], -row['wins'],
+                                   -row['goalDifferential']))
+        return rows
+
+
+def parse_args():
+    """
+    Parse the options from the command line
+
+    :return: The options as a dictionary
+    """
+    description = 'Use the nhlapi/Schedule class to compute the NHL standings for a date range.'
+    epilog = 'Example use: standings.py --startDate=2018-10-03 --endDate=2019-04-06 ' \
+        '--asOf=2018-12-31 --humanReadable'
+
+    # Standard options for each nhlapi interface
+    parser = argparse.ArgumentParser(description=description, epilog=epilog)
+    parser.add_argument('--humanReadable', help='output in easier to read format for users',
+                        action='store_true')
+    parser.add_argument('--log', default='/dev/null', type=str,
+                        help='the file where the output should be written')
+
+    # Optional user supplied values
+    parser.add_argument('--startDate', help='the first date of results', type=str, required=True)
+    parser.add_argument('--endDate', help='the last date of results', type=str, required=True)
+    parser.add_argument('--asOf', help='produce the standings as of this date', type=str)
+
+    args = parser.parse_args()
+
+    if args.log:
+        log_format = '%(asctime)s %(levelname)s: %(message)s'
+        logging.basicConfig(filename=args.log,
+                            format=log_format,
+                            level=logging.DEBUG)
+
+    engine = StandingsEngine()
+    engine.fetch(args.startDate, args.endDate)
+    output = engine.table(args.asOf)
+    if args.humanReadable:
+        output = json.dumps(output, indent=1)
+    print(output)
+
+    result = 'computed standings for {} teams'.format(len(engine.records))
+    info(result)
+
+    return args
+
+
+if __name__ == '__main__':
+    parse_args()
@@ -13,7 +13,9 @@ from logging import info
 # from logging import warning
 # from logging import error
 # from logging import critical
+from nhlapi import BASE_URL
 from nhlapi import get_json_data
+from planner import load_views
 
 
 class Team:
@@ -35,9 +37,9 @@ class Team:
                  STATS['teamStats']: 'expand=team.stats',
                  STATS['teams']: ''}
 
-    base_url = 'https://statsapi.web.nhl.com/api/v1/'
+    base_url = BASE_URL
 
-    def __init__(self, nhl_id, url=None, content=None):
+    def __init__(self, nhl_id, url=None, content=None, transport=None):
         """
         initialize this Team object
 
@@ -45,10 +47,13 @@ class Team:
         :param nhl_id: the ID of this team as known to NHL.com
         :param url: (optional) url to use to get the data for this object
         :param content: (optional) content for this object instance
+        :param transport: (optional) the transport to fetch with instead of the default transport
         """
         self.url = ''
+        self.transport = transport
         self.name = ''
         self.content = {}
+        self.views = {}
         self.nhl_id = nhl_id
         if url is not None:
             self.url = url
@@ -60,7 +65,7 @@ class Team:
         if content is not None:
             self.content = content
         else:
-            self.content = get_json_data(self.url)
+            self.content = get_json_data(self.url, self.transport)
 
         if self.nhl_id and self.content and 'teams' in self.content:
             if 'name' in self.content['teams'][0]:
@@ -90,7 +95,7 @@ class Team:
     def load_ext_url(self, *modifiers, **kwargs):
         """ load the values from the extra data specified """
         url = self.get_ext_url(*modifiers, **kwargs)
-        self.content = get_json_data(url)
+        self.content = get_json_data(url, self.transport)
 
 
 def parse_args():
@@ -132,18 +137,18 @@ def parse_args():
         return args
 
     args_vars = vars(args)
-    for arg in args_vars:
-        if arg in Team.STATS and args_vars[arg]:
-            if args.year:
-                team.load_ext_url(Team.STATS[arg], season=args.year)
-            else:
-                team.load_ext_url(Team.STATS[arg])
-
-            if args.humanReadable:
-                output = json.dumps(team.content, indent=1)
-            else:
-                output = team.content
-            print(output)
+    stats = [arg for arg in args_vars if arg in Team.STATS and args_vars[arg]]
+    if args.year:
+        views = load_views(team, *stats, season=args.year)
+    else:
+        views = load_views(team, *stats)
+
+    for stat in stats:
+        if args.humanReadable:
+            output = json.dumps(views[stat], indent=1)
+        else:
+            output = views[stat]
+        print(output)
 
     result = 'retrieved data for id: {}'.format(args.teamId)
 
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+""" unit tests for archive.py """
+
+import os
+import tempfile
+import unittest
+import unittest.mock
+import nhlapi
+import archive
+import transport
+
+
+class Unit01ArchiveTests(unittest.TestCase):
+    """
+    Unit Tests for the PayloadArchive class
+    """
+    def setUp(self):
+        """Fixture that creates the archive for the unit tests to use."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.archive = archive.PayloadArchive(os.path.join(self.tmpdir.name, 'archive'))
+        self.url = 'https://statsapi.web.nhl.com/api/v1/game/2018020131/boxscore'
+
+    def tearDown(self):
+        """Fixture that removes the test data used by the unit tests."""
+        self.archive.close()
+        self.tmpdir.cleanup()
+
+    def test_01_identical_payloads_stored_once(self):
+        """
+        A payload fetched again only adds an index row
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        first = self.archive.store(self.url, b'{"final": false}', fetched_at=100.0)
+        second = self.archive.store(self.url, b'{"final": true}', fetched_at=200.0)
+        third = self.archive.store(self.url, b'{"final": true}', fetched_at=300.0)
+        self.assertNotEqual(first, second)
+        self.assertEqual(second, third)
+        stats = self.archive.stats()
+        self.assertEqual((stats['snapshots'], stats['blobs']), (3, 2))
+        self.assertEqual([row[1] for row in self.archive.history(self.url)],
+                         [first, second, third])
+
+    def test_02_snapshot_at_time(self):
+        """
+        The payload of a url can be read as of any time
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        self.archive.store(self.url, b'{"period": 1}', fetched_at=100.0)
+        self.archive.store(self.url, b'{"period": 2}', fetched_at=200.0)
+        self.assertEqual(self.archive.load_json(self.url, at=150.0), {'period': 1})
+        self.assertEqual(self.archive.load_json(self.url), {'period': 2})
+        self.assertIsNone(self.archive.get_snapshot(self.url, at=50.0))
+        self.assertIsNone(self.archive.get('0' * 64))
+
+    def test_03_archive_fetched_responses(self):
+        """
+        Responses fetched by get_json_data are archived when an archive is set
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        response = transport.Response(200, 'OK', {}, b'{"gamePk": 2018020131}', 22)
+        fetcher = unittest.mock.Mock()
+        fetcher.fetch.return_value = response
+        nhlapi.set_response_archive(self.archive)
+        try:
+            nhlapi.get_json_data(self.url, fetcher)
+            nhlapi.get_json_data(self.url, fetcher)
+        finally:
+            nhlapi.set_response_archive(None)
+        self.assertEqual(len(self.archive.history(self.url)), 2)
+        self.assertEqual(self.archive.stats()['blobs'], 1)
+        self.assertEqual(self.archive.load_json(self.url), {'gamePk': 2018020131})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+""" unit tests for backfill.py """
+
+import json
+import shutil
+import collections
+import tempfile
+import unittest
+import backfill
+import transport
+
+
+class SeasonTransport(transport.Transport):
+    """ a transport answering with a two game season of two players a game """
+    def __init__(self, failing=()):
+        self.urls = []
+        self.failing = failing
+
+    def _fetch(self, url, headers):
+        self.urls.append(url)
+        if '/schedule' in url:
+            data = {'dates': [{'games': [{'gamePk': 2018020001, 'gameType': 'R'},
+                                         {'gamePk': 2018010001, 'gameType': 'PR'}]},
+                              {'games': [{'gamePk': 2018030111, 'gameType': 'P'}]}]}
+        elif url.endswith('/boxscore'):
+            # one player plays in every game and one only in this game
+            game_player = 8470000 + int(url.split('/')[-2]) % 1000
+            data = {'teams': {side: {'players': {'ID{}'.format(pid): {'person': {'id': pid}}}}
+                              for side, pid in (('away', 8471214), ('home', game_player))}}
+        else:
+            data = {'url': url}
+        if any(part in url for part in self.failing):
+            return transport.Response(503, 'Service Unavailable', {}, b'', 0)
+        body = json.dumps(data).encode('utf-8')
+        return transport.Response(200, 'OK', {'content-type': 'application/json'}, body,
+                                  len(body))
+
+
+class Unit01BackfillTests(unittest.TestCase):
+    """
+    Unit Tests for the Backfill class
+    """
+    def setUp(self):
+        """Fixture that creates the backfill directory for the unit tests to use."""
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Fixture that removes the backfill directory."""
+        shutil.rmtree(self.path)
+
+    def test_01_work_graph(self):
+        """
+        A season expands into its games and the games into their players
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        with backfill.Backfill(self.path, workers=4, transport=SeasonTransport()) as job:
+            job.add_seasons(2018)
+            self.assertEqual(job.run(), 8)
+            report = job.report()
+            self.assertIsNotNone(job.archive.load_json(
+                backfill.Backfill.get_season_url(2018)))
+        self.assertEqual(report['done'], {'season': 1, 'boxscore': 2, 'live': 2, 'player': 3})
+        self.assertEqual((report['units'], report['failed'], report['pending']), (8, {}, {}))
+        self.assertGreater(report['bytes'], 0)
+
+    def test_02_restart_skips_done_units(self):
+        """
+        A stopped backfill continues where it stopped and retries the failed units
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        with backfill.Backfill(self.path, workers=1,
+                               transport=SeasonTransport(['2018030111/feed'])) as job:
+            job.add_seasons(2018)
+            self.assertEqual(job.run(limit=3), 3)
+            job.run()
+            self.assertEqual(job.report()['failed'], {'live': 1})
+
+        fetcher = SeasonTransport()
+        with backfill.Backfill(self.path, workers=2, transport=fetcher) as job:
+            job.add_seasons(2018)
+            self.assertEqual(job.run(), 1)
+            self.assertEqual(job.report()['done']['live'], 2)
+        self.assertEqual(len(fetcher.urls), 1)
+        self.assertTrue(fetcher.urls[0].endswith('/game/2018030111/feed/live'))
+
+    def test_03_units_fetched_once(self):
+        """
+        Players of many games are fetched once each, whatever order the games finish in
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        fetcher = SeasonTransport()
+        with backfill.Backfill(self.path, workers=4, transport=fetcher) as job:
+            job.add_seasons(2018, 2018)
+            job.run()
+        counts = collections.Counter(fetcher.urls)
+        self.assertEqual(len(counts), 8)
+        self.assertEqual(set(counts.values()), {1})
+
+    def test_04_kinds(self):
+        """
+        Only the kinds of units asked for are backfilled
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        with backfill.Backfill(self.path, transport=SeasonTransport(),
+                               kinds=('season', 'boxscore')) as job:
+            job.add_seasons(2018)
+            self.assertEqual(job.run(), 3)
+            self.assertEqual(job.report()['done'], {'season': 1, 'boxscore': 2})
+
+
+if __name__ == '__main__':
+    unittest.main()
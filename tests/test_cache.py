@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+""" unit tests for cache.py """
+
+import time
+import unittest
+import unittest.mock
+import nhlapi
+import cache
+import transport
+from game import Game
+from schedule import Schedule
+
+
+class CountingTransport(transport.Transport):
+    """ a transport answering every url with a small json body, counting the requests """
+    def __init__(self):
+        self.urls = []
+
+    def _fetch(self, url, headers):
+        self.urls.append(url)
+        body = '{{"url": "{}"}}'.format(url).encode('utf-8')
+        return transport.Response(200, 'OK', {'content-type': 'application/json'}, body,
+                                  len(body))
+
+
+class Unit01ResponseCacheTests(unittest.TestCase):
+    """
+    Unit Tests for the ResponseCache class
+    """
+    def setUp(self):
+        """Fixture that creates the cache for the unit tests to use."""
+        self.cache = cache.ResponseCache(ttl=60, max_entries=2,
+                                         ttls={'/api/v1/game/{id}/feed/live': 5})
+        self.live = 'https://statsapi.web.nhl.com/api/v1/game/2018020131/feed/live'
+        self.teams = 'https://statsapi.web.nhl.com/api/v1/teams'
+
+    def tearDown(self):
+        """Fixture that stops the cache being used by get_json_data."""
+        nhlapi.set_response_cache(None)
+
+    def test_01_entries_expire_per_endpoint(self):
+        """
+        Entries are fresh for the ttl of their endpoint
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        self.cache.put(self.live, b'{}', fetched_at=0)
+        self.cache.put(self.teams, b'[]')
+        self.assertIsNone(self.cache.get(self.live))
+        self.assertEqual(self.cache.get_entry(self.live).body, b'{}')
+        self.assertEqual(self.cache.get(self.teams).body, b'[]')
+        self.assertEqual(self.cache.get_ttl(self.live), 5)
+        self.assertEqual(self.cache.stats()['hits'], 1)
+
+    def test_02_least_recently_used_dropped(self):
+        """
+        The least recently used entry is dropped when the cache is full
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        self.cache.put('a', b'1')
+        self.cache.put('b', b'2')
+        self.cache.get('a')
+        self.cache.put('c', b'3')
+        self.assertEqual(len(self.cache), 2)
+        self.assertIsNone(self.cache.get_entry('b'))
+
+    def test_03_get_json_data_reads_through(self):
+        """
+        get_json_data and get_many_json_data only fetch the urls not cached
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        fetcher = CountingTransport()
+        nhlapi.set_response_cache(self.cache)
+        first = nhlapi.get_json_data(self.teams, fetcher)
+        second = nhlapi.get_json_data(self.teams, fetcher)
+        self.assertEqual(first, second)
+        many = nhlapi.get_many_json_data([self.teams, self.live], fetcher)
+        self.assertEqual(many[1], {'url': self.live})
+        self.assertEqual(fetcher.urls, [self.teams, self.live])
+        self.assertEqual(nhlapi.prefetch([self.teams], fetcher), 1)
+        self.assertEqual(len(fetcher.urls), 3)
+
+
+class Unit02StaleWhileRevalidateTests(unittest.TestCase):
+    """
+    Unit Tests for the stale-while-revalidate read mode
+    """
+    def setUp(self):
+        """Fixture that creates the cache for the unit tests to use."""
+        self.cache = cache.ResponseCache(ttl=60)
+        self.fetcher = CountingTransport()
+        nhlapi.set_response_cache(self.cache)
+        self.url = 'https://statsapi.web.nhl.com/api/v1/game/2018020131/linescore'
+
+    def tearDown(self):
+        """Fixture that stops the cache being used by get_json_data."""
+        nhlapi.set_response_cache(None)
+
+    def wait_for_refresh(self):
+        """ wait until the background refresh has replaced the cached body """
+        for _ in range(100):
+            if self.fetcher.urls and self.cache.get_entry(self.url).body != b'{"old": 1}':
+                return
+            time.sleep(0.01)
+
+    def test_01_stale_served_then_refreshed(self):
+        """
+        Content older than the soft ttl is returned at once and refreshed in the background
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        self.cache.put(self.url, b'{"old": 1}', fetched_at=time.time() - 30)
+        game = Game(2018020131, transport=self.fetcher, soft_ttl=10, hard_ttl=120)
+        self.assertEqual(game.content, {'old': 1})
+        self.wait_for_refresh()
+        self.assertEqual(self.fetcher.urls, [self.url])
+        game.load_ext_url(Game.STATS['lineScore'])
+        self.assertEqual(game.content, {'url': self.url})
+        self.assertEqual(len(self.fetcher.urls), 1)
+
+    def test_02_hard_ttl_blocks(self):
+        """
+        Content older than the hard ttl is fetched before it is returned
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        url = Schedule.base_url + 'schedule'
+        self.cache.put(url, b'{"old": 1}', fetched_at=time.time() - 300)
+        schedule = Schedule(transport=self.fetcher, soft_ttl=5, hard_ttl=60)
+        self.assertEqual(schedule.content, {'url': url})
+        self.assertEqual(self.fetcher.urls, [url])
+
+    def test_03_plain_reads_not_cached(self):
+        """
+        Without a response cache, only the stale-while-revalidate reads are cached
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        nhlapi.set_response_cache(None)
+        url = 'http://x/swr'
+        other = 'http://x/other'
+        self.assertEqual(nhlapi.get_json_data(url, self.fetcher, soft_ttl=5), {'url': url})
+        self.assertEqual(nhlapi.get_json_data(url, self.fetcher, soft_ttl=5), {'url': url})
+        nhlapi.get_json_data(other, self.fetcher)
+        nhlapi.get_json_data(other, self.fetcher)
+        nhlapi.get_json_data(url, self.fetcher)
+        self.assertEqual(self.fetcher.urls, [url, other, other, url])
+        self.assertIsNone(nhlapi.get_response_cache())
+
+    def test_04_failed_refresh_keeps_content(self):
+        """
+        A failed background refresh is logged and the cached content is kept
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        self.cache.put(self.url, b'{"old": 1}', fetched_at=time.time() - 30)
+        failing = unittest.mock.Mock()
+        failing.fetch.side_effect = OSError('connection refused')
+        with self.assertLogs(level='WARNING'):
+            nhlapi._refresh(self.url, failing)
+        self.assertEqual(self.cache.get_entry(self.url).body, b'{"old": 1}')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+""" unit tests for career.py """
+
+import unittest
+import career
+
+
+def make_game(game_pk, date, goals, assists, toi='15:00'):
+    """ build a gameLog split """
+    return {'date': date, 'game': {'gamePk': game_pk},
+            'stat': {'goals': goals, 'assists': assists, 'points': goals + assists,
+                     'shots': 3, 'timeOnIce': toi}}
+
+
+class Unit01CareerTests(unittest.TestCase):
+    """
+    Unit Tests for the CareerAggregator class
+    """
+    def setUp(self):
+        """Fixture that creates the aggregator for the unit tests to use."""
+        self.aggregator = career.CareerAggregator(window=2)
+        self.games = [make_game(1, '2018-10-04', 1, 0),
+                      make_game(2, '2018-10-06', 0, 2),
+                      make_game(3, '2018-10-08', 0, 0),
+                      make_game(4, '2018-10-10', 2, 1, toi='20:00')]
+
+    def test_01_toi_seconds(self):
+        """
+        Time on ice strings are converted to seconds
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        self.assertEqual(career.toi_seconds('17:32'), 17 * 60 + 32)
+        self.assertEqual(career.toi_seconds('1234:05'), 1234 * 60 + 5)
+        self.assertEqual(career.toi_seconds(''), 0)
+
+    def test_02_combined_stats_url(self):
+        """
+        All of the stat types are requested in one url
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        url = self.aggregator.get_url(8471214)
+        self.assertTrue(url.endswith('people/8471214/stats?stats=yearByYear'
+                                     '&stats=careerRegularSeason&stats=gameLog'))
+
+    def test_03_rollups(self):
+        """
+        Totals, per-60 rates, windows and streaks are kept for the game log
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        content = {'stats': [{'type': {'displayName': 'gameLog'}, 'splits': self.games[::-1]},
+                             {'type': {'displayName': 'yearByYear'}, 'splits': [{'season': 1}]}]}
+        self.aggregator.add_stats(8471214, content)
+        rollup = self.aggregator.get_rollup(8471214)
+        self.assertEqual(rollup.games, 4)
+        self.assertEqual(rollup.totals['points'], 6)
+        self.assertEqual(rollup.window_totals['points'], 3)
+        self.assertAlmostEqual(rollup.per_60('points'), 6 * 3600.0 / (65 * 60))
+        self.assertEqual(rollup.streaks['point'], 1)
+        self.assertEqual(rollup.longest['point'], 2)
+        self.assertEqual(self.aggregator.get_splits(8471214, 'yearByYear'), [{'season': 1}])
+
+    def test_04_incremental_game_log(self):
+        """
+        Only new games are added, and late games rebuild the rollups in order
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        self.assertEqual(self.aggregator.add_game_log(1, self.games[:2]), 2)
+        self.assertEqual(self.aggregator.add_game_log(1, self.games[:3]), 1)
+        self.assertEqual(self.aggregator.add_game_log(1, self.games[:3]), 0)
+        self.assertEqual(self.aggregator.get_rollup(1).streaks['point'], 0)
+        self.aggregator.add_game_log(2, [self.games[0], self.games[3]])
+        self.aggregator.add_game_log(2, [self.games[2]])
+        rollup = self.aggregator.get_rollup(2)
+        self.assertEqual(rollup.games, 3)
+        self.assertEqual(rollup.streaks['point'], 1)
+        self.assertEqual(rollup.window_totals['points'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+""" unit tests for columnar.py """
+
+import os
+import unittest
+import tempfile
+import columnar
+
+
+def make_boxscore(game_pk, goals):
+    """ build a payload with a nested team and a list of periods """
+    return {'gamePk': game_pk, 'teams': {'away': {'goals': goals, 'name': 'Oilers'},
+                                         'home': {'goals': None, 'pp': 0.25}},
+            'periods': [{'num': 1, 'shots': 10}, {'num': 2, 'shots': 12}]}
+
+
+@unittest.skipIf(columnar.pyarrow is None, 'pyarrow is not installed')
+class Unit01ColumnarWriterTests(unittest.TestCase):
+    """
+    Unit Tests for the ColumnarWriter class
+    """
+    def setUp(self):
+        """Fixture that creates a directory for the unit tests to write to."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Fixture that removes the files written by the unit tests."""
+        self.tmpdir.cleanup()
+
+    def test_01_typed_columns_in_row_groups(self):
+        """
+        Every field path is a typed column and rows are written in row groups
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        filename = os.path.join(self.tmpdir.name, 'box.parquet')
+        rows = columnar.write_columnar(filename, (make_boxscore(pk, pk % 4) for pk in range(10)),
+                                       row_group_size=4)
+        self.assertEqual(rows, 10)
+        table = columnar.read_columnar(filename)
+        self.assertEqual(table.num_rows, 10)
+        self.assertEqual(str(table.schema.field('gamePk').type), 'int64')
+        self.assertEqual(str(table.schema.field('teams.home.pp').type), 'double')
+        self.assertEqual(table.column('teams.away.goals').to_pylist()[:5], [0, 1, 2, 3, 0])
+        self.assertEqual(table.column('periods[1]shots').to_pylist()[0], 12)
+        self.assertEqual(columnar.pyarrow.parquet.ParquetFile(filename).num_row_groups, 3)
+
+    def test_02_rows_and_fields_from_markup(self):
+        """
+        A markup path gives one row per list item, with only the requested fields
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        filename = os.path.join(self.tmpdir.name, 'periods.feather')
+        rows = columnar.write_columnar(filename, [make_boxscore(1, 3), make_boxscore(2, 1)],
+                                       markup='periods', fields=['num', 'shots', 'missing'],
+                                       file_format='feather')
+        self.assertEqual(rows, 4)
+        table = columnar.read_columnar(filename)
+        self.assertEqual(table.column_names, ['num', 'shots', 'missing'])
+        self.assertEqual(table.column('num').to_pylist(), [1, 2, 1, 2])
+        self.assertEqual(table.column('missing').null_count, 4)
+
+    def test_03_types_settled_over_row_groups(self):
+        """
+        A column that starts with a run of nulls, then holds ints and floats, takes
+        its type from every row group, and fields found later are kept
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        filename = os.path.join(self.tmpdir.name, 'late.parquet')
+        rows = columnar.write_columnar(filename, [{'a': None}, {'a': None}, {'a': 5},
+                                                  {'a': 2.5, 'b': 'x'}, {'a': None}],
+                                       row_group_size=2)
+        self.assertEqual(rows, 5)
+        table = columnar.read_columnar(filename)
+        self.assertEqual(str(table.schema.field('a').type), 'double')
+        self.assertEqual(table.column('a').to_pylist(), [None, None, 5.0, 2.5, None])
+        self.assertEqual(table.column('b').to_pylist(), [None, None, None, 'x', None])
+        self.assertEqual(columnar.pyarrow.parquet.ParquetFile(filename).num_row_groups, 3)
+        self.assertEqual(os.listdir(self.tmpdir.name), ['late.parquet'])
+
+    def test_04_explicit_schema(self):
+        """
+        With an explicit schema the rows are written as the given types
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        filename = os.path.join(self.tmpdir.name, 'schema.parquet')
+        columnar.write_columnar(filename, [{'a': None}, {'a': 5}],
+                                schema={'a': columnar.pyarrow.float32()}, row_group_size=1)
+        table = columnar.read_columnar(filename)
+        self.assertEqual(str(table.schema.field('a').type), 'float')
+        self.assertEqual(table.column('a').to_pylist(), [None, 5.0])
+        with self.assertRaises(ValueError):
+            columnar.write_columnar(filename, [{'a': 1}, {'a': 'x'}], row_group_size=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+""" unit tests for game.py """
+
+import unittest
+import unittest.mock
+import game
+
+
+def make_play(index, event='SHOT'):
+    """ build a play from the live feed """
+    return {'result': {'eventTypeId': event},
+            'about': {'eventIdx': index, 'period': 1, 'periodTime': '00:{:02d}'.format(index)},
+            'coordinates': {'x': 60.0 + index, 'y': -10.0},
+            'team': {'id': 22},
+            'players': [{'player': {'id': 8478402}, 'playerType': 'Shooter'}]}
+
+
+class Unit01PlayTests(unittest.TestCase):
+    """
+    Unit Tests for the Game play stream
+    """
+    def setUp(self):
+        """Fixture that creates the live feed for the unit tests to use."""
+        self.plays = [make_play(0, 'FACEOFF'), make_play(1), make_play(2, 'GOAL')]
+        self.game = game.Game(2018020131, content={'liveData': {'plays': {
+            'allPlays': self.plays}}})
+
+    def test_01_play_events(self):
+        """
+        Plays are yielded as compact events
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        events = list(self.game.iter_plays())
+        self.assertEqual([event.event for event in events], ['FACEOFF', 'SHOT', 'GOAL'])
+        self.assertEqual(events[1], game.PlayEvent(1, 'SHOT', 1, '00:01', 61.0, -10.0, 22,
+                                                   ((8478402, 'Shooter'),)))
+
+    def test_02_cursor_yields_only_new_plays(self):
+        """
+        The cursor remembers the last play so only new plays are yielded
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        for _ in self.game.iter_plays():
+            break
+        self.assertEqual(self.game.play_cursor, 1)
+        self.assertEqual([event.index for event in self.game.iter_plays()], [1, 2])
+        self.assertEqual(list(self.game.iter_plays()), [])
+        self.plays.append(make_play(3))
+        self.assertEqual([event.index for event in self.game.iter_plays()], [3])
+        self.assertEqual([event.index for event in self.game.iter_plays(since=2)], [2, 3])
+
+    def test_03_poll_applies_changes(self):
+        """
+        Polling fetches only the changes since the feed's timestamp and applies them
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        self.game.content['metaData'] = {'timeStamp': '20181026_230000'}
+        list(self.game.iter_plays())
+        full_feed = {'metaData': {'timeStamp': '20181026_232000'}, 'liveData': {'plays': {
+            'allPlays': [make_play(index) for index in range(5)]}}}
+        responses = [[{'diff': [
+            {'op': 'replace', 'path': '/metaData/timeStamp', 'value': '20181026_231500'},
+            {'op': 'add', 'path': '/liveData/plays/allPlays/-', 'value': make_play(3)}]}],
+            [], [{'diff': [{'op': 'remove', 'path': '/liveData/plays/allPlays/9'}]}], full_feed]
+        with unittest.mock.patch('game.get_json_data', side_effect=responses) as get_json_data:
+            self.assertEqual([event.index for event in self.game.poll_plays()], [3])
+            self.assertEqual(list(self.game.poll_plays()), [])
+            with self.assertLogs(level='WARNING'):
+                self.assertEqual([event.index for event in self.game.poll_plays()], [4])
+        urls = [call[0][0] for call in get_json_data.call_args_list]
+        self.assertTrue(urls[0].endswith(
+            'game/2018020131/feed/live/diffPatch?startTimecode=20181026_230000'))
+        self.assertTrue(urls[1].endswith('?startTimecode=20181026_231500'))
+        self.assertTrue(urls[3].endswith('game/2018020131/feed/live'))
+
+    def test_04_json_patch(self):
+        """
+        The JSON Patch operations of the diffs are applied in place
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        obj = {'a': [1, 2], 'b': {'c/d': 3}}
+        game.apply_json_patch(obj, [{'op': 'add', 'path': '/a/0', 'value': 0},
+                                    {'op': 'move', 'from': '/b/c~1d', 'path': '/e'},
+                                    {'op': 'copy', 'from': '/a', 'path': '/b/f'},
+                                    {'op': 'remove', 'path': '/a/1'},
+                                    {'op': 'test', 'path': '/e', 'value': 3}])
+        self.assertEqual(obj, {'a': [0, 2], 'b': {'f': [0, 1, 2]}, 'e': 3})
+        with self.assertRaises(ValueError):
+            game.apply_json_patch(obj, [{'op': 'test', 'path': '/e', 'value': 4}])
+
+    def test_05_urls_from_the_game_url(self):
+        """
+        Extra stats urls are built under the game url given to the constructor
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        entity = game.Game(2018020131, url='http://localhost:8080/api/v1/game/2018020131/linescore',
+                           content={})
+        self.assertEqual(entity.get_ext_url(game.Game.STATS['boxScore']),
+                         'http://localhost:8080/api/v1/game/2018020131/boxscore')
+        entity = game.Game(2018020131, url='http://localhost:8080/games/2018020131', content={})
+        self.assertEqual(entity.get_ext_url(game.Game.STATS['liveDiffTime'], diff_time='x'),
+                         'http://localhost:8080/games/2018020131/feed/live/diffPatch?'
+                         'startTimecode=x')
+        with self.assertRaises(ValueError):
+            entity.get_ext_url(game.Game.STATS['boxScore'], game.Game.STATS['live'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+""" unit tests for gateway.py """
+
+import json
+import time
+import threading
+import unittest
+import http.server
+import urllib.request
+import cache
+import gateway
+import transport
+
+
+class SlowHandler(http.server.BaseHTTPRequestHandler):
+    """ serve a json document counting the requests for each path, slowly """
+    protocol_version = 'HTTP/1.1'
+    requests = {}
+
+    def do_GET(self):
+        """ handle a GET request """
+        count = SlowHandler.requests[self.path] = SlowHandler.requests.get(self.path, 0) + 1
+        time.sleep(0.2)
+        body = json.dumps({'path': self.path, 'count': count}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        """ keep the test output quiet """
+
+
+class Unit01GatewayTests(unittest.TestCase):
+    """
+    Unit Tests for the Gateway class and its http server
+    """
+    @classmethod
+    def setUpClass(cls):
+        """Fixture that starts a local upstream server for the unit tests to use."""
+        cls.upstream = http.server.ThreadingHTTPServer(('127.0.0.1', 0), SlowHandler)
+        threading.Thread(target=cls.upstream.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Fixture that stops the local upstream server."""
+        cls.upstream.shutdown()
+        cls.upstream.server_close()
+
+    def setUp(self):
+        """Fixture that creates a gateway to the local upstream server."""
+        SlowHandler.requests = {}
+        self.cache = cache.ResponseCache(ttl=60)
+        self.gateway = gateway.Gateway('http://127.0.0.1:{}'.format(
+            self.upstream.server_address[1]), self.cache, transport.UrllibTransport(), stale=60)
+
+    def tearDown(self):
+        """Fixture that stops the gateway."""
+        self.gateway.close()
+
+    def test_01_concurrent_misses_coalesced(self):
+        """
+        Clients asking for the same url at the same time share one upstream request
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(
+            self.gateway.get('/api/v1/teams'))) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(SlowHandler.requests, {'/api/v1/teams': 1})
+        self.assertEqual(set(json.loads(body)['count'] for _, body, _, _ in results), {1})
+        self.assertEqual(self.gateway.get('/api/v1/teams')[3], 'HIT')
+
+    def test_02_stale_while_revalidate(self):
+        """
+        An expired entry is served at once while one background request refreshes it
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        url = self.gateway.get_url('/api/v1/schedule')
+        self.cache.put(url, b'{"count": 0}', 'utf-8', fetched_at=time.time() - 90)
+        started = time.time()
+        for _ in range(3):
+            status, body, _, state = self.gateway.get('/api/v1/schedule')
+            self.assertEqual((status, body, state), (200, b'{"count": 0}', 'STALE'))
+        self.assertLess(time.time() - started, 0.2)
+        time.sleep(0.4)
+        _, body, _, state = self.gateway.get('/api/v1/schedule')
+        self.assertEqual((json.loads(body)['count'], state), (1, 'HIT'))
+        self.assertEqual(SlowHandler.requests, {'/api/v1/schedule': 1})
+
+    def test_03_http_server(self):
+        """
+        The http server serves the api url space and the gateway stats
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        server = gateway.serve(self.gateway, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = 'http://127.0.0.1:{}'.format(server.server_address[1])
+        try:
+            for state in ('MISS', 'HIT'):
+                with urllib.request.urlopen(base_url + '/api/v1/game/1/linescore') as response:
+                    self.assertEqual(response.headers['X-Cache'], state)
+                    self.assertEqual(json.loads(response.read())['count'], 1)
+            with urllib.request.urlopen(base_url + gateway.STATS_PATH) as response:
+                stats = json.loads(response.read())
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertEqual((stats['requests']['MISS'], stats['requests']['HIT']), (1, 1))
+
+    def test_04_concurrent_hits_counted(self):
+        """
+        Requests served from many threads at once are all counted in the stats
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        self.cache.put(self.gateway.get_url('/api/v1/teams'), b'{"count": 0}', 'utf-8')
+
+        def get_many():
+            for _ in range(2000):
+                self.gateway.get('/api/v1/teams')
+
+        threads = [threading.Thread(target=get_many) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.gateway.stats()['requests'], {'HIT': 16000})
+        self.assertEqual(SlowHandler.requests, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+""" unit tests for heatmap.py """
+
+import unittest
+import heatmap
+
+
+def make_feed(game_pk, plays, teams=None):
+    """
+    build a live feed from (event, x, y, team, shooter) tuples, with a one period
+    linescore when teams is a tuple of the home and away (team id, rinkSide)
+    """
+    feed = {'gamePk': game_pk, 'liveData': {'plays': {'allPlays': [
+        {'result': {'eventTypeId': event}, 'about': {'period': 1, 'periodTime': '00:00'},
+         'coordinates': {} if x is None else {'x': x, 'y': y}, 'team': {'id': team},
+         'players': [{'player': {'id': 1}, 'playerType': 'Blocker'},
+                     {'player': {'id': shooter}, 'playerType': 'Shooter'}]}
+        for event, x, y, team, shooter in plays]}}}
+    if teams:
+        feed['gameData'] = {'teams': {side: {'id': team_id}
+                                      for side, (team_id, _) in zip(('home', 'away'), teams)}}
+        feed['liveData']['linescore'] = {'periods': [
+            {'num': 1, 'home': {'rinkSide': teams[0][1]}, 'away': {'rinkSide': teams[1][1]}}]}
+    return feed
+
+
+@unittest.skipIf(heatmap.numpy is None, 'numpy is not installed')
+class Unit01ShotIndexTests(unittest.TestCase):
+    """
+    Unit Tests for the ShotIndex class
+    """
+    def setUp(self):
+        """Fixture that builds the index for the unit tests to use."""
+        self.index = heatmap.ShotIndex(bins=(4, 2))
+        self.index.add_game(make_feed(1, [('SHOT', 80.0, 10.0, 22, 97),
+                                          ('GOAL', -80.0, 10.0, 22, 97),
+                                          ('FACEOFF', 0.0, 0.0, 22, 97),
+                                          ('SHOT', None, None, 22, 97),
+                                          ('SHOT', -70.0, 20.0, 9, 55)],
+                                      teams=((22, 'left'), (9, 'right'))))
+        self.index.add_game(make_feed(2, [('MISSED_SHOT', 10.0, -30.0, 6, 88),
+                                          ('SHOT', -40.0, 20.0, 6, 88)]))
+
+    def test_01_index_shots(self):
+        """
+        Only shot events with coordinates are indexed, credited to the shooter
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        self.index.build()
+        self.assertEqual(len(self.index), 5)
+        self.assertEqual(sorted(self.index.groups['player']), [55, 88, 97])
+        self.assertEqual(len(self.index.rows(player=97)), 2)
+        self.assertEqual(len(self.index.rows(team=6, event='SHOT')), 1)
+        self.assertEqual(len(self.index.rows(event='BLOCKED_SHOT')), 0)
+
+    def test_02_heatmaps(self):
+        """
+        Heatmaps are normalized to the attacking direction of each team
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        grid = self.index.heatmap(player=97)
+        self.assertEqual(grid.shape, (4, 2))
+        self.assertEqual((grid[0].tolist(), grid[3].tolist()), ([0, 1], [0, 1]))
+        self.assertEqual(self.index.heatmap(player=55)[3].tolist(), [1, 0])
+        keys, grids = self.index.heatmaps(by='team')
+        self.assertEqual(keys.tolist(), [6, 9, 22])
+        self.assertEqual(grids.sum(axis=(1, 2)).tolist(), [2, 1, 2])
+        keys, grids = self.index.heatmaps(by='event')
+        self.assertEqual(keys.tolist(), ['SHOT', 'GOAL', 'MISSED_SHOT'])
+
+    def test_03_zone_counts(self):
+        """
+        Shots are counted per zone of the shooting team, including its defensive zone
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        self.assertEqual(self.index.zone_counts(),
+                         {'defensive': 2, 'neutral': 1, 'offensive': 2})
+        self.assertEqual(self.index.zone_counts(team=22),
+                         {'defensive': 1, 'neutral': 0, 'offensive': 1})
+        self.assertEqual(self.index.zone_counts(team=9),
+                         {'defensive': 0, 'neutral': 0, 'offensive': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
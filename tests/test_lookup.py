@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+""" unit tests for lookup.py """
+
+import os
+import tempfile
+import unittest
+import lookup
+
+
+class Unit01LookupTests(unittest.TestCase):
+    """
+    Unit Tests for the LookupIndex class
+    """
+    def setUp(self):
+        """Fixture that builds the index for the unit tests to use."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.index = lookup.LookupIndex()
+        self.index.add_teams({'teams': [
+            {'id': 22, 'name': 'Edmonton Oilers', 'abbreviation': 'EDM', 'teamName': 'Oilers',
+             'roster': {'roster': [{'person': {'id': 8478402, 'fullName': 'Connor McDavid'}},
+                                   {'person': {'id': 8477934, 'fullName': 'Leon Draisaitl'}}]}},
+            {'id': 6, 'name': 'Boston Bruins', 'abbreviation': 'BOS', 'teamName': 'Bruins',
+             'roster': {'roster': [{'person': {'id': 8477956, 'fullName': 'David Pastrňák'}}]}}]})
+        self.index.add_people({'people': [{'id': 8447400, 'fullName': 'Wayne Gretzky'}]})
+
+    def tearDown(self):
+        """Fixture that removes the test data used by the unit tests."""
+        self.tmpdir.cleanup()
+
+    def test_01_ids_and_names(self):
+        """
+        Players and teams resolve both ways
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        self.assertEqual(self.index.get_player_ids('connor mcdavid'), [8478402])
+        self.assertEqual(self.index.get_player_ids('David Pastrnak'), [8477956])
+        self.assertEqual(self.index.get_player_name(8447400), 'Wayne Gretzky')
+        self.assertEqual(self.index.get_team_id('edm'), 22)
+        self.assertEqual(self.index.get_team_id('Bruins'), 6)
+        self.assertEqual(self.index.get_team(22)['abbreviation'], 'EDM')
+        self.assertEqual(self.index.player_teams[8477934], 22)
+
+    def test_02_prefix_and_fuzzy_search(self):
+        """
+        Players are found by the start of any name and by close spellings
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        self.assertEqual(self.index.search_players('mcda'), [(8478402, 'Connor McDavid')])
+        self.assertEqual(self.index.search_players('leon d'), [(8477934, 'Leon Draisaitl')])
+        self.assertEqual(self.index.search_players('zz'), [])
+        self.assertEqual(self.index.fuzzy_players('Wayne Gretsky'), [(8447400, 'Wayne Gretzky')])
+
+    def test_03_save_and_load(self):
+        """
+        The index is the same after saving and loading it
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        filename = os.path.join(self.tmpdir.name, 'lookup.json')
+        self.index.save(filename)
+        loaded = lookup.LookupIndex(filename)
+        self.assertEqual(loaded.players, self.index.players)
+        self.assertEqual(loaded.teams, self.index.teams)
+        self.assertEqual(loaded.search_players('drai'), [(8477934, 'Leon Draisaitl')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+""" unit tests for nhlapi.py """
+
+import os
+import unittest
+import nhlapi
+
+
+class Unit01DecoderTests(unittest.TestCase):
+    """
+    Unit Tests for the json decoder selection
+    """
+    def setUp(self):
+        """Fixture that remembers the decoder in use."""
+        self.orig = nhlapi.get_json_decoder()
+
+    def tearDown(self):
+        """Fixture that restores the decoder in use."""
+        nhlapi.set_json_decoder(self.orig)
+
+    def test_01_stdlib_always_available(self):
+        """
+        The stdlib decoder is always registered as the fallback
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        self.assertIn('json', nhlapi.JSON_DECODERS)
+        self.assertEqual(nhlapi.set_json_decoder('json'), 'json')
+        self.assertEqual(nhlapi.get_json_decoder(), 'json')
+
+    def test_02_decode_bytes_with_every_decoder(self):
+        """
+        Every available decoder decodes raw bytes to the same result
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        raw_data = '{"teams": [{"id": 22, "name": "Edmonton Oilers", "abbr": "EDM"}]}'
+        for name in nhlapi.JSON_DECODERS:
+            nhlapi.set_json_decoder(name)
+            obj = nhlapi.decode_json(raw_data.encode('utf-8'))
+            self.assertEqual(obj['teams'][0]['id'], 22)
+
+    def test_03_decode_other_charset(self):
+        """
+        Payloads in a charset other than utf-8 are decoded to text first
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        raw_data = '{"name": "Montréal"}'.encode('latin-1')
+        self.assertEqual(nhlapi.decode_json(raw_data, 'ISO-8859-1')['name'], 'Montréal')
+
+    def test_04_unknown_decoder(self):
+        """
+        Selecting a decoder that is not installed is an error
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        with self.assertRaises(ValueError):
+            nhlapi.set_json_decoder('no-such-decoder')
+
+    def test_05_register_decoder(self):
+        """
+        A custom decoder can be registered and selected
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        nhlapi.register_json_decoder('custom', lambda raw_data: {'custom': True})
+        try:
+            nhlapi.set_json_decoder('custom')
+            self.assertEqual(nhlapi.decode_json(b'{}'), {'custom': True})
+        finally:
+            del nhlapi.JSON_DECODERS['custom']
+
+    def test_06_unknown_decoder_in_environment(self):
+        """
+        A NHLAPI_JSON_DECODER that is not installed falls back to the fastest decoder
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        orig_env = os.environ.get('NHLAPI_JSON_DECODER')
+        os.environ['NHLAPI_JSON_DECODER'] = 'no-such-decoder'
+        try:
+            with self.assertLogs(level='WARNING'):
+                name = nhlapi._set_default_json_decoder()
+        finally:
+            if orig_env is None:
+                del os.environ['NHLAPI_JSON_DECODER']
+            else:
+                os.environ['NHLAPI_JSON_DECODER'] = orig_env
+        self.assertEqual(name, next(dec for dec in nhlapi.DECODER_PREFERENCE
+                                    if dec in nhlapi.JSON_DECODERS))
+        self.assertEqual(nhlapi.get_json_decoder(), name)
+
+    def test_07_utf8_spellings_not_decoded(self):
+        """
+        Every spelling of the utf-8 charset passes the raw bytes straight to the decoder
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        nhlapi.register_json_decoder('bytes-only', lambda raw_data: isinstance(raw_data, bytes))
+        try:
+            nhlapi.set_json_decoder('bytes-only')
+            for charset in ('utf-8', 'UTF-8', 'utf8', 'UTF8', 'utf_8', 'U8'):
+                self.assertTrue(nhlapi.decode_json(b'{}', charset), charset)
+            self.assertFalse(nhlapi.decode_json(b'{}', 'ISO-8859-1'))
+        finally:
+            del nhlapi.JSON_DECODERS['bytes-only']
+
+
+if __name__ == '__main__':
+    unittest.main()
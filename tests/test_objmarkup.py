@@ -5,6 +5,8 @@ import unittest
 import os
 import sys
 import json
+import tempfile
+import unittest.mock
 import urllib.request
 import objmarkup
 
@@ -310,6 +312,353 @@ class Unit02JsonMarkupTests(unittest.TestCase):
         objmarkup.parse_args()
         sys.argv = self.orig
 
+    def test_09_typed_table(self):
+        """
+        The table keeps native values and the typed CSV quotes only when needed
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        obj = {'skaters': [{'goals': 2, 'toi': 20.5, 'name': 'Doe, John', 'captain': True},
+                           {'goals': 0, 'toi': None, 'name': 'Roe', 'captain': False}]}
+        self.parser = objmarkup.JsonMarkup(obj)
+        headings, rows = self.parser.get_table(obj['skaters'])
+        self.assertEqual(headings, ['goals', 'toi', 'name', 'captain'])
+        self.assertEqual(rows[0], [2, 20.5, 'Doe, John', True])
+        self.assertEqual(self.parser.get_typed_csv(obj['skaters']),
+                         'goals,toi,name,captain\n2,20.5,"Doe, John",true\n0,,Roe,false\n')
+
+    def test_10_csv_skips_none(self):
+        """
+        The untyped fields and CSV leave out None values, the typed table keeps them
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        obj = {'goals': 2, 'toi': None, 'name': 'Doe'}
+        self.parser = objmarkup.JsonMarkup(obj)
+        self.parser.gen_csv(obj)
+        self.assertEqual(self.parser.csv_fields, ['goals', 'name'])
+        self.assertEqual(self.parser.get_pairs(obj, keep_none=False),
+                         [('goals', 2), ('name', 'Doe')])
+        self.assertEqual(len(self.parser.get_csv([obj])[0].split(',')), 2)
+        self.assertEqual(self.parser.get_table([obj]),
+                         (['goals', 'toi', 'name'], [[2, None, 'Doe']]))
+
+    def test_11_cli_typed_values(self):
+        """
+        Typed values are written as one json object per input object
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            outname = os.path.join(tmpdir, 'values.out')
+            sys.argv = ['./objmarkup.py', '-f', 'json/sample.json', '-m', 'company[0].employees',
+                        '--values', '--typed', '-o', outname]
+            try:
+                objmarkup.parse_args()
+            finally:
+                sys.argv = self.orig
+            with open(outname) as filein:
+                values = json.loads(filein.read())
+        self.assertEqual(values['[1]hobby[0]name'], 'Counting money')
+
+
+class Unit03JsonFileTests(unittest.TestCase):
+    """
+    Unit Tests for reading json and ndjson files
+    """
+    def setUp(self):
+        """Fixture that writes an ndjson file for the unit tests to use."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmpdir.name, 'games.ndjson')
+        with open(self.filename, 'w') as fileout:
+            fileout.write('{"gamePk": 2018020131, "teams": ["away", "home"]}\n')
+            fileout.write('\n')
+            fileout.write('{"gamePk": 2018020132, "teams": ["away", "home"]}\n')
+
+    def tearDown(self):
+        """Fixture that removes the test data used by the unit tests."""
+        self.tmpdir.cleanup()
+
+    def test_01_load_json_file(self):
+        """
+        Load a single json object from a memory-mapped file
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        obj = objmarkup.load_json_file(os.getcwd() + '/json/sample.json')
+        self.assertEqual(obj['company'][0]['name'], 'Slate Rock and Gravel Company')
+
+    def test_02_iter_ndjson_file(self):
+        """
+        Read each record of an ndjson file, skipping blank lines
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        objs = list(objmarkup.iter_json_file(self.filename, ndjson=True))
+        self.assertEqual([obj['gamePk'] for obj in objs], [2018020131, 2018020132])
+
+    def test_03_empty_file(self):
+        """
+        An empty file has no objects
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        filename = os.path.join(self.tmpdir.name, 'empty.json')
+        open(filename, 'w').close()
+        self.assertIsNone(objmarkup.load_json_file(filename))
+
+    def test_04_batch_output_in_file_order(self):
+        """
+        Batch mode over a directory merges the results in file order
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        for index in range(6):
+            filename = os.path.join(self.tmpdir.name, 'game{}.json'.format(index))
+            with open(filename, 'w') as fileout:
+                fileout.write('{{"gamePk": {}}}'.format(index))
+        outname = os.path.join(self.tmpdir.name, 'batch.out')
+        orig = sys.argv
+        sys.argv = ['./objmarkup.py', '-B', os.path.join(self.tmpdir.name, 'game*.json'),
+                    '-J', '2', '-v', '-o', outname]
+        try:
+            objmarkup.parse_args()
+        finally:
+            sys.argv = orig
+        with open(outname) as filein:
+            lines = filein.read().split()
+        self.assertEqual(lines[2::3], [str(index) for index in range(6)])
+
+    def test_05_batch_outdir_keeps_paths(self):
+        """
+        Batch mode with an output directory keeps the relative path of each input,
+        and a file failing in any way fails only that file
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        for index, dirname in enumerate(('a', 'b', 'c')):
+            os.makedirs(os.path.join(self.tmpdir.name, 'in', dirname))
+            with open(os.path.join(self.tmpdir.name, 'in', dirname, 'game.json'), 'w') as fileout:
+                fileout.write('{{"gamePk": {}}}'.format(index))
+        outdir = os.path.join(self.tmpdir.name, 'out')
+        os.makedirs(outdir)
+        process_args_obj = objmarkup.process_args_obj
+
+        def _process(args, obj):
+            if obj['gamePk'] == 2:
+                raise RuntimeError('unexpected')
+            process_args_obj(args, obj)
+
+        orig = sys.argv
+        sys.argv = ['./objmarkup.py', '-B', os.path.join(self.tmpdir.name, 'in', '*', '*.json'),
+                    '-B', os.path.join(self.tmpdir.name, 'in', 'a'), '-J', '1', '-v',
+                    '-d', outdir]
+        try:
+            with unittest.mock.patch('objmarkup.process_args_obj', side_effect=_process), \
+                    self.assertLogs(level='ERROR'):
+                objmarkup.parse_args()
+        finally:
+            sys.argv = orig
+        for index, dirname in enumerate(('a', 'b')):
+            with open(os.path.join(outdir, dirname, 'game.json.out')) as filein:
+                self.assertEqual(filein.read().split()[2], str(index))
+        self.assertFalse(os.path.exists(os.path.join(outdir, 'c')))
+
+    def test_06_pipeline_rows(self):
+        """
+        A pipeline evaluates every path per object and fills in missing values
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        pipeline = objmarkup.MarkupPipeline(['gamePk', 'teams[1]', 'venue.name'], missing='-')
+        rows = list(pipeline.run_file(self.filename, ndjson=True))
+        self.assertEqual(rows, [[2018020131, 'home', '-'], [2018020132, 'home', '-']])
+
+    def test_07_pipeline_workers_keep_order(self):
+        """
+        A pipeline spread over worker processes yields its rows in input order
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        lines = ['{{"gamePk": {}, "teams": [{}, {}]}}'.format(index, index, -index).encode()
+                 for index in range(50)]
+        pipeline = objmarkup.MarkupPipeline(['gamePk', 'teams[1]'], workers=2, chunk_size=7,
+                                            max_pending=2)
+        self.assertEqual(list(pipeline.run(lines)),
+                         [[index, -index] for index in range(50)])
+
+
+class Unit04BuildTests(unittest.TestCase):
+    """
+    Unit Tests for building objects from markup paths and values
+    """
+    def setUp(self):
+        """Fixture that loads the test data for the unit tests to use."""
+        self.obj = objmarkup.load_json_file(os.getcwd() + '/json/sample.json')
+
+    def test_01_round_trip_values(self):
+        """
+        The paths and values of an object build the same object
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        parser = objmarkup.JsonMarkup(self.obj)
+        parser.gen_csv(self.obj)
+        pairs = [(field, parser(field)) for field in parser.csv_fields]
+        self.assertEqual(objmarkup.ObjMarkup.build(pairs), self.obj)
+
+    def test_02_build_lists_and_rows(self):
+        """
+        Paths beginning with an index build a list, and missing items are None
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        built = objmarkup.ObjMarkup.build([('[2]name', 'b'), ('[0]name', 'a')])
+        self.assertEqual(built, [{'name': 'a'}, None, {'name': 'b'}])
+        rows = list(objmarkup.ObjMarkup.build_rows(['id', 'stats/goals'], [[1, 3], [2, 0]],
+                                                   sep='/'))
+        self.assertEqual(rows, [{'id': 1, 'stats': {'goals': 3}},
+                                {'id': 2, 'stats': {'goals': 0}}])
+
+    def test_03_build_conflicts(self):
+        """
+        Paths that disagree on the type of a container are an error
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        with self.assertRaises(ValueError):
+            objmarkup.ObjMarkup.build([('team.id', 1), ('team[0]', 2)])
+        with self.assertRaises(ValueError):
+            objmarkup.ObjMarkup.build([('team[x]', 1)])
+
+
+class Unit05ProfilerTests(unittest.TestCase):
+    """
+    Unit Tests for profiling the markup operations
+    """
+    def setUp(self):
+        """Fixture that loads the test data and starts profiling for the unit tests."""
+        self.obj = objmarkup.load_json_file(os.getcwd() + '/json/sample.json')
+        self.events = []
+        self.profiler = objmarkup.MarkupProfiler(
+            lambda phase, seconds, path: self.events.append((phase, path)))
+        objmarkup.compile_markup.cache_clear()
+        objmarkup.tokenize_markup.cache_clear()
+        objmarkup.set_markup_profiler(self.profiler)
+
+    def tearDown(self):
+        """Fixture that stops profiling."""
+        objmarkup.set_markup_profiler(None)
+
+    def test_01_phases_and_paths(self):
+        """
+        Every phase of a csv export and every evaluated path is timed
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        parser = objmarkup.JsonMarkup(self.obj)
+        parser.get_csv()
+        for _ in range(3):
+            parser('company[0]name')
+        summary = self.profiler.summary()
+        self.assertEqual(set(summary['phases']),
+                         {'traverse', 'headings', 'format', 'compile', 'evaluate'})
+        self.assertEqual(summary['phases']['evaluate']['calls'], 3)
+        self.assertEqual(summary['phases']['compile']['calls'], 1)
+        self.assertGreater(summary['counts']['regexSearches'], 0)
+        self.assertIn(('evaluate', 'company[0]name'), self.events)
+        self.assertEqual(self.profiler.paths[('evaluate', 'company[0]name')][0], 3)
+        self.assertTrue(self.profiler.report()[0].startswith('phase'))
+
+    def test_02_disabled(self):
+        """
+        Nothing is recorded once the profiler is removed
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        self.assertIs(objmarkup.set_markup_profiler(None), self.profiler)
+        self.assertIsNone(objmarkup.get_markup_profiler())
+        objmarkup.JsonMarkup(self.obj).get_csv()
+        self.assertEqual((self.profiler.phases, self.events), ({}, []))
+
+
+class Unit06TokenizerTests(unittest.TestCase):
+    """
+    Unit Tests for the markup tokenizer
+    """
+    def test_01_tokens(self):
+        """
+        A markup string is split into its keys, indexes and separators
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        self.assertEqual(objmarkup.tokenize_markup('a[0][1:2]job title.b'),
+                         (('key', 'a'), ('index', '0'), ('index', '1:2'),
+                          ('key', 'job title'), ('sep', '.'), ('key', 'b')))
+        self.assertEqual(objmarkup.tokenize_markup('a/b[0]', '/'),
+                         (('key', 'a'), ('sep', '/'), ('key', 'b'), ('index', '0')))
+        for path in ('a[0', 'a]b'):
+            with self.assertRaises(ValueError):
+                objmarkup.tokenize_markup(path)
+
+    def test_02_shared_grammar(self):
+        """
+        Parsing, compiling and building agree on short labels and long paths
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        obj = {'a': [{'b': 1}, {'b': [2, 3]}]}
+        parser = objmarkup.ObjMarkup(obj)
+        self.assertEqual(parser('a[1]b[1]'), 3)
+        self.assertEqual(objmarkup.split_markup('a[1]b[1]'), ('a', 1, 'b', 1))
+        builder = objmarkup.ObjMarkup({})
+        self.assertEqual(builder.markup_to_obj('a.b.c', builder.token),
+                         {'a': {'b': {'c': None}}})
+
+        path = ''.join('k{}[0]'.format(index) for index in range(2000)) + 'name'
+        deep = {'name': 'end'}
+        for index in reversed(range(2000)):
+            deep = {'k{}'.format(index): [deep]}
+        self.assertEqual(objmarkup.compile_markup(path)(deep), 'end')
+
+    def test_03_slices_and_expressions(self):
+        """
+        Negative indexes, slice steps and index expressions work as in Python
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        plays = [{'num': num, 'period': num // 3 + 1} for num in range(9)]
+        parser = objmarkup.ObjMarkup({'plays': plays})
+        self.assertEqual(parser('plays[-1]num'), 8)
+        self.assertEqual(parser('plays[-3:]'), plays[-3:])
+        self.assertEqual(parser('plays[::2]'), plays[::2])
+        self.assertEqual(parser('plays[1:7:3]'), plays[1:7:3])
+        self.assertEqual(parser('plays[::-4]num'), [{'num': 8}, {'num': 4}, {'num': 0}])
+        self.assertEqual(parser('plays[(2 * 3) - 1]period'), 2)
+        self.assertEqual(parser('plays[-(10 % 4)]num'), 7)
+        self.assertEqual(objmarkup.compile_markup('plays[-2:]').steps[0].slice, slice(-2, None))
+        for path in ('plays[::0]', 'plays[1.5]', 'plays[x]', 'plays[1:2:3:4]', 'plays[2**8]'):
+            with self.assertRaises(ValueError):
+                parser(path)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+""" unit tests for planner.py """
+
+import unittest
+import unittest.mock
+import planner
+from game import Game
+from team import Team
+from people import People
+
+
+class Unit01PlannerTests(unittest.TestCase):
+    """
+    Unit Tests for the request planner
+    """
+    def test_01_plan_team_expands(self):
+        """
+        Team expands are merged into one request, the plain url is kept apart
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        team = Team(None, content={})
+        plan = planner.plan_requests(team, 'teamRoster', Team.STATS['teams'], 'teamStats',
+                                     'teamRoster')
+        self.assertEqual(plan, [('teams',), ('teamRoster', 'teamStats')])
+
+    def test_02_plan_game_endpoints(self):
+        """
+        Game modifiers are separate endpoints and are never merged
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        game = Game(2018020131, content={})
+        self.assertEqual(planner.plan_requests(game, 'boxScore', 'live'),
+                         [('boxScore',), ('live',)])
+        self.assertTrue(game.get_ext_url(Game.STATS['live']).endswith('game/2018020131/feed/live'))
+
+    def test_03_load_people_views(self):
+        """
+        People stats are fetched in one request and split into a view per stat
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        player = People(8471214, content={})
+        content = {'copyright': 'NHL',
+                   'stats': [{'type': {'displayName': 'yearByYear'}, 'splits': [1]},
+                             {'type': {'displayName': 'gameLog'}, 'splits': [2]}]}
+        with unittest.mock.patch('planner.get_json_data', return_value=content) as fetch:
+            views = planner.load_views(player, 'gameLog', 'yearByYear')
+        self.assertEqual(fetch.call_count, 1)
+        self.assertIn('stats=gameLog&stats=yearByYear', fetch.call_args[0][0])
+        self.assertEqual(views['gameLog']['stats'][0]['splits'], [2])
+        self.assertEqual(player.views['yearByYear']['stats'][0]['splits'], [1])
+        self.assertEqual(player.views['yearByYear']['copyright'], 'NHL')
+
+    def test_04_load_team_views(self):
+        """
+        Each Team view only holds the expand it asked for
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        team = Team(22, content={})
+        content = {'teams': [{'id': 22, 'roster': {'roster': []}, 'teamStats': [{}]}]}
+        with unittest.mock.patch('planner.get_json_data', return_value=content):
+            views = planner.load_views(team, 'teamRoster', 'teamStats')
+        self.assertNotIn('teamStats', views['teamRoster']['teams'][0])
+        self.assertNotIn('roster', views['teamStats']['teams'][0])
+        self.assertEqual(views['teamStats']['teams'][0]['id'], 22)
+
+
+if __name__ == '__main__':
+    unittest.main()
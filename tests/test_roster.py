@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+""" unit tests for roster.py """
+
+import os
+import tempfile
+import unittest
+import roster
+
+
+def make_content(teams):
+    """ build a teams?expand=team.roster response """
+    return {'teams': [{'id': team_id, 'roster': {'roster': [
+        {'person': {'id': person_id, 'fullName': 'Player {}'.format(person_id)},
+         'jerseyNumber': jersey, 'position': {'code': position}}
+        for person_id, position, jersey in players]}} for team_id, players in teams.items()]}
+
+
+class Unit01RosterTests(unittest.TestCase):
+    """
+    Unit Tests for the RosterTracker class
+    """
+    def setUp(self):
+        """Fixture that creates the snapshots for the unit tests to use."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmpdir.name, 'rosters.json')
+        self.before = make_content({22: [(1, 'C', '97'), (2, 'D', '2'), (3, 'L', '13')],
+                                    3: [(4, 'G', '30')]})
+        self.after = make_content({22: [(1, 'C', '97'), (2, 'R', '2'), (5, 'C', '18')],
+                                   3: [(4, 'G', '31'), (3, 'L', '13')]})
+
+    def tearDown(self):
+        """Fixture that removes the test data used by the unit tests."""
+        self.tmpdir.cleanup()
+
+    def test_01_first_snapshot(self):
+        """
+        Every player is added by the first snapshot
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        tracker = roster.RosterTracker()
+        changes = tracker.update(self.before)
+        self.assertEqual(len(changes), 4)
+        self.assertTrue(all(change['change'] == 'added' for change in changes))
+
+    def test_02_only_changes_reported(self):
+        """
+        Only additions, removals, moves and position/jersey changes are reported
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        tracker = roster.RosterTracker(self.filename)
+        tracker.update(self.before)
+        tracker = roster.RosterTracker(self.filename)
+        changes = tracker.update(self.after)
+        found = sorted((change['change'], change['personId']) for change in changes)
+        self.assertEqual(found, [('added', 5), ('jersey', 4), ('moved', 3), ('position', 2)])
+        moved = [change for change in changes if change['change'] == 'moved'][0]
+        self.assertEqual((moved['from'], moved['to']), (22, 3))
+        self.assertEqual(tracker.update(self.after), [])
+
+    def test_03_removed_player(self):
+        """
+        A player no longer on any roster is removed
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        tracker = roster.RosterTracker()
+        tracker.update(self.after)
+        changes = tracker.update(self.before)
+        self.assertIn({'change': 'removed', 'personId': 5, 'teamId': 22, 'name': 'Player 5'},
+                      changes)
+
+
+if __name__ == '__main__':
+    unittest.main()
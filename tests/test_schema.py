@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+""" unit tests for schema.py """
+
+import os
+import tempfile
+import unittest
+import unittest.mock
+import nhlapi
+import schema
+import transport
+
+
+def make_schedule(games, extra=None):
+    """ build a schedule with a number of games, adding an extra field to each game """
+    return {'totalGames': games, 'dates': [{'date': '2018-10-26', 'games': [
+        dict({'gamePk': pk, 'teams': {'away': {'score': 1}, 'home': {'score': 2}}}, **(extra or {}))
+        for pk in range(games)]}]}
+
+
+class Unit01SchemaTrackerTests(unittest.TestCase):
+    """
+    Unit Tests for the schema fingerprints and the SchemaTracker class
+    """
+    def setUp(self):
+        """Fixture that creates the tracker for the unit tests to use."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmpdir.name, 'schema.json')
+        self.tracker = schema.SchemaTracker(self.filename)
+        self.url = 'https://statsapi.web.nhl.com/api/v1/schedule?date=2018-10-26'
+
+    def tearDown(self):
+        """Fixture that removes the test data used by the unit tests."""
+        self.tmpdir.cleanup()
+
+    def test_01_same_shape_same_fingerprint(self):
+        """
+        Payloads differing only in values and list lengths have the same schema
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        small = schema.get_schema(make_schedule(1))
+        large = schema.get_schema(make_schedule(9))
+        self.assertEqual(small, large)
+        self.assertIn('dates[]games[]teams.home.score', small)
+        self.assertEqual(schema.get_fingerprint(small), schema.get_fingerprint(large))
+        self.assertEqual(schema.get_schema_key(self.url + '&expand=schedule.linescore'),
+                         '/api/v1/schedule?date&expand=schedule.linescore')
+
+    def test_02_paths_of_every_list_item(self):
+        """
+        The paths of every list item are merged, with None values as leaves
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        with self.assertNoLogs(level='WARNING'):
+            paths = schema.get_schema({'dates': [{'a': 1}, {'b': 2, 'c': None}]})
+        self.assertEqual(paths, ['dates[]a', 'dates[]b', 'dates[]c'])
+        first = {'games': [{'gamePk': 1}, {'gamePk': 2, 'linescore': {'period': 3}}]}
+        self.assertIsNone(self.tracker.check(self.url, first))
+        self.assertIsNone(self.tracker.check(self.url, {'games': first['games'][::-1]}))
+        self.assertEqual(self.tracker.changes, [])
+
+    def test_03_change_reports_new_and_missing_paths(self):
+        """
+        New paths are reported at once, known paths only once missing a few times in a row
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        self.assertIsNone(self.tracker.check(self.url, make_schedule(2)))
+        self.assertIsNone(self.tracker.check(self.url, make_schedule(5)))
+        changed = make_schedule(2, {'gameType': 'R'})
+        del changed['totalGames']
+        change = self.tracker.check(self.url, changed)
+        self.assertEqual(change, {'key': '/api/v1/schedule?date',
+                                  'added': ['dates[]games[]gameType'], 'removed': []})
+        self.assertIsNone(self.tracker.check(self.url, changed))
+        change = self.tracker.check(self.url, changed)
+        self.assertEqual((change['added'], change['removed']), ([], ['totalGames']))
+
+    def test_04_routine_data_changes(self):
+        """
+        Days without games and optional fields seen before are not schema changes
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        self.tracker.check(self.url, make_schedule(2, {'gameType': 'R'}))
+        self.assertIsNone(self.tracker.check(self.url, {'totalGames': 0, 'dates': []}))
+        self.assertIsNone(self.tracker.check(self.url, make_schedule(3)))
+        self.assertIsNone(self.tracker.check(self.url, make_schedule(1, {'gameType': 'P'})))
+        self.assertEqual(self.tracker.changes, [])
+
+    def test_05_saved_paths_detect_changes(self):
+        """
+        The known paths are kept between runs
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        self.tracker.check('schedule', make_schedule(2))
+        self.tracker.save()
+        tracker = schema.SchemaTracker(self.filename)
+        change = tracker.check('schedule', make_schedule(2, {'venue': {'name': 'Rogers Place'}}))
+        self.assertEqual(change['added'], ['dates[]games[]venue.name'])
+
+    def test_06_check_fetched_responses(self):
+        """
+        Responses fetched by get_json_data are checked when a tracker is set
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        fetcher = unittest.mock.Mock()
+        fetcher.fetch.side_effect = [
+            transport.Response(200, 'OK', {}, b'{"gamePk": 1}', 13),
+            transport.Response(200, 'OK', {}, b'{"gamePk": 2, "status": "Final"}', 32)]
+        nhlapi.set_schema_tracker(self.tracker)
+        try:
+            nhlapi.get_json_data(self.url, fetcher)
+            nhlapi.get_json_data(self.url, fetcher)
+        finally:
+            nhlapi.set_schema_tracker(None)
+        self.assertEqual(len(self.tracker.changes), 1)
+        self.assertEqual(self.tracker.changes[0]['added'], ['status'])
+
+    def test_07_identical_bodies_walked_once(self):
+        """
+        The paths of a response body already seen are not walked again
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        raw_data = b'{"gamePk": 1, "status": "Final"}'
+        with unittest.mock.patch('schema.get_schema', wraps=schema.get_schema) as get_schema:
+            for _ in range(3):
+                self.tracker.check(self.url, nhlapi.decode_json(raw_data), raw_data)
+            self.tracker.check(self.url, {'gamePk': 2})
+        self.assertEqual(get_schema.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
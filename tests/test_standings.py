@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+""" unit tests for standings.py """
+
+import time
+import unittest
+import standings
+
+
+def make_game(game_pk, away, away_score, home, home_score, period=3, shootout=False,
+              state='Final'):
+    """ build a game from a schedule?expand=schedule.linescore response """
+    return {'gamePk': game_pk, 'gameType': 'R', 'status': {'abstractGameState': state},
+            'teams': {'away': {'score': away_score, 'team': {'id': away, 'name': str(away)}},
+                      'home': {'score': home_score, 'team': {'id': home, 'name': str(home)}}},
+            'linescore': {'currentPeriod': period, 'hasShootout': shootout}}
+
+
+class Unit01StandingsTests(unittest.TestCase):
+    """
+    Unit Tests for the StandingsEngine class
+    """
+    def setUp(self):
+        """Fixture that creates the schedule for the unit tests to use."""
+        self.schedule = {'dates': [
+            {'date': '2018-10-03', 'games': [make_game(1, 22, 3, 6, 2),
+                                             make_game(2, 3, 1, 10, 2, period=4)]},
+            {'date': '2018-10-04', 'games': [make_game(3, 6, 4, 3, 3, period=5, shootout=True),
+                                             make_game(4, 22, 0, 10, 0, state='Live')]}]}
+        self.engine = standings.StandingsEngine()
+
+    def test_01_records(self):
+        """
+        Wins, regulation and overtime losses and points are counted
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        self.assertEqual(self.engine.add_schedule(self.schedule), 3)
+        self.assertEqual(self.engine.add_schedule(self.schedule), 0)
+        table = {row['teamId']: row for row in self.engine.table()}
+        self.assertEqual(table[6]['points'], 2)
+        self.assertEqual((table[6]['wins'], table[6]['losses']), (1, 1))
+        self.assertEqual(table[6]['regulationPlusOtWins'], 0)
+        self.assertEqual((table[3]['ot'], table[3]['points']), (2, 2))
+        self.assertEqual(table[10]['regulationWins'], 0)
+        self.assertEqual(table[10]['regulationPlusOtWins'], 1)
+        self.assertEqual(table[22]['pointsPace'], 164.0)
+
+    def test_02_tie_breakers(self):
+        """
+        Teams level on points are ordered by games played, then regulation wins
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        self.engine.add_schedule(self.schedule)
+        order = [row['teamId'] for row in self.engine.table()]
+        self.assertEqual(order, [22, 10, 6, 3])
+
+    def test_03_as_of_date(self):
+        """
+        The standings can be produced as of any date
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        self.engine.add_schedule(self.schedule)
+        table = {row['teamId']: row for row in self.engine.table('2018-10-03')}
+        self.assertEqual(table[6]['gamesPlayed'], 1)
+        self.assertEqual(table[3]['points'], 1)
+        self.assertEqual(self.engine.table('2018-10-02'), [])
+
+    def test_04_full_season_speed(self):
+        """
+        A full season of results is computed well under a second
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        dates = []
+        for day in range(180):
+            games = [make_game(day * 8 + index, index, day % 5, index + 16, index % 4,
+                               period=3 + day % 3) for index in range(8)]
+            dates.append({'date': '2019-{:03d}'.format(day), 'games': games})
+        start = time.perf_counter()
+        self.engine.add_schedule({'dates': dates})
+        self.engine.table()
+        self.engine.table('2019-090')
+        self.assertLess(time.perf_counter() - start, 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
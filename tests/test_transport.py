@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+""" unit tests for transport.py """
+
+import gzip
+import json
+import zlib
+import threading
+import unittest
+import http.server
+import nhlapi
+import transport
+
+
+class JsonHandler(http.server.BaseHTTPRequestHandler):
+    """ serve a small json document for every path, and 404 for /missing """
+    protocol_version = 'HTTP/1.1'
+    connections = set()
+
+    def do_GET(self):
+        """ handle a GET request """
+        JsonHandler.connections.add(self.client_address)
+        if self.path == '/missing':
+            self.send_error(404)
+            return
+        body = json.dumps({'path': self.path, 'padding': [0] * 500}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        """ keep the test output quiet """
+
+
+class Unit01TransportTests(unittest.TestCase):
+    """
+    Unit Tests for the transports
+    """
+    @classmethod
+    def setUpClass(cls):
+        """Fixture that starts a local http server for the unit tests to use."""
+        cls.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), JsonHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = 'http://127.0.0.1:{}/'.format(cls.server.server_address[1])
+
+    @classmethod
+    def tearDownClass(cls):
+        """Fixture that stops the local http server."""
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_01_urllib_transport(self):
+        """
+        The urllib transport fetches json and reports http errors
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        fetcher = transport.UrllibTransport()
+        self.assertEqual(nhlapi.get_json_data(self.base_url + 'teams', fetcher),
+                         {'path': '/teams', 'padding': [0] * 500})
+        self.assertEqual(fetcher.fetch(self.base_url + 'missing').status, 404)
+
+    def test_02_pooled_transport_reuses_connections(self):
+        """
+        The pooled transport sends many requests over one kept-alive connection
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        JsonHandler.connections = set()
+        with transport.PooledTransport() as fetcher:
+            for index in range(5):
+                data = nhlapi.get_json_data(self.base_url + 'game/{}'.format(index), fetcher)
+                self.assertEqual(data['path'], '/game/{}'.format(index))
+        self.assertEqual(len(JsonHandler.connections), 1)
+
+    def test_03_fetch_many_in_order(self):
+        """
+        Many urls are fetched at the same time and returned in url order
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        urls = [self.base_url + 'people/{}'.format(index) for index in range(12)]
+        with transport.PooledTransport() as fetcher:
+            results = nhlapi.get_many_json_data(urls, fetcher, workers=4)
+        self.assertEqual([result['path'] for result in results],
+                         ['/people/{}'.format(index) for index in range(12)])
+
+    def test_04_default_transport(self):
+        """
+        The default transport can be selected by name
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        orig = transport.get_default_transport()
+        try:
+            self.assertIsInstance(transport.set_default_transport('pooled'),
+                                  transport.PooledTransport)
+            self.assertEqual(nhlapi.get_json_data(self.base_url + 'schedule'),
+                             {'path': '/schedule', 'padding': [0] * 500})
+            with self.assertRaises(ValueError):
+                transport.set_default_transport('carrier-pigeon')
+        finally:
+            transport.set_default_transport(orig)
+
+    def test_05_compression_and_transfer_stats(self):
+        """
+        Responses are compressed on the wire and the bytes are counted per endpoint
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        transport.TRANSFER_STATS.reset()
+        fetcher = transport.UrllibTransport()
+        for game_id in (2018020131, 2018020132):
+            response = fetcher.fetch(self.base_url + 'game/{}/feed/live'.format(game_id))
+            self.assertEqual(response.headers['content-encoding'], 'gzip')
+            self.assertLess(response.wire_bytes, len(response.body))
+        stats = transport.get_transfer_stats()['/game/{id}/feed/live']
+        self.assertEqual(stats['requests'], 2)
+        self.assertGreater(stats['savedBytes'], 0)
+        self.assertGreater(stats['ratio'], 1.0)
+
+    def test_06_read_body(self):
+        """
+        Bodies are decompressed chunk by chunk
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        data = b'{"teams": []}' * 100
+        sent = gzip.compress(data)
+        chunks = [sent[index:index + 7] for index in range(0, len(sent), 7)]
+        self.assertEqual(transport.read_body(chunks, 'gzip'), (data, len(sent)))
+        self.assertEqual(transport.read_body([data], None), (data, len(data)))
+        with self.assertRaises(ValueError):
+            transport.read_body([data], 'compress')
+
+    def test_07_read_deflate_body(self):
+        """
+        Deflate bodies are decompressed whether they are zlib wrapped or raw
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        data = b'{"teams": []}' * 100
+        raw = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+        for sent in (zlib.compress(data), raw.compress(data) + raw.flush()):
+            for size in (1, 7, len(sent)):
+                chunks = [sent[index:index + size] for index in range(0, len(sent), size)]
+                self.assertEqual(transport.read_body(chunks, 'deflate'), (data, len(sent)))
+        with self.assertRaises(zlib.error):
+            transport.read_body([zlib.compress(data)[:2], b'not deflate'], 'deflate')
+
+    def test_08_transport_interface(self):
+        """
+        A transport must implement _fetch before it can be created
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        class NoFetchTransport(transport.Transport):
+            """ a transport missing _fetch """
+
+        with self.assertRaises(TypeError):
+            NoFetchTransport()
+        self.assertIsInstance(transport.UrllibTransport(), transport.Transport)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+""" unit tests for warmup.py """
+
+import unittest
+import unittest.mock
+import nhlapi
+import cache
+import gateway
+import transport
+import warmup
+
+SCHEDULE = {'dates': [{'date': '2018-10-26', 'games': [
+    {'gamePk': 2018020131, 'gameDate': '2018-10-26T23:00:00Z',
+     'teams': {'away': {'team': {'id': 3}}, 'home': {'team': {'id': 22}}}},
+    {'gamePk': 2018020132, 'gameDate': '2018-10-27T02:00:00Z',
+     'teams': {'away': {'team': {'id': 22}}, 'home': {'team': {'id': 6}}}}]}]}
+
+
+class Unit01WarmUpTests(unittest.TestCase):
+    """
+    Unit Tests for the WarmUp class
+    """
+    def setUp(self):
+        """Fixture that creates the warm-up for the unit tests to use."""
+        self.cache = cache.ResponseCache()
+        self.warmup = warmup.WarmUp(self.cache)
+
+    def tearDown(self):
+        """Fixture that stops the cache being used by get_json_data."""
+        nhlapi.set_response_cache(None)
+
+    def test_01_urls_of_the_games(self):
+        """
+        Each game's linescore, boxscore and content and each team's roster are prefetched once
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        urls = self.warmup.get_urls(SCHEDULE)
+        self.assertEqual(len(urls), 6 + 3)
+        self.assertIn('https://statsapi.web.nhl.com/api/v1/game/2018020131/boxscore', urls)
+        self.assertIn('https://statsapi.web.nhl.com/api/v1/teams/22/?expand=team.roster', urls)
+        self.assertIsNone(nhlapi.get_response_cache())
+
+    def test_02_lead_time(self):
+        """
+        With a lead time only the games starting soon are prefetched
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        self.warmup.lead = 3600
+        now = 1540594800  # 2018-10-26T23:00:00Z
+        urls = self.warmup.get_urls(SCHEDULE, now=now - 1800)
+        self.assertEqual(len(urls), 3 + 2)
+        self.assertTrue(all('2018020132' not in url for url in urls))
+
+    def test_03_run_once(self):
+        """
+        A run prefetches every url of the day's schedule
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        with unittest.mock.patch.object(self.warmup, 'get_schedule', return_value=SCHEDULE), \
+                unittest.mock.patch('warmup.prefetch', return_value=9) as prefetch:
+            self.warmup.run(date='2018-10-26', interval=0, count=2)
+        self.assertEqual(prefetch.call_count, 2)
+        self.assertEqual(len(prefetch.call_args[0][0]), 9)
+        self.assertEqual((self.warmup.runs, self.warmup.fetched), (2, 18))
+
+    def test_04_prefetch_into_own_cache(self):
+        """
+        The urls are prefetched into the warm-up's cache only
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        body = b'{"teams": []}'
+        fetcher = unittest.mock.Mock()
+        fetcher.fetch_many.side_effect = lambda urls, workers: [
+            transport.Response(200, 'OK', {}, body, len(body)) for _ in urls]
+        self.warmup.transport = fetcher
+        with unittest.mock.patch.object(self.warmup, 'get_schedule', return_value=SCHEDULE):
+            self.assertEqual(self.warmup.run_once(), 9)
+        self.assertEqual(len(self.cache), 9)
+        self.assertIsNone(nhlapi.get_response_cache())
+
+    def test_05_through_gateway(self):
+        """
+        With a base url the urls are prefetched through it, e.g. a gateway
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        through = warmup.WarmUp(self.cache, base_url='http://localhost:8080/api/v1')
+        urls = through.get_urls(SCHEDULE)
+        self.assertEqual(len(urls), 6 + 3)
+        self.assertIn('http://localhost:8080/api/v1/game/2018020131/boxscore', urls)
+        self.assertEqual(through.get_url('http://example.com/x'), 'http://example.com/x')
+
+    def test_06_inside_gateway(self):
+        """
+        Inside a gateway the urls are keyed like the gateway's own requests
+
+        :param self: reference to the test framework object
+        :return: Nothing
+        """
+        server = gateway.Gateway('http://localhost:8000', self.cache, unittest.mock.Mock())
+        try:
+            inside = warmup.WarmUp(self.cache, base_url=server.get_url(gateway.API_PATH))
+            self.assertIn(server.get_url('/api/v1/game/2018020131/boxscore'),
+                          inside.get_urls(SCHEDULE))
+        finally:
+            server.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,477 @@
+"""
+    HTTP transports for the nhlapi package
+
+    A transport fetches the raw bytes of a url.  get_json_data() and the entity
+    classes use the module default transport unless one is passed to them, so
+    the transport can be switched (or selected with the NHLAPI_TRANSPORT
+    environment variable) without touching any call sites.
+
+    urllib   one connection per request (the original behaviour)
+    pooled   keep-alive connections reused per host
+    http2    many requests multiplexed over one HTTP/2 connection (requires httpx[http2])
+
+    Every transport asks for a compressed response (gzip/deflate, and brotli when
+    the brotli package is installed), decompresses it chunk by chunk as it is
+    read, and records the bytes on the wire and the decoded bytes per endpoint.
+"""
+
+import os
+import re
+import abc
+import ssl
+import zlib
+import queue
+import threading
+import collections
+import concurrent.futures
+import http.client
+import urllib
+import urllib.error
+import urllib.parse
+import urllib.request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# The result of fetching a url.  headers is a dictionary with lower case names,
+# body is the decompressed body and wire_bytes the size of the body as sent.
+Response = collections.namedtuple('Response',
+                                  ['status', 'reason', 'headers', 'body', 'wire_bytes'])
+
+# The content encodings we ask for, best first.
+ACCEPT_ENCODING = ('br, ' if brotli else '') + 'gzip, deflate'
+
+# The size of the chunks read from a response.
+CHUNK_SIZE = 64 * 1024
+
+
+def get_ssl_context(verify=False):
+    """
+    get the ssl context used for https requests
+
+    :param verify: True to verify the server certificate
+    :return: the ssl context
+    """
+    ssl_context = ssl.create_default_context()
+    if not verify:
+        ssl_context.check_hostname = False
+        ssl_context.verify_mode = ssl.CERT_NONE
+    return ssl_context
+
+
+def get_charset(headers):
+    """
+    get the charset from the content-type of a response
+
+    :param headers: the response headers
+    :return: the charset, or None if none is given
+    """
+    content_type = headers.get('content-type', '')
+    for param in content_type.split(';')[1:]:
+        name, _, value = param.strip().partition('=')
+        if name.lower() == 'charset':
+            return value.strip('"\'')
+    return None
+
+
+class DeflateDecoder:
+    """
+    A decoder of the deflate content-encoding.  Deflate is meant to be zlib
+    wrapped, but some servers send raw deflate, so a stream whose first bytes
+    are not a zlib header is decoded as raw deflate instead.
+    """
+
+    def __init__(self):
+        """
+        initialize this DeflateDecoder object
+
+        :param self: reference to a DeflateDecoder instance
+        """
+        self._decoder = zlib.decompressobj(zlib.MAX_WBITS)
+        self._head = b''
+        self.raw = False
+
+    def decompress(self, chunk):
+        """
+        decompress the next chunk of the stream
+
+        :param self: reference to a DeflateDecoder instance
+        :param chunk: the bytes as sent
+        :return: the decompressed bytes
+        """
+        head = self._head
+        if len(head) < 2:
+            # the two byte zlib header is checked as soon as both bytes are read
+            self._head = head + chunk[:2]
+        try:
+            return self._decoder.decompress(chunk)
+        except zlib.error:
+            if self.raw or len(head) >= 2:
+                raise
+        self.raw = True
+        self._decoder = zlib.decompressobj(-zlib.MAX_WBITS)
+        return self._decoder.decompress(head + chunk)
+
+    def flush(self):
+        """
+        decompress the rest of the stream once every chunk has been read
+
+        :param self: reference to a DeflateDecoder instance
+        :return: the decompressed bytes
+        """
+        return self._decoder.flush()
+
+
+def read_body(chunks, content_encoding=None):
+    """
+    read a response body, decompressing each chunk as it arrives
+
+    :param chunks: an iterable of the body chunks as sent
+    :param content_encoding: the content-encoding of the response
+    :return: a tuple of the decompressed body and the number of bytes sent
+    """
+    encoding = (content_encoding or 'identity').strip().lower()
+    flush = None
+    if encoding in ('gzip', 'x-gzip'):
+        # 32 + MAX_WBITS accepts both gzip and zlib headers
+        decoder = zlib.decompressobj(32 + zlib.MAX_WBITS)
+        decompress, flush = decoder.decompress, decoder.flush
+    elif encoding == 'deflate':
+        decoder = DeflateDecoder()
+        decompress, flush = decoder.decompress, decoder.flush
+    elif encoding == 'br' and brotli:
+        decompress = brotli.Decompressor().process
+    elif encoding == 'identity':
+        decompress = None
+    else:
+        raise ValueError('unsupported content-encoding "{}"'.format(encoding))
+
+    parts = []
+    wire_bytes = 0
+    for chunk in chunks:
+        wire_bytes += len(chunk)
+        parts.append(decompress(chunk) if decompress else chunk)
+    if flush:
+        parts.append(flush())
+    return b''.join(parts), wire_bytes
+
+
+def get_endpoint(url):
+    """
+    get the endpoint of a url for the transfer stats: the path with ids replaced
+
+    :param url: the url e.g. 'https://statsapi.web.nhl.com/api/v1/game/2018020131/feed/live'
+    :return: the endpoint e.g. '/api/v1/game/{id}/feed/live'
+    """
+    return re.sub(r'/\d+(?=/|$)', '/{id}', urllib.parse.urlsplit(url).path)
+
+
+class TransferStats:
+    """
+    Bytes on the wire and decoded bytes per endpoint
+    """
+
+    def __init__(self):
+        """
+        initialize this TransferStats object
+
+        :param self: reference to a TransferStats instance
+        """
+        self.endpoints = {}
+        self._lock = threading.Lock()
+
+    def add(self, url, wire_bytes, decoded_bytes):
+        """
+        record one response
+
+        :param self: reference to a TransferStats instance
+        :param url: the url of the request
+        :param wire_bytes: the size of the body as sent
+        :param decoded_bytes: the size of the decompressed body
+        :return: nothing
+        """
+        endpoint = get_endpoint(url)
+        with self._lock:
+            counts = self.endpoints.get(endpoint)
+            if counts is None:
+                counts = self.endpoints[endpoint] = [0, 0, 0]
+            counts[0] += 1
+            counts[1] += wire_bytes
+            counts[2] += decoded_bytes
+
+    def report(self):
+        """
+        get the transfer stats
+
+        :param self: reference to a TransferStats instance
+        :return: a dictionary of endpoint to its 'requests', 'wireBytes', 'decodedBytes',
+                 'savedBytes' and compression 'ratio'
+        """
+        with self._lock:
+            endpoints = {endpoint: list(counts) for endpoint, counts in self.endpoints.items()}
+        return {endpoint: {'requests': requests, 'wireBytes': wire_bytes,
+                           'decodedBytes': decoded_bytes,
+                           'savedBytes': decoded_bytes - wire_bytes,
+                           'ratio': decoded_bytes / wire_bytes if wire_bytes else 1.0}
+                for endpoint, (requests, wire_bytes, decoded_bytes) in endpoints.items()}
+
+    def reset(self):
+        """
+        forget all of the recorded responses
+
+        :param self: reference to a TransferStats instance
+        :return: nothing
+        """
+        with self._lock:
+            self.endpoints = {}
+
+
+# The transfer stats of every transport.
+TRANSFER_STATS = TransferStats()
+
+
+class Transport(abc.ABC):
+    """
+    The interface of an HTTP transport.  Transports implement _fetch().
+    """
+
+    def fetch(self, url, headers=None):
+        """
+        fetch a url, asking for a compressed response
+
+        :param self: reference to a Transport instance
+        :param url: the url to fetch
+        :param headers: (optional) a dictionary of extra request headers
+        :return: a Response with the decompressed body
+        """
+        request_headers = {'Accept-Encoding': ACCEPT_ENCODING}
+        request_headers.update(headers or {})
+        response = self._fetch(url, request_headers)
+        TRANSFER_STATS.add(url, response.wire_bytes, len(response.body))
+        return response
+
+    @abc.abstractmethod
+    def _fetch(self, url, headers):
+        """
+        fetch a url with the request headers given
+
+        :param self: reference to a Transport instance
+        :param url: the url to fetch
+        :param headers: a dictionary of the request headers
+        :return: a Response with the decompressed body
+        """
+
+    def fetch_many(self, urls, headers=None, workers=8):
+        """
+        fetch many urls at the same time
+
+        :param self: reference to a Transport instance
+        :param urls: the urls to fetch
+        :param headers: (optional) a dictionary of extra request headers
+        :param workers: the number of requests in flight at the same time
+        :return: a list of Responses in the order of the urls
+        """
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(lambda url: self.fetch(url, headers), urls))
+
+    def close(self):
+        """
+        close any open connections
+
+        :param self: reference to a Transport instance
+        :return: nothing
+        """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class UrllibTransport(Transport):
+    """
+    A transport opening a new connection with urllib for every request
+    """
+
+    def __init__(self, timeout=30, verify=False):
+        """
+        initialize this UrllibTransport object
+
+        :param self: reference to a UrllibTransport instance
+        :param timeout: the timeout of a request in seconds
+        :param verify: True to verify the server certificate
+        """
+        self.timeout = timeout
+        self.ssl_context = get_ssl_context(verify)
+
+    def _fetch(self, url, headers):
+        request = urllib.request.Request(url, headers=headers)
+        try:
+            response = urllib.request.urlopen(request, context=self.ssl_context,
+                                              timeout=self.timeout)
+            status, reason = response.status, response.reason
+        except urllib.error.HTTPError as err:
+            response = err
+            status, reason = err.code, err.reason
+        with response:
+            response_headers = {name.lower(): value for name, value in response.headers.items()}
+            body, wire_bytes = read_body(iter(lambda: response.read(CHUNK_SIZE), b''),
+                                         response_headers.get('content-encoding'))
+        return Response(status, reason, response_headers, body, wire_bytes)
+
+
+class PooledTransport(Transport):
+    """
+    A transport keeping keep-alive connections open and reusing them per host
+    """
+
+    def __init__(self, max_per_host=8, timeout=30, verify=False):
+        """
+        initialize this PooledTransport object
+
+        :param self: reference to a PooledTransport instance
+        :param max_per_host: the number of idle connections kept open to each host
+        :param timeout: the timeout of a request in seconds
+        :param verify: True to verify the server certificate
+        """
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.ssl_context = get_ssl_context(verify)
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def _get_pool(self, key):
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = self._pools[key] = queue.LifoQueue(self.max_per_host)
+            return pool
+
+    def _connect(self, scheme, host, port):
+        if scheme == 'https':
+            return http.client.HTTPSConnection(host, port, timeout=self.timeout,
+                                               context=self.ssl_context)
+        return http.client.HTTPConnection(host, port, timeout=self.timeout)
+
+    def _fetch(self, url, headers):
+        parts = urllib.parse.urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port)
+        path = (parts.path or '/') + ('?' + parts.query if parts.query else '')
+        pool = self._get_pool(key)
+
+        for attempt in range(2):
+            try:
+                connection = pool.get_nowait()
+            except queue.Empty:
+                connection = self._connect(*key)
+            try:
+                connection.request('GET', path, headers=headers)
+                response = connection.getresponse()
+                body, wire_bytes = read_body(iter(lambda: response.read(CHUNK_SIZE), b''),
+                                             response.getheader('content-encoding'))
+                break
+            except (http.client.HTTPException, ConnectionError):
+                # an idle keep-alive connection may have been closed by the server
+                connection.close()
+                if attempt:
+                    raise
+
+        if response.will_close:
+            connection.close()
+        else:
+            try:
+                pool.put_nowait(connection)
+            except queue.Full:
+                connection.close()
+        return Response(response.status, response.reason,
+                        {name.lower(): value for name, value in response.getheaders()},
+                        body, wire_bytes)
+
+    def close(self):
+        with self._lock:
+            pools = list(self._pools.values())
+            self._pools = {}
+        for pool in pools:
+            while not pool.empty():
+                pool.get_nowait().close()
+
+
+class Http2Transport(Transport):
+    """
+    A transport multiplexing concurrent requests over one HTTP/2 connection per host
+    """
+
+    def __init__(self, timeout=30, verify=False):
+        """
+        initialize this Http2Transport object
+
+        :param self: reference to a Http2Transport instance
+        :param timeout: the timeout of a request in seconds
+        :param verify: True to verify the server certificate
+        """
+        try:
+            import httpx
+        except ImportError:
+            raise ImportError('the http2 transport requires httpx (pip install httpx[http2])')
+        self._client = httpx.Client(http2=True, timeout=timeout,
+                                    verify=get_ssl_context(verify))
+
+    def _fetch(self, url, headers):
+        with self._client.stream('GET', url, headers=headers) as response:
+            response_headers = {name.lower(): value for name, value in response.headers.items()}
+            body, wire_bytes = read_body(response.iter_raw(CHUNK_SIZE),
+                                         response_headers.get('content-encoding'))
+        return Response(response.status_code, response.reason_phrase, response_headers,
+                        body, wire_bytes)
+
+    def close(self):
+        self._client.close()
+
+
+TRANSPORTS = {'urllib': UrllibTransport,
+              'pooled': PooledTransport,
+              'http2': Http2Transport}
+
+_default_transport = {'transport': None}
+
+
+def set_default_transport(transport=None):
+    """
+    set the transport used when none is given to get_json_data() or an entity class
+
+    :param transport: a Transport instance, or the name of one in TRANSPORTS. if None,
+                      use the NHLAPI_TRANSPORT environment variable, or else 'urllib'
+    :return: the transport now in use
+    """
+    if transport is None:
+        transport = os.environ.get('NHLAPI_TRANSPORT', 'urllib')
+    if isinstance(transport, str):
+        if transport not in TRANSPORTS:
+            raise ValueError('transport "{}" is not available (choose from: {})'.format(
+                transport, ', '.join(TRANSPORTS)))
+        transport = TRANSPORTS[transport]()
+    _default_transport['transport'] = transport
+    return transport
+
+
+def get_transfer_stats():
+    """
+    get the bytes on the wire and decoded bytes per endpoint for every transport
+
+    :return: a dictionary of endpoint to its transfer stats (see TransferStats.report)
+    """
+    return TRANSFER_STATS.report()
+
+
+def get_default_transport():
+    """
+    get the transport used when none is given
+
+    :return: the transport
+    """
+    if _default_transport['transport'] is None:
+        set_default_transport()
+    return _default_transport['transport']
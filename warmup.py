@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+    Warm-up of the response cache for the nhlapi package
+
+    Reads the day's Schedule and prefetches the linescore, boxscore and
+    content of every game plus the rosters of both teams into the response
+    cache, using the same urls as the Game and Team classes, so the first
+    requests around puck drop are served from the cache instead of all
+    going upstream at once.
+
+    The response cache of a WarmUp only serves its own process.  To warm data
+    other processes use, prefetch through a gateway.py server (base_url, whose
+    shared cache is then filled), as the command line interface does, or run
+    it inside the gateway (gateway.py --warmup).
+"""
+
+import json
+import time
+import calendar
+import argparse
+import threading
+import logging
+# from logging import debug
+from logging import info
+# from logging import warning
+# from logging import error
+# from logging import critical
+from nhlapi import BASE_URL
+from nhlapi import prefetch
+from nhlapi import get_response_cache
+from cache import ResponseCache
+from schedule import Schedule
+from game import Game
+from team import Team
+
+
+class WarmUp:
+    """
+    Prefetch the data of the day's games into the response cache
+    """
+
+    GAME_STATS = (Game.STATS['lineScore'], Game.STATS['boxScore'], Game.STATS['content'])
+    TEAM_STATS = (Team.STATS['teamRoster'],)
+
+    def __init__(self, cache=None, transport=None, workers=8, lead=None, base_url=None):
+        """
+        initialize this WarmUp object
+
+        :param self: reference to a WarmUp instance
+        :param cache: (optional) the ResponseCache to fill. defaults to the cache set
+                      with nhlapi.set_response_cache(), or a new one of its own (which
+                      is not set as the response cache of the process)
+        :param transport: (optional) the transport to fetch with instead of the default transport
+        :param workers: the number of requests in flight at the same time
+        :param lead: (optional) only prefetch the games starting within this many seconds
+                     (or already started). defaults to every game of the day
+        :param base_url: (optional) the api root to prefetch through instead of the
+                         stats api, e.g. the 'http://localhost:8080/api/v1/' of a
+                         gateway.py server, so the gateway's shared cache is warmed
+        """
+        self.cache = cache if cache is not None else get_response_cache()
+        if self.cache is None:
+            self.cache = ResponseCache()
+        self.transport = transport
+        self.workers = workers
+        self.lead = lead
+        self.base_url = base_url.rstrip('/') + '/' if base_url else None
+        self.runs = 0
+        self.fetched = 0
+        self._stop = threading.Event()
+
+    def get_url(self, url):
+        """
+        get the url to prefetch an api url through
+
+        :param self: reference to a WarmUp instance
+        :param url: the url of the stats api
+        :return: the url under base_url if one is set, otherwise the url itself
+        """
+        if self.base_url and url.startswith(BASE_URL):
+            return self.base_url + url[len(BASE_URL):]
+        return url
+
+    def get_schedule(self, date=None):
+        """
+        get the schedule of a day
+
+        :param self: reference to a WarmUp instance
+        :param date: (optional) the date e.g. '2018-10-26'. defaults to today
+        :return: the schedule response
+        """
+        schedule = Schedule(content={}, transport=self.transport)
+        schedule.url = self.get_url(schedule.url)
+        schedule.load_ext_url({Schedule.STATS['date']: date or time.strftime('%Y-%m-%d')})
+        return schedule.content
+
+    def get_urls(self, content, now=None):
+        """
+        get the urls to prefetch for the games of a schedule
+
+        :param self: reference to a WarmUp instance
+        :param content: a schedule response
+        :param now: (optional) the time in seconds since the epoch. defaults to now
+        :return: the list of urls, without duplicates
+        """
+        now = time.time() if now is None else now
+        urls = []
+        for date in content.get('dates', []) if content else []:
+            for game in date.get('games', []):
+                if self.lead is not None and game.get('gameDate'):
+                    start = calendar.timegm(time.strptime(game['gameDate'],
+                                                          '%Y-%m-%dT%H:%M:%SZ'))
+                    if start - now > self.lead:
+                        continue
+                entity = Game(game['gamePk'], content={})
+                urls.extend(entity.get_ext_url(stat) for stat in self.GAME_STATS)
+                for side in ('away', 'home'):
+                    entity = Team(game['teams'][side]['team']['id'], content={})
+                    urls.extend(entity.get_ext_url(stat) for stat in self.TEAM_STATS)
+        return list(dict.fromkeys(self.get_url(url) for url in urls))
+
+    def run_once(self, date=None):
+        """
+        prefetch the data of the day's games once
+
+        :param self: reference to a WarmUp instance
+        :param date: (optional) the date e.g. '2018-10-26'. defaults to today
+        :return: the number of urls prefetched
+        """
+        urls = self.get_urls(self.get_schedule(date))
+        fetched = prefetch(urls, self.transport, self.workers, self.cache) if urls else 0
+        self.runs += 1
+        self.fetched += fetched
+        info('warmup: prefetched {} of {} urls'.format(fetched, len(urls)))
+        return fetched
+
+    def run(self, date=None, interval=300.0, count=None):
+        """
+        prefetch the data of the day's games every interval until stopped
+
+        :param self: reference to a WarmUp instance
+        :param date: (optional) the date e.g. '2018-10-26'. defaults to the current day
+        :param interval: the seconds between the starts of two runs
+        :param count: (optional) the number of runs. defaults to running until stop()
+        :return: nothing
+        """
+        self._stop.clear()
+        runs = 0
+        while not self._stop.is_set() and (count is None or runs < count):
+            started = time.time()
+            self.run_once(date)
+            runs += 1
+            if count is None or runs < count:
+                self._stop.wait(max(0.0, interval - (time.time() - started)))
+
+    def start(self, date=None, interval=300.0):
+        """
+        run the warm-up in a background thread
+
+        :param self: reference to a WarmUp instance
+        :param date: (optional) the date e.g. '2018-10-26'. defaults to the current day
+        :param interval: the seconds between the starts of two runs
+        :return: the thread
+        """
+        thread = threading.Thread(target=self.run, args=(date, interval), daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        """
+        stop a running warm-up after its current run
+
+        :param self: reference to a WarmUp instance
+        :return: nothing
+        """
+        self._stop.set()
+
+
+def parse_args():
+    """
+    Parse the options from the command line
+
+    :return: The options as a dictionary
+    """
+    description = 'Prefetch the data of the day\'s NHL games into the shared cache of a ' \
+        'gateway.py server.'
+    epilog = 'Example use: warmup.py --gateway=http://localhost:8080/api/v1/ --date=2018-10-26 ' \
+        '--lead=3600 --interval=300 --count=12'
+
+    # Standard options for each nhlapi interface
+    parser = argparse.ArgumentParser(description=description, epilog=epilog)
+    parser.add_argument('--humanReadable', help='output in easier to read format for users',
+                        action='store_true')
+    parser.add_argument('--log', default='/dev/null', type=str,
+                        help='the file where the output should be written')
+
+    # Optional user supplied values
+    parser.add_argument('--date', help='the day of the games (default: today)', type=str)
+    parser.add_argument('--lead', type=float,
+                        help='only prefetch games starting within this many seconds')
+    parser.add_argument('--interval', default=300.0, type=float,
+                        help='the seconds between prefetches')
+    parser.add_argument('--count', default=1, type=int,
+                        help='the number of prefetches to run')
+    parser.add_argument('--workers', default=8, type=int,
+                        help='the number of requests in flight at the same time')
+    # the response cache of this process is gone when it exits, so a gateway is needed
+    parser.add_argument('--gateway', type=str, required=True,
+                        help='the api root of a gateway.py server to warm, '
+                        'e.g. http://localhost:8080/api/v1/')
+
+    args = parser.parse_args()
+
+    if args.log:
+        log_format = '%(asctime)s %(levelname)s: %(message)s'
+        logging.basicConfig(filename=args.log,
+                            format=log_format,
+                            level=logging.DEBUG)
+
+    warmup = WarmUp(workers=args.workers, lead=args.lead, base_url=args.gateway)
+    warmup.run(args.date, args.interval, args.count)
+
+    output = {'runs': warmup.runs, 'prefetched': warmup.fetched}
+    if args.humanReadable:
+        output = json.dumps(output, indent=1)
+    print(output)
+
+    result = 'prefetched {} urls in {} runs'.format(warmup.fetched, warmup.runs)
+    info(result)
+
+    return args
+
+
+if __name__ == '__main__':
+    parse_args()